@@ -0,0 +1,125 @@
+'''
+Benchmark harness: runs the setup, the prover and the verifier on synthetic circuits and records, for every phase,
+the wall clock time and the peak of the memory allocated by Python (tracemalloc).
+tracemalloc slows Python down several times, so each phase is timed first, then run again under tracemalloc for its memory
+(--no-memory skips the second run). Both runs start cold: the R1CS of the circuit is evicted from the circuit cache and the
+SRS check of the proving key is forgotten before each of them, so the memory is the one of the run that was timed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench --circuits chain random --sizes 6 8 10 --out results.json
+    python -m benchmarks.bench --sizes 6 8 --compare baseline.json --threshold 0.25
+
+Sizes are log2 of the number of constraints. Results are written as JSON (stdout without --out).
+With --compare, every phase slower (or using more memory) than the baseline by more than the threshold is reported
+as a regression and the exit code is 1.
+'''
+
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from py_ecc.bn128.bn128_curve import curve_order
+
+from benchmarks import common
+from benchmarks.circuits import generate_example
+
+PHASES = ('setup', 'prove', 'verify')
+
+
+def make_cold(example_path):
+    # forgets what a previous run left for the next one: the parsed R1CS (memory and disk cache) and the SRS check stamps
+    from cache.cache import circuit_key, get_circuit_cache
+    from keys import keys
+    from prover import prover
+    from r1cs.r1cs import sparse_r1cs_path
+
+    get_circuit_cache().evict(circuit_key(sparse_r1cs_path(example_path), curve_order))
+    prover.checked_proving_keys.clear()
+    for stamp_path in glob.glob(glob.escape(example_path) + '*' + keys.SRS_CHECK_STAMP_SUFFIX):
+        os.remove(stamp_path)
+
+
+def measure(function, trace_memory=True, reset=None):
+    # reset() runs before the timed run and before the memory run, so that both start from the same state
+    if reset is not None:
+        reset()
+    started = time.perf_counter()
+    function()
+    measures = {'seconds': time.perf_counter() - started}
+    if trace_memory:
+        if reset is not None:
+            reset()
+        tracemalloc.start()
+        try:
+            function()
+            _, measures['peak_bytes'] = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return measures
+
+
+def run_benchmark(kind, log_size, workdir, density=3, seed=0, workers=1, trace_memory=True):
+    from trusted_setup.trusted_setup import TrustedSetup
+    from prover.prover import Prover
+    from verifier.verifier import Verifier
+
+    constraints_nb = 1 << log_size
+    example_path = generate_example(kind, constraints_nb, os.path.join(workdir, f'{kind}_{log_size}'), density=density, seed=seed)
+
+    result = {'circuit': kind, 'log_size': log_size, 'constraints': constraints_nb, 'density': density if kind == 'random' else None}
+    reset = lambda: make_cold(example_path)
+    result['setup'] = measure(lambda: TrustedSetup(example_path=example_path, seed=seed, workers=workers).generate_srs(), trace_memory, reset)
+    result['prove'] = measure(lambda: Prover(example_path=example_path).generate_proof(), trace_memory, reset)
+    result['verify'] = measure(lambda: Verifier(example_path=example_path).verify(), trace_memory, reset)
+    return result
+
+
+def measures(results):
+    # a phase regresses when its time or its peak memory grew, see benchmarks/common.py
+    named = {}
+    for result in results:
+        circuit = f"{result['circuit']} 2^{result['log_size']}" + (f" density {result['density']}" if result['density'] is not None else '')
+        for phase in PHASES:
+            for metric in ('seconds', 'peak_bytes'):
+                if metric in result[phase]:
+                    named[f"{circuit} {phase} {metric}"] = result[phase][metric]
+    return named
+
+
+def parse_arguments(args):
+    parser = argparse.ArgumentParser(description="Benchmark the setup, the prover and the verifier on synthetic circuits.")
+    parser.add_argument('--circuits', nargs='+', default=['chain', 'random'], help="synthetic circuits to run: chain, random")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[6, 8, 10], help="log2 of the number of constraints (6 to 16)")
+    parser.add_argument('--density', type=int, default=3, help="terms per linear combination of the random circuit")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the circuits, the witnesses and the setup")
+    parser.add_argument('--workers', type=int, default=1, help="processes used by the setup")
+    parser.add_argument('--no-memory', action='store_true', help="only time the phases, without the tracemalloc run")
+    parser.add_argument('--workdir', default=None, help="where the synthetic examples are written (default: a temporary directory)")
+    common.add_common_arguments(parser, threshold=0.2)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_arguments(sys.argv[1:] if args is None else args)
+    workdir = options.workdir or tempfile.mkdtemp(prefix='groth16_bench_')
+
+    from group import group
+    results = []
+    for kind in options.circuits:
+        for log_size in options.sizes:
+            print(f"Benchmarking {kind} circuit with 2^{log_size} constraints", file=sys.stderr)
+            # the messages of the setup, the prover and the verifier would mix with the JSON written on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                results.append(run_benchmark(kind, log_size, workdir, density=options.density, seed=options.seed, workers=options.workers, trace_memory=not options.no_memory))
+
+    meta = common.run_metadata(group_backend=group.get_backend_name(), workers=options.workers)
+    return common.write_or_compare(options, results, meta, measures)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+'''
+In this module we define the synthetic circuits used by the benchmarks.
+
+Both generators build the R1CS directly in sparse form (a dense 2^16 x 2^16 matrix would not fit in memory)
+together with a satisfying witness, and write them like an example directory:
+r1cs.jsonl (see r1cs/sparse.py), witness.json and public_witness.json.
+
+The witness layout follows the examples: [1, public outputs..., private variables...].
+    * chain: x^(n+1) computed with n chained multiplications, y_1 = x * x, y_i = y_(i-1) * x, the last product is the public output.
+    * random: every constraint multiplies two random linear combinations of `density` earlier variables into a new variable,
+      the last variable is copied to the public output by a final constraint.
+'''
+
+import json
+import os
+import random
+
+from py_ecc.bn128.bn128_curve import curve_order
+
+from r1cs.sparse import SparseMatrix, R1CS, save_sparse_r1cs
+
+
+def write_example(r1cs, witness, public_inputs_nb, directory):
+    os.makedirs(directory, exist_ok=True)
+    example_path = os.path.join(directory, '')
+    save_sparse_r1cs(r1cs, example_path + 'r1cs.jsonl')
+    with open(example_path + 'witness.json', 'w') as f:
+        json.dump(witness, f)
+    with open(example_path + 'public_witness.json', 'w') as f:
+        json.dump(witness[:public_inputs_nb], f)
+    return example_path
+
+
+def chain_circuit(constraints_nb, seed=0):
+    # variables: 0 -> 1, 1 -> out, 2 -> x, 3 .. n+1 -> y_1 .. y_(n-1)
+    assert constraints_nb >= 1, "A circuit needs at least one constraint"
+    rnd = random.Random(seed)
+    x = rnd.randrange(2, curve_order)
+    variables_nb = constraints_nb + 2
+    witness = [1, 0, x]
+    L, R, O = (SparseMatrix(variables_nb, curve_order) for _ in range(3))
+    previous, previous_value = 2, x
+    for i in range(constraints_nb):
+        value = previous_value * x % curve_order
+        output = 1 if i == constraints_nb - 1 else len(witness)
+        if output == 1:
+            witness[1] = value
+        else:
+            witness.append(value)
+        L.append_row([(previous, 1)])
+        R.append_row([(2, 1)])
+        O.append_row([(output, 1)])
+        previous, previous_value = output, value
+    return R1CS(L, R, O), witness, 2
+
+
+def random_circuit(constraints_nb, density=3, seed=0):
+    # variables: 0 -> 1, 1 -> out, 2 .. 1+density -> random inputs, then one new variable per constraint
+    assert constraints_nb >= 2, "The random circuit needs at least two constraints"
+    rnd = random.Random(seed)
+    inputs_nb = max(density, 1)
+    variables_nb = 2 + inputs_nb + constraints_nb - 1
+    witness = [1, 0] + [rnd.randrange(curve_order) for _ in range(inputs_nb)]
+    L, R, O = (SparseMatrix(variables_nb, curve_order) for _ in range(3))
+
+    def random_combination():
+        # density terms over the constant and the variables computed so far (never the output, set at the end)
+        candidates = [0] + list(range(2, len(witness)))
+        terms = [(rnd.choice(candidates), rnd.randrange(1, curve_order)) for _ in range(density)]
+        return terms, sum(coeff * witness[variable] for variable, coeff in terms) % curve_order
+
+    for _ in range(constraints_nb - 1):
+        left, left_value = random_combination()
+        right, right_value = random_combination()
+        L.append_row(left)
+        R.append_row(right)
+        O.append_row([(len(witness), 1)])
+        witness.append(left_value * right_value % curve_order)
+
+    # out * 1 = last variable
+    witness[1] = witness[-1]
+    L.append_row([(1, 1)])
+    R.append_row([(0, 1)])
+    O.append_row([(len(witness) - 1, 1)])
+    return R1CS(L, R, O), witness, 2
+
+
+CIRCUITS = {
+    'chain': lambda constraints_nb, density, seed: chain_circuit(constraints_nb, seed=seed),
+    'random': lambda constraints_nb, density, seed: random_circuit(constraints_nb, density=density, seed=seed),
+}
+
+def generate_example(kind, constraints_nb, directory, density=3, seed=0):
+    assert kind in CIRCUITS, f"Unknown synthetic circuit '{kind}', expected one of {list(CIRCUITS)}"
+    r1cs, witness, public_inputs_nb = CIRCUITS[kind](constraints_nb, density, seed)
+    return write_example(r1cs, witness, public_inputs_nb, directory)
@@ -0,0 +1,68 @@
+'''
+Code shared by the benchmarks: the --out / --compare / --threshold options, the metadata of a run, the comparison with
+a baseline and the writing of the report. Each benchmark only defines its own measures.
+
+A benchmark flattens its results into named measures with a key function, results -> {name: value}, for instance
+    {'chain 2^6 prove seconds': 0.41, 'chain 2^6 prove peak_bytes': 1103393, ...}
+and a measure regresses when it grew by more than the threshold (0.2 = +20%) over the same measure of the baseline.
+Measures missing from either side are skipped, so a baseline recorded with other options can still be compared.
+'''
+
+import json
+import platform
+import sys
+import time
+
+
+def add_common_arguments(parser, threshold):
+    parser.add_argument('--out', default=None, help="JSON file of the results (default: stdout)")
+    parser.add_argument('--compare', default=None, help="baseline JSON file to compare the results against")
+    parser.add_argument('--threshold', type=float, default=threshold, help="relative growth of a measure reported as a regression")
+
+
+def run_metadata(**details):
+    # where and when the results were measured, plus the options of the benchmark
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **details,
+    }
+
+
+def compare(results, baseline, threshold, key):
+    before_measures = key(baseline['results'])
+    regressions = []
+    for name, after in key(results).items():
+        before = before_measures.get(name)
+        if before is not None and before > 0 and after > before * (1 + threshold):
+            regressions.append({'measure': name, 'baseline': before, 'current': after, 'ratio': after / before})
+    return regressions
+
+
+def print_regression(regression):
+    if 'reason' in regression:
+        print(f"REGRESSION {regression['measure']}: {regression['reason']}", file=sys.stderr)
+    else:
+        print(f"REGRESSION {regression['measure']}: {regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})", file=sys.stderr)
+
+
+def write_or_compare(options, results, meta, key, regressions=None):
+    # writes the report (with the regressions against --compare), returns the exit code: 1 when anything regressed
+    # regressions found by the benchmark itself, without a baseline, are reported along with the others
+    report = {'meta': meta, 'results': results}
+    if options.compare is not None or regressions is not None:
+        report['regressions'] = list(regressions or [])
+    if options.compare is not None:
+        with open(options.compare, 'r') as f:
+            baseline = json.load(f)
+        report['regressions'] += compare(results, baseline, options.threshold, key)
+    for regression in report.get('regressions', []):
+        print_regression(regression)
+
+    if options.out is not None:
+        with open(options.out, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    return 1 if report.get('regressions') else 0
@@ -0,0 +1,95 @@
+'''
+Scalar multiplication benchmark: time per multiplication in G1 and in G2 of every implementation, on random scalars.
+
+    py_ecc:          py_ecc's affine double and add (the affine backend)
+    double_and_add:  Jacobian double and add over the full scalar (group/jacobian.py)
+    glv:             Jacobian GLV + wNAF, used by the Jacobian backend (group/glv.py)
+
+Every implementation multiplies the same points by the same scalars, the results are checked against py_ecc,
+and the speedup of GLV over each other implementation is reported.
+
+Usage (from the repository root):
+    python -m benchmarks.scalar_mul --out scalar_mul.json
+    python -m benchmarks.scalar_mul --compare scalar_mul.json --threshold 0.3
+
+Results are written as JSON (stdout without --out). With --compare, every operation slower than the baseline by more than
+the threshold is reported as a regression and the exit code is 1.
+'''
+
+import argparse
+import random
+import sys
+import time
+
+from py_ecc.bn128 import bn128_curve
+
+from benchmarks import common
+from group import glv, jacobian
+from group.group import JacobianBackend
+
+IMPLEMENTATIONS = ('py_ecc', 'double_and_add', 'glv')
+
+
+def time_per_operation(function, points, scalars, runs):
+    # best of several runs, per multiplication
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = [function(point, scalar) for point, scalar in zip(points, scalars)]
+        seconds = (time.perf_counter() - started) / len(scalars)
+        best = seconds if best is None else min(best, seconds)
+    return best, results
+
+
+def run_benchmark(count, runs, seed):
+    generator = random.Random(seed)
+    backend = JacobianBackend()
+    results = {}
+    for group_name, base in (('G1', bn128_curve.G1), ('G2', bn128_curve.G2)):
+        # a few different points of the subgroup, as affine (py_ecc) and Jacobian points
+        affine_points = [bn128_curve.multiply(base, generator.randint(1, bn128_curve.curve_order - 1)) for _ in range(4)]
+        affine_points = [affine_points[i % len(affine_points)] for i in range(count)]
+        jacobian_points = [backend.from_affine(point) for point in affine_points]
+        scalars = [generator.randint(1, bn128_curve.curve_order - 1) for _ in range(count)]
+
+        seconds = {}
+        seconds['py_ecc'], expected = time_per_operation(bn128_curve.multiply, affine_points, scalars, runs)
+        for name, function in (('double_and_add', jacobian.multiply), ('glv', glv.multiply)):
+            seconds[name], points = time_per_operation(function, jacobian_points, scalars, runs)
+            assert [backend.to_affine(point) for point in points] == expected, f"{name} does not match py_ecc in {group_name}"
+
+        results[f'multiply_{group_name}'] = {
+            'seconds': seconds,
+            'speedup': {name: seconds[name] / seconds['glv'] for name in IMPLEMENTATIONS if name != 'glv'},
+        }
+    return results
+
+
+def measures(results):
+    # only GLV, the implementation in use, is compared with the baseline
+    return {f"{operation} glv seconds": result['seconds']['glv'] for operation, result in results.items()}
+
+
+def parse_arguments(args):
+    parser = argparse.ArgumentParser(description="Measure the time of a scalar multiplication in G1 and G2 for every implementation.")
+    parser.add_argument('--count', type=int, default=50, help="multiplications per group and implementation")
+    parser.add_argument('--runs', type=int, default=3, help="runs per measure, the fastest is kept")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the points and scalars")
+    common.add_common_arguments(parser, threshold=0.3)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_arguments(sys.argv[1:] if args is None else args)
+    results = run_benchmark(options.count, options.runs, options.seed)
+    for operation, result in results.items():
+        timings = ', '.join(f"{name} {result['seconds'][name] * 1e3:.2f}ms" for name in IMPLEMENTATIONS)
+        speedups = ', '.join(f"x{speedup:.2f} over {name}" for name, speedup in result['speedup'].items())
+        print(f"{operation}: {timings} (glv {speedups})", file=sys.stderr)
+
+    meta = common.run_metadata(count=options.count, runs=options.runs)
+    return common.write_or_compare(options, results, meta, measures)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
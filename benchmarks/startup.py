@@ -0,0 +1,98 @@
+'''
+Startup benchmark: how long each CLI command takes to import what it needs, in a fresh interpreter.
+
+Every target is imported in a new Python process (the import cache of the current process would hide the cost),
+several times, and the median is kept. The heavy libraries that got imported are recorded too,
+and a target importing a library it must not need (galois for the verifier) is reported as a regression.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --out startup.json
+    python -m benchmarks.startup --compare startup.json --threshold 0.3
+
+Results are written as JSON (stdout without --out). With --compare, every target slower than the baseline by more than
+the threshold is reported as a regression and the exit code is 1.
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks import common
+
+# what each command imports (see groth16.py), plus the construction of the scalar field
+TARGETS = {
+    'setup': 'import trusted_setup.trusted_setup',
+    'prove': 'import prover.prover',
+    'verify': 'import verifier.verifier',
+    'scalar_field': 'from fields.fields import scalar_field; scalar_field()',
+}
+
+HEAVY_MODULES = ('galois', 'numba', 'numpy', 'py_ecc')
+
+# libraries a target must never import
+FORBIDDEN_MODULES = {
+    'verify': ('galois',),
+}
+
+CHILD_CODE = '''
+import json, sys, time
+started = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'modules': [name for name in {heavy!r} if name in sys.modules]}}))
+'''
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_target(statement, runs):
+    timings = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_CODE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=REPOSITORY_ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        measure = json.loads(output.strip().splitlines()[-1])
+        timings.append(measure['seconds'])
+        modules = measure['modules']
+    return {'seconds': statistics.median(timings), 'min_seconds': min(timings), 'imported': modules}
+
+
+def measures(results):
+    return {f"{target} startup seconds": result['seconds'] for target, result in results.items()}
+
+
+def forbidden_imports(results):
+    # checked even without a baseline
+    return [
+        {'measure': f"{target} imports", 'reason': f"imports {module}", 'module': module}
+        for target, result in results.items() for module in FORBIDDEN_MODULES.get(target, ()) if module in result['imported']
+    ]
+
+
+def parse_arguments(args):
+    parser = argparse.ArgumentParser(description="Measure the import time of every CLI command in a fresh interpreter.")
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS), help=f"targets to measure: {', '.join(TARGETS)}")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters started per target, the median is kept")
+    common.add_common_arguments(parser, threshold=0.3)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_arguments(sys.argv[1:] if args is None else args)
+    results = {}
+    for target in options.targets:
+        assert target in TARGETS, f"Unknown target '{target}', expected one of {list(TARGETS)}"
+        print(f"Measuring the startup of {target}", file=sys.stderr)
+        results[target] = measure_target(TARGETS[target], options.runs)
+
+    meta = common.run_metadata(runs=options.runs)
+    return common.write_or_compare(options, results, meta, measures, regressions=forbidden_imports(results))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+'''
+In this package we define the cache of circuit-derived data.
+
+Everything the setup and the prover derive from the circuit alone (today: the sparse L, R, O matrices, reduced modulo the field)
+only depends on the content of the R1CS file and on the field modulus, so it is cached under
+    key = sha256(R1CS file content | modulus)
+at two levels:
+    * in memory: an LRU of at most max_memory_entries circuits, shared by every load in the process (the setup and the
+      prover of a full run, the requests of the daemon),
+    * on disk, only when GROTH16_CACHE_DIR is set: one JSON file per key in that directory.
+A changed R1CS file has a new key, so stale entries are never read, they just wait to be evicted.
+
+The disk layer is opt-in: an entry is a JSON re-serialization of the parsed sparse R1CS, and on the examples reading it
+is barely faster than parsing the R1CS file again (0.16 ms instead of 0.24 ms on example1), while a miss pays the write.
+It only pays off for circuits large enough for the parsing and the modular reduction to dominate the JSON decoding.
+'''
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from r1cs.sparse import R1CS
+
+CACHE_DIR_ENV_VAR = 'GROTH16_CACHE_DIR'
+CACHE_VERSION = 1
+MAX_MEMORY_ENTRIES = 8
+
+
+def circuit_key(source_path, modulus):
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(b'|' + str(modulus).encode())
+    return digest.hexdigest()
+
+
+class CircuitCache:
+    def __init__(self, directory=None, max_memory_entries=MAX_MEMORY_ENTRIES):
+        # None keeps the cache in memory only
+        self.directory = directory if directory is not None else os.environ.get(CACHE_DIR_ENV_VAR)
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.hits = {'memory': 0, 'disk': 0, 'miss': 0}
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def remember(self, key, r1cs):
+        self.memory[key] = r1cs
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def load_entry(self, key):
+        if self.directory is None:
+            return None
+        path = self.entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except ValueError:
+            # a truncated or corrupted entry is a miss, it is overwritten by the next store
+            return None
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        # the modification time of the entry is its last use, for the listing
+        os.utime(path)
+        return R1CS.from_dict(entry['r1cs'])
+
+    def store_entry(self, key, r1cs, source_path, modulus):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {
+            'version': CACHE_VERSION,
+            'source': os.path.abspath(source_path),
+            'modulus': modulus,
+            'created': time.time(),
+            'r1cs': r1cs.to_dict(),
+        }
+        # written next to the entry then renamed, so a reader never sees half an entry
+        temporary_path = self.entry_path(key) + f'.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary_path, self.entry_path(key))
+
+    def get_r1cs(self, source_path, modulus, load):
+        # load(source_path, modulus) builds the R1CS when it is neither in memory nor on disk
+        key = circuit_key(source_path, modulus)
+        if key in self.memory:
+            self.hits['memory'] += 1
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        r1cs = self.load_entry(key)
+        if r1cs is not None:
+            self.hits['disk'] += 1
+        else:
+            self.hits['miss'] += 1
+            r1cs = load(source_path, modulus)
+            self.store_entry(key, r1cs, source_path, modulus)
+        self.remember(key, r1cs)
+        return r1cs
+
+    def entries(self):
+        # metadata of the entries on disk, most recently used first
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                with open(path, 'r') as f:
+                    entry = json.load(f)
+                r1cs = entry['r1cs']
+                details = {
+                    'source': entry.get('source'),
+                    'constraints': len(r1cs['L']['row_offsets']) - 1,
+                    'variables': r1cs['L']['columns_nb'],
+                    'nonzero': sum(len(r1cs[name]['values']) for name in 'LRO'),
+                }
+            except (ValueError, KeyError):
+                details = {'source': None, 'corrupted': True}
+            entries.append(dict(key=file_name[:-len('.json')], size=os.path.getsize(path), last_used=os.path.getmtime(path), in_memory=file_name[:-len('.json')] in self.memory, **details))
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    def evict(self, key_prefix=None):
+        # removes the entries whose key starts with key_prefix (every entry when it is None), returns their keys
+        evicted = []
+        for entry in self.entries():
+            if key_prefix is None or entry['key'].startswith(key_prefix):
+                os.remove(self.entry_path(entry['key']))
+                evicted.append(entry['key'])
+        for key in list(self.memory):
+            if key_prefix is None or key.startswith(key_prefix):
+                del self.memory[key]
+                if key not in evicted:
+                    evicted.append(key)
+        return evicted
+
+
+circuit_cache = None
+
+def get_circuit_cache():
+    # one cache per process, created on first use so that GROTH16_CACHE_DIR can be set before
+    global circuit_cache
+    if circuit_cache is None:
+        circuit_cache = CircuitCache()
+    return circuit_cache
@@ -0,0 +1,149 @@
+'''
+In this package we define the evaluation domain used to build the QAP.
+
+Instead of interpolating the R1CS columns over the points 1, 2, ..., n, we interpolate them over the n-th roots of unity
+of the BN254 scalar field: {1, w, w^2, ..., w^(n-1)} with n a power of two.
+This gives us two things:
+    * the vanishing polynomial of the domain is simply t(x) = x^n - 1,
+    * moving between coefficients and evaluations is a number theoretic transform (NTT), which costs O(n log n).
+
+To compute h(x) = (u(x)v(x) - w(x)) / t(x) we can't divide on the domain itself (t is zero there),
+so we evaluate u, v, w on the coset g*{1, w, ..., w^(n-1)} where t(x) = g^n - 1 is a non zero constant.
+'''
+
+from py_ecc.bn128.bn128_curve import curve_order
+
+# curve_order - 1 = 2^28 * odd, and 5 generates the whole multiplicative group of the scalar field
+TWO_ADICITY = 28
+MULTIPLICATIVE_GENERATOR = 5
+ROOT_OF_UNITY = pow(MULTIPLICATIVE_GENERATOR, (curve_order - 1) >> TWO_ADICITY, curve_order)
+
+
+def next_power_of_two(n):
+    size = 1
+    while size < n:
+        size <<= 1
+    return size
+
+
+def bit_reverse(values):
+    n = len(values)
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            values[i], values[j] = values[j], values[i]
+    return values
+
+
+def ntt_in_place(values, root, modulus=curve_order):
+    # iterative radix-2 Cooley-Tukey, len(values) must be a power of two and root a primitive len(values)-th root of unity
+    n = len(values)
+    bit_reverse(values)
+    length = 2
+    while length <= n:
+        step_root = pow(root, n // length, modulus)
+        half = length // 2
+        twiddles = [1] * half
+        for k in range(1, half):
+            twiddles[k] = twiddles[k - 1] * step_root % modulus
+        for start in range(0, n, length):
+            for k in range(half):
+                even = values[start + k]
+                odd = values[start + k + half] * twiddles[k] % modulus
+                values[start + k] = (even + odd) % modulus
+                values[start + k + half] = (even - odd) % modulus
+        length <<= 1
+    return values
+
+
+def evaluate_poly(coeffs, x, modulus=curve_order):
+    # Horner's rule, coefficients lowest degree first
+    x = int(x) % modulus
+    result = 0
+    for coeff in reversed(coeffs):
+        result = (result * x + coeff) % modulus
+    return result
+
+
+class EvaluationDomain:
+    def __init__(self, constraints_nb):
+        assert constraints_nb > 0, "The evaluation domain needs at least one point"
+        self.size = next_power_of_two(constraints_nb)
+        assert self.size.bit_length() - 1 <= TWO_ADICITY, f"The scalar field has no root of unity of order {self.size}"
+
+        self.log_size = self.size.bit_length() - 1
+        self.omega = pow(ROOT_OF_UNITY, 1 << (TWO_ADICITY - self.log_size), curve_order)
+        self.omega_inv = pow(self.omega, -1, curve_order)
+        self.size_inv = pow(self.size, -1, curve_order)
+        self.coset_shift = MULTIPLICATIVE_GENERATOR
+        self.coset_shift_inv = pow(self.coset_shift, -1, curve_order)
+
+    def elements(self):
+        elements = [1] * self.size
+        for i in range(1, self.size):
+            elements[i] = elements[i - 1] * self.omega % curve_order
+        return elements
+
+    def pad(self, values):
+        assert len(values) <= self.size, f"Got {len(values)} values for a domain of size {self.size}"
+        return [int(value) % curve_order for value in values] + [0] * (self.size - len(values))
+
+    # coefficients (lowest degree first) -> evaluations at 1, w, ..., w^(n-1)
+    def ntt(self, coeffs):
+        return ntt_in_place(self.pad(coeffs), self.omega)
+
+    # evaluations at 1, w, ..., w^(n-1) -> coefficients (lowest degree first)
+    def intt(self, evaluations):
+        coeffs = ntt_in_place(self.pad(evaluations), self.omega_inv)
+        return [coeff * self.size_inv % curve_order for coeff in coeffs]
+
+    # coefficients -> evaluations at g, gw, ..., gw^(n-1)
+    def coset_ntt(self, coeffs):
+        coeffs = self.pad(coeffs)
+        shift_power = 1
+        for i in range(self.size):
+            coeffs[i] = coeffs[i] * shift_power % curve_order
+            shift_power = shift_power * self.coset_shift % curve_order
+        return ntt_in_place(coeffs, self.omega)
+
+    # evaluations at g, gw, ..., gw^(n-1) -> coefficients
+    def coset_intt(self, evaluations):
+        coeffs = self.intt(evaluations)
+        shift_power = 1
+        for i in range(self.size):
+            coeffs[i] = coeffs[i] * shift_power % curve_order
+            shift_power = shift_power * self.coset_shift_inv % curve_order
+        return coeffs
+
+    # t(x) = x^n - 1
+    def vanishing_poly_at(self, x):
+        return (pow(int(x), self.size, curve_order) - 1) % curve_order
+
+    # [l_0(x), ..., l_(n-1)(x)] where l_j is the Lagrange polynomial equal to 1 at w^j and 0 on the rest of the domain
+    def lagrange_basis_at(self, x):
+        x = int(x) % curve_order
+        t_at_x = self.vanishing_poly_at(x)
+        elements = self.elements()
+        if t_at_x == 0:
+            return [1 if element == x else 0 for element in elements]
+
+        # l_j(x) = (x^n - 1) / n * w^j / (x - w^j)
+        common = t_at_x * self.size_inv % curve_order
+        return [common * element * pow(x - element, -1, curve_order) % curve_order for element in elements]
+
+    def quotient(self,u_coeffs, v_coeffs, w_coeffs):
+        # h(x) = (u(x)v(x) - w(x)) / t(x), h has degree at most n - 2 so n evaluations on the coset are enough to recover it
+        u_coset = self.coset_ntt(u_coeffs)
+        v_coset = self.coset_ntt(v_coeffs)
+        w_coset = self.coset_ntt(w_coeffs)
+
+        t_inv = pow(self.vanishing_poly_at(self.coset_shift), -1, curve_order)
+        h_coset = [(u * v - w) * t_inv % curve_order for u, v, w in zip(u_coset, v_coset, w_coset)]
+
+        h_coeffs = self.coset_intt(h_coset)
+        return h_coeffs[:max(self.size - 1, 1)]
@@ -0,0 +1,63 @@
+'''
+In this package we define the arithmetic of FQ2 = FQ[u] / (u^2 + 1) over plain integers.
+
+Elements are tuples (a, b) for a + b*u with a, b reduced modulo the field modulus.
+This is the field of the G2 coordinates, it is shared by the pairing, the point compression and the group backends,
+which all work on integers instead of py_ecc's field objects.
+
+It also gives the galois field of the scalars (curve_order), for the few places that need galois polynomials.
+Building it is slow (galois searches a primitive element and checks the order is prime), and importing galois
+starts numba, so it is built lazily, once per process, with the known primitive element and without the primality test.
+Nothing imports galois until scalar_field is called: the verifier never does.
+'''
+
+from py_ecc.bn128.bn128_curve import field_modulus, curve_order
+
+# 5 generates the multiplicative group of the scalar field (see domain/domain.py)
+SCALAR_FIELD_PRIMITIVE_ELEMENT = 5
+
+scalar_field_instance = None
+
+def scalar_field():
+    global scalar_field_instance
+    if scalar_field_instance is None:
+        import galois
+        scalar_field_instance = galois.GF(curve_order, primitive_element=SCALAR_FIELD_PRIMITIVE_ELEMENT, verify=False)
+    return scalar_field_instance
+
+
+def fq2_add(x, y):
+    return ((x[0] + y[0]) % field_modulus, (x[1] + y[1]) % field_modulus)
+
+def fq2_sub(x, y):
+    return ((x[0] - y[0]) % field_modulus, (x[1] - y[1]) % field_modulus)
+
+def fq2_mul(x, y):
+    return ((x[0] * y[0] - x[1] * y[1]) % field_modulus, (x[0] * y[1] + x[1] * y[0]) % field_modulus)
+
+def fq2_sqr(x):
+    # (a + bu)^2 = (a + b)(a - b) + 2ab u
+    return ((x[0] + x[1]) * (x[0] - x[1]) % field_modulus, 2 * x[0] * x[1] % field_modulus)
+
+def fq2_scale(x, k):
+    # multiplication by an element of FQ
+    return (x[0] * k % field_modulus, x[1] * k % field_modulus)
+
+def fq2_neg(x):
+    return (-x[0] % field_modulus, -x[1] % field_modulus)
+
+def fq2_conjugate(x):
+    return (x[0], -x[1] % field_modulus)
+
+def fq2_inv(x):
+    norm_inv = pow(x[0] * x[0] + x[1] * x[1], -1, field_modulus)
+    return (x[0] * norm_inv % field_modulus, -x[1] * norm_inv % field_modulus)
+
+def fq2_pow(x, exponent):
+    result = (1, 0)
+    while exponent > 0:
+        if exponent & 1:
+            result = fq2_mul(result, x)
+        x = fq2_mul(x, x)
+        exponent >>= 1
+    return result
@@ -3,7 +3,7 @@ import sys
 
 def print_usage():
     print('''
-    Usage: python verifier.py <command> <example_number:int>
+    Usage: python groth16.py <command> <example_number:int>
     Commands:
           full - Run the full ZK proof cycle: trusted setup (Reads from r1cs.json, writes proving_key.json and verifying_key.json), 
                  proof generation (Reads from proving_key.json and witness.json, writes proof.json) 
@@ -11,44 +11,216 @@ def print_usage():
           setup - Run the trusted setup phase only for the given example (Reads from r1cs.json, writes proving_key.json and verifying_key.json)
           prove - Generate a proof for the given example (Read from proving_key.json and witness.json, writes proof.json)
           verify - Verify the proof for the given example (Read from proof.json and verifying_key.json)
+          convert - Convert the example's proving_key.json, verifying_key.json and proof.json to the binary format (.bin files)
+          sparse - Convert the example's r1cs.json to the sparse R1CS format (r1cs.jsonl), which is then used instead of r1cs.json
+          batch - Prove every witness of --witnesses (a directory of witness files or a JSONL file, one witness per line),
+                  the proofs are written in input order in --out (default: the example's proofs/ directory) with a batch_report.json
+          ptau <max_log_size> - Phase 1 of the setup: write a powers of tau file (--out, default: ./powers_of_tau.bin) that serves
+                  every circuit with at most 2^max_log_size constraints, setup and full then derive the keys from it with --ptau
+          cache list|evict <key prefix>|clear - Inspect or evict the cache of circuit-derived data (parsed R1CS matrices),
+                  stored in GROTH16_CACHE_DIR (the parsed R1CS is only kept in memory when it is not set)
+          serve - Start a prover daemon that keeps the given examples loaded and proves witnesses sent over a Unix socket
+                  (several example numbers can be given: python groth16.py serve 1 2)
+          submit - Send the example's witness.json to the prover daemon and write the proof it returns (proof.json)
+          stats - Print the queue depth and latency statistics of the prover daemon
+    Options:
+          --ptau PATH - Powers of tau file (see ptau) the setup derives the keys from, instead of drawing a new tau
+          --dev - Development mode of setup and full: the toxic waste is kept in the example's dev_setup.json, and the next setup
+                  only recomputes the key points of the R1CS columns that changed (never use these keys outside development)
+          --format json|binary - Format of the keys and proof files read and written by setup, prove and verify (default: json)
+          --workers N - Number of processes used by the setup (default: number of CPUs) or by the prover daemon and the batch prover (default: 1)
+          --seed N - Seed of the setup randomness and of the proof salts, the same seed always gives the same keys and proofs (default: random)
+          --group jacobian|affine - Backend of the curve arithmetic, affine is the slower reference implementation (default: jacobian,
+                  or the GROTH16_GROUP_BACKEND environment variable)
+          --witnesses PATH - Witnesses proved by the batch command
+          --out PATH - Output directory of the batch command
+          --socket PATH - Unix socket of the prover daemon (default: /tmp/groth16_prover.sock)
+          --stream - Prove with the streaming prover: the sparse R1CS (r1cs.jsonl) and the binary proving key (--format binary)
+                  are read in chunks, so that the memory used stays under --memory-budget
+          --memory-budget MB - Memory budget of the streaming prover in MiB (default: 256)
+          --trace-memory - Also measure the exact peak memory allocated by the streaming prover (tracemalloc, several times slower)
+          --full-qap-check - Debug mode of the prover: also check u(x)v(x) = w(x) + h(x)t(x) with full polynomial products
+                  (by default the constraints are checked one by one and the QAP relation at a random point)
+          --profile - Time every phase of the setup, the prover and the verifier and count the curve operations
+                  (scalar multiplications, point additions, MSM terms, Miller loops, field inversions)
+          --profile-format table|json - Format of the profile report (default: table)
+          --profile-out PATH - File the profile report is written to (default: printed at the end)
     Example:
-          python verifier.py full 1
+          python groth16.py full 1
+          python groth16.py full 1 --format binary
+          python groth16.py serve 1 --workers 2
+          python groth16.py prove 1 --profile --profile-format json
+          python groth16.py ptau 10 && python groth16.py full 1 --ptau ./powers_of_tau.bin
 ''')
 
-if len(sys.argv) < 2:
-    print_usage()
-    sys.exit(1)
+# options that are flags, they do not take a value
+BOOLEAN_OPTIONS = {'profile', 'full-qap-check', 'stream', 'trace-memory', 'dev'}
 
-command = sys.argv[1]
-example_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+def parse_options(args):
+    # splits the command line into positional arguments and "--name value" options
+    positional = []
+    options = {}
+    i = 0
+    while i < len(args):
+        if args[i].startswith('--') and args[i][2:] in BOOLEAN_OPTIONS:
+            options[args[i][2:]] = True
+            i += 1
+        elif args[i].startswith('--'):
+            options[args[i][2:]] = args[i + 1] if i + 1 < len(args) else None
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+    return positional, options
 
-example_path = f'./examples/example{example_number}/'
-if command == 'full' :
-    from verifier.verifier import Verifier
+def make_prover(example_path, key_format, options):
+    full_qap_check = options.get('full-qap-check', False)
+    seed = int(options['seed']) if 'seed' in options else None
+    if options.get('stream'):
+        from prover.streaming import StreamingProver, DEFAULT_MEMORY_BUDGET
+        memory_budget = int(float(options['memory-budget']) * 2**20) if 'memory-budget' in options else DEFAULT_MEMORY_BUDGET
+        return StreamingProver(example_path=example_path, key_format=key_format, full_qap_check=full_qap_check, seed=seed, memory_budget=memory_budget, track_memory=options.get('trace-memory', False))
     from prover.prover import Prover
-    from trusted_setup.trusted_setup import TrustedSetup
-    trusted_setup = TrustedSetup(example_path=example_path)
-    prover = Prover(example_path=example_path)
-    verifier = Verifier(example_path=example_path)
-    trusted_setup.generate_srs() 
-    prover.generate_proof()
-    result = verifier.verify()
-
-elif command == 'setup':
-    from trusted_setup.trusted_setup import TrustedSetup
-    trusted_setup = TrustedSetup(example_path=example_path)
-    trusted_setup.generate_srs()
-elif command == 'prove':
-    from prover.prover import Prover
-    prover = Prover(example_path=example_path)
-    prover.generate_proof()
-elif command == 'verify':
-    from verifier.verifier import Verifier
-    verifier = Verifier(example_path=example_path) 
-    result = verifier.verify()
-else:
-    print_usage()
-    sys.exit(1)
+    return Prover(example_path=example_path, key_format=key_format, full_qap_check=full_qap_check, seed=seed)
+
+def run_cache_command(arguments):
+    import time
+    from cache.cache import get_circuit_cache
+    circuit_cache = get_circuit_cache()
+    action = arguments[0] if len(arguments) > 0 else 'list'
+    if action == 'list':
+        entries = circuit_cache.entries()
+        if circuit_cache.directory is None:
+            print("The cache is in memory only, set GROTH16_CACHE_DIR to keep it on disk")
+            return
+        print(f"{len(entries)} cache entries in {circuit_cache.directory}")
+        for entry in entries:
+            if entry.get('corrupted'):
+                print(f"  {entry['key'][:16]}  {entry['size']:>10} bytes  corrupted")
+                continue
+            last_used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_used']))
+            print(f"  {entry['key'][:16]}  {entry['size']:>10} bytes  {entry['constraints']} constraints  {entry['variables']} variables  {entry['nonzero']} non zero  last used {last_used}  {entry['source']}")
+    elif action == 'evict' and len(arguments) > 1:
+        evicted = circuit_cache.evict(arguments[1])
+        print(f"Evicted {len(evicted)} cache entries")
+    elif action == 'clear':
+        evicted = circuit_cache.evict()
+        print(f"Evicted {len(evicted)} cache entries")
+    else:
+        print_usage()
+        sys.exit(1)
+
+# the setup spawns worker processes which import this module, so the command only runs when the script is executed
+def main():
+    from profiling import profiling
+    arguments, options = parse_options(sys.argv[1:])
+    profiling.configure_logging()
+
+    if len(arguments) < 1:
+        print_usage()
+        sys.exit(1)
+
+    command = arguments[0]
+    if command == 'cache':
+        run_cache_command(arguments[1:])
+        return
+    if command == 'ptau':
+        from trusted_setup.powers_of_tau import generate_powers_of_tau, DEFAULT_POWERS_OF_TAU_PATH
+        assert len(arguments) > 1, "The ptau command needs the log2 of the maximum number of constraints"
+        seed = int(options['seed']) if 'seed' in options else None
+        workers = int(options['workers']) if 'workers' in options else None
+        generate_powers_of_tau(int(arguments[1]), path=options.get('out', DEFAULT_POWERS_OF_TAU_PATH), seed=seed, workers=workers)
+        return
+    example_number = int(arguments[1]) if len(arguments) > 1 else 1
+    key_format = options.get('format', 'json')
+    workers = int(options['workers']) if 'workers' in options else None
+    seed = int(options['seed']) if 'seed' in options else None
+    if 'group' in options:
+        from group import group
+        group.set_backend(options['group'])
+    # enabled after the backend is picked, so that the counting wrapper wraps the right backend
+    if options.get('profile'):
+        profiling.enable()
+
+    example_path = f'./examples/example{example_number}/'
+    if command == 'full' :
+        from verifier.verifier import Verifier
+        from trusted_setup.trusted_setup import TrustedSetup
+        trusted_setup = TrustedSetup(example_path=example_path, key_format=key_format, seed=seed, workers=workers, powers_of_tau_path=options.get('ptau'), dev_mode=options.get('dev', False))
+        prover = make_prover(example_path, key_format, options)
+        verifier = Verifier(example_path=example_path, key_format=key_format)
+        trusted_setup.generate_srs() 
+        prover.generate_proof()
+        result = verifier.verify()
+
+    elif command == 'setup':
+        from trusted_setup.trusted_setup import TrustedSetup
+        trusted_setup = TrustedSetup(example_path=example_path, key_format=key_format, seed=seed, workers=workers, powers_of_tau_path=options.get('ptau'), dev_mode=options.get('dev', False))
+        trusted_setup.generate_srs()
+    elif command == 'prove':
+        prover = make_prover(example_path, key_format, options)
+        prover.generate_proof()
+    elif command == 'verify':
+        from verifier.verifier import Verifier
+        verifier = Verifier(example_path=example_path, key_format=key_format) 
+        result = verifier.verify()
+    elif command == 'convert':
+        from keys import keys
+        keys.convert_example_to_binary(example_path=example_path)
+    elif command == 'sparse':
+        from r1cs import r1cs
+        r1cs.convert_example_to_sparse(example_path=example_path)
+    elif command == 'batch':
+        from prover.batch import BatchProver
+        assert 'witnesses' in options, "The batch command needs --witnesses <directory or JSONL file>"
+        batch_prover = BatchProver(example_path=example_path, key_format=key_format, workers=workers or 1)
+        results = batch_prover.prove_all(options['witnesses'], output_path=options.get('out'))
+        if any(result['status'] != 'ok' for result in results):
+            sys.exit(1)
+    elif command == 'serve':
+        from prover.daemon import ProverDaemon, DEFAULT_SOCKET_PATH
+        example_paths = [f'./examples/example{int(number)}/' for number in arguments[1:]] or [example_path]
+        daemon = ProverDaemon(example_paths, socket_path=options.get('socket', DEFAULT_SOCKET_PATH), key_format=key_format, workers=workers or 1)
+        daemon.run()
+    elif command == 'submit':
+        from prover.daemon import send_request, DEFAULT_SOCKET_PATH
+        from witness.witness import load_witness_from_json
+        socket_path = options.get('socket', DEFAULT_SOCKET_PATH)
+        witness = load_witness_from_json(json_path=example_path + 'witness.json')
+        response = send_request({'command': 'prove', 'example': example_path, 'witness': witness}, socket_path=socket_path)
+        if response['status'] != 'ok':
+            print("Prover daemon error:", response['error'])
+            sys.exit(1)
+        from keys import keys
+        from utils.utils import deserialize_point_G1, deserialize_point_G2
+        proof = response['proof']
+        key_format_functions = keys.get_key_format(key_format)
+        key_format_functions['save_proof'](deserialize_point_G1(proof['A']), deserialize_point_G2(proof['B']), deserialize_point_G1(proof['C']), example_path + 'proof' + key_format_functions['extension'])
+        print(f"Proof received in {response['latency']:.3f}s")
+    elif command == 'stats':
+        import json
+        from prover.daemon import send_request, DEFAULT_SOCKET_PATH
+        response = send_request({'command': 'stats'}, socket_path=options.get('socket', DEFAULT_SOCKET_PATH))
+        print(json.dumps(response.get('stats', response), indent=4))
+    else:
+        print_usage()
+        sys.exit(1)
+
+    if options.get('profile'):
+        print_profile(options.get('profile-format', 'table'), options.get('profile-out'))
+
 
+def print_profile(profile_format, output_path):
+    from profiling import profiling
+    assert profile_format in ('table', 'json'), f"Unknown profile format '{profile_format}', expected table or json"
+    report = profiling.report_table() if profile_format == 'table' else profiling.report_json()
+    if output_path is None:
+        print(report)
+    else:
+        with open(output_path, 'w') as f:
+            f.write(report + '\n')
+        print(f"Profile written to {output_path}")
 
 
+if __name__ == '__main__':
+    main()
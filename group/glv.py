@@ -0,0 +1,139 @@
+'''
+In this module we define the scalar multiplication of the Jacobian backend: GLV decomposition and wNAF recoding.
+
+BN254 (G1: y^2 = x^3 + 3, G2: its twist y^2 = x^3 + 3 / (9 + u)) has a = 0, so (x, y) -> (beta x, y), with beta a cube root
+of unity modulo the field modulus, maps the curve to itself. On the prime order subgroup it is the multiplication by a cube
+root of unity lambda modulo the curve order:
+    phi(P) = (beta x, y) = lambda P
+so computing phi(P) costs one field multiplication instead of a full scalar multiplication.
+
+GLV: the scalar k is split as k = k1 + k2 lambda (mod r) with |k1|, |k2| about sqrt(r) (127 bits instead of 254),
+using a short basis of the lattice {(a, b) : a + b lambda = 0 mod r}. Then k P = k1 P + k2 phi(P), and both halves
+share the same doublings: half the doublings of double and add.
+
+wNAF: each half is recoded in width-w non adjacent form, digits are 0 or odd in (-2^(w-1), 2^(w-1)) and any w consecutive
+digits hold at most one non zero digit, so only one addition every w + 1 bits, of a precomputed odd multiple
+P, 3P, ..., (2^(w-1) - 1)P. The table of phi(P) is the table of P mapped by phi, one multiplication per entry.
+
+Both the decomposition and the endomorphism only hold on the subgroup of order r, which is where every point of the keys,
+the proofs and the setup lives. Results are the same points as double and add (jacobian.multiply), which is kept as the reference.
+'''
+
+from py_ecc.bn128.bn128_curve import field_modulus, curve_order
+
+from fields.fields import fq2_scale
+from group.jacobian import add_G1, double_G1, add_G2, double_G2, neg, normalize, is_G1, FQ2_ONE
+from profiling import profiling
+
+p = field_modulus
+
+# the same lambda for both groups, with a different cube root of unity beta in each
+LAMBDA = 4407920970296243842393367215006156084916469457145843978461
+BETA_G1 = 2203960485148121921418603742825762020974279258880205651966
+BETA_G2 = 21888242871839275220042445260109153167277707414472061641714758635765020556616
+
+# G2 additions are several times more expensive than G1 ones, a larger table pays off sooner
+WINDOW_G1 = 4
+WINDOW_G2 = 5
+
+
+def lattice_basis(n, lam):
+    # two short vectors (a, b) with a + b lam = 0 mod n, from the extended Euclidean algorithm on (n, lam)
+    # (Guide to Elliptic Curve Cryptography, algorithm 3.74): s n + t lam = r along the remainder sequence
+    remainders, ts = [n, lam], [0, 1]
+    while remainders[-1] != 0:
+        quotient = remainders[-2] // remainders[-1]
+        remainders.append(remainders[-2] - quotient * remainders[-1])
+        ts.append(ts[-2] - quotient * ts[-1])
+    # l is the last index with a remainder of at least sqrt(n)
+    l = max(i for i, remainder in enumerate(remainders) if remainder * remainder >= n)
+    a1, b1 = remainders[l + 1], -ts[l + 1]
+    if remainders[l] ** 2 + ts[l] ** 2 <= remainders[l + 2] ** 2 + ts[l + 2] ** 2:
+        a2, b2 = remainders[l], -ts[l]
+    else:
+        a2, b2 = remainders[l + 2], -ts[l + 2]
+    return (a1, b1), (a2, b2)
+
+(A1, B1), (A2, B2) = lattice_basis(curve_order, LAMBDA)
+
+
+def rounded_division(x, n):
+    # round(x / n) for n > 0, without floats
+    return (2 * x + n) // (2 * n)
+
+def decompose(k):
+    # k = k1 + k2 LAMBDA (mod r), k1 and k2 of about 128 bits, possibly negative
+    c1 = rounded_division(B2 * k, curve_order)
+    c2 = rounded_division(-B1 * k, curve_order)
+    k1 = k - c1 * A1 - c2 * A2
+    k2 = -c1 * B1 - c2 * B2
+    return k1, k2
+
+
+def wnaf(k, width):
+    # width-w NAF digits of k >= 0, least significant first
+    digits = []
+    modulus, half = 1 << width, 1 << (width - 1)
+    while k > 0:
+        if k & 1:
+            digit = k & (modulus - 1)
+            if digit >= half:
+                digit -= modulus
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+
+def endomorphism(P):
+    # phi(X, Y, Z) = (beta X, Y, Z): x = X / Z^2 is multiplied by beta
+    if P is None:
+        return None
+    X, Y, Z = P
+    return (BETA_G1 * X % p, Y, Z) if is_G1(P) else (fq2_scale(X, BETA_G2), Y, Z)
+
+
+def odd_multiples(P, width, add_point, double_point):
+    # P, 3P, 5P, ..., (2^(w-1) - 1)P
+    table = [P]
+    twice = double_point(P)
+    for _ in range((1 << (width - 2)) - 1):
+        table.append(add_point(table[-1], twice))
+    # with Z = 1 every addition of the main loop is a mixed addition, one inversion per entry is much cheaper
+    one = 1 if is_G1(P) else FQ2_ONE
+    profiling.count('field inversions', len(table))
+    return [(x, y, one) for x, y in (normalize(point) for point in table)]
+
+
+def multiply(P, n):
+    n = int(n) % curve_order
+    if P is None or n == 0:
+        return None
+    if is_G1(P):
+        add_point, double_point, width = add_G1, double_G1, WINDOW_G1
+    else:
+        add_point, double_point, width = add_G2, double_G2, WINDOW_G2
+
+    k1, k2 = decompose(n)
+    table1 = odd_multiples(P, width, add_point, double_point)
+    table2 = [endomorphism(point) for point in table1]
+    # a negative half multiplies -P (or -phi(P)) instead
+    if k1 < 0:
+        k1, table1 = -k1, [neg(point) for point in table1]
+    if k2 < 0:
+        k2, table2 = -k2, [neg(point) for point in table2]
+    # (table, negated table, digits) for each half, the negated tables avoid a negation per addition
+    halves = [(table, [neg(point) for point in table], wnaf(k, width)) for table, k in ((table1, k1), (table2, k2))]
+
+    result = None
+    for i in range(max(len(digits) for _, _, digits in halves) - 1, -1, -1):
+        result = double_point(result)
+        for table, negated_table, digits in halves:
+            digit = digits[i] if i < len(digits) else 0
+            if digit > 0:
+                result = add_point(result, table[digit >> 1])
+            elif digit < 0:
+                result = add_point(result, negated_table[-digit >> 1])
+    return result
@@ -0,0 +1,195 @@
+'''
+In this package we define the group operations used by the setup, the prover, the verifier and the keys.
+
+Nothing outside of this package depends on how points are represented, every module goes through the functions below
+(add, double, neg, multiply, ...) which forward to the selected backend:
+    * jacobian (default): Jacobian coordinates over plain integers (see group/jacobian.py), no inversion per addition,
+      scalar multiplications use the GLV endomorphism and wNAF recoding (see group/glv.py).
+    * affine: py_ecc's bn128 functions, kept as the reference implementation to cross-check the other backend.
+
+Points only come back to affine coordinates at the boundaries: to_affine gives py_ecc affine points (serialization, pairings),
+from_affine builds a point of the current backend from affine coordinates (FQ/FQ2 objects, or ints / pairs of ints).
+The point at infinity is None for every backend.
+
+The backend is picked with the GROTH16_GROUP_BACKEND environment variable, or set_backend (the --group option of groth16.py).
+'''
+
+import os
+from py_ecc.bn128 import FQ, FQ2  # type: ignore
+from py_ecc.bn128 import bn128_curve
+
+from group import jacobian, glv
+
+BACKEND_ENV_VAR = 'GROTH16_GROUP_BACKEND'
+DEFAULT_BACKEND = 'jacobian'
+
+
+def coord_to_ints(coord):
+    # FQ or int -> int, FQ2 or pair of ints -> pair of ints
+    if hasattr(coord, 'coeffs'):
+        return tuple(int(coeff) for coeff in coord.coeffs)
+    if isinstance(coord, (tuple, list)):
+        return tuple(int(coeff) for coeff in coord)
+    return int(coord)
+
+def affine_coords_to_ints(point):
+    return coord_to_ints(point[0]), coord_to_ints(point[1])
+
+
+class AffineBackend:
+    name = 'affine'
+
+    def __init__(self):
+        self.G1 = bn128_curve.G1
+        self.G2 = bn128_curve.G2
+
+    def add(self, P, Q):
+        return bn128_curve.add(P, Q)
+
+    def double(self, P):
+        return None if P is None else bn128_curve.double(P)
+
+    def neg(self, P):
+        return bn128_curve.neg(P)
+
+    def multiply(self, P, n):
+        n = int(n) % bn128_curve.curve_order
+        return None if P is None or n == 0 else bn128_curve.multiply(P, n)
+
+    def eq(self, P, Q):
+        return P == Q
+
+    def is_on_curve(self, P):
+        if P is None:
+            return True
+        return bn128_curve.is_on_curve(P, bn128_curve.b if isinstance(P[0], FQ) else bn128_curve.b2)
+
+    def is_in_subgroup(self, P):
+        # py_ecc's multiply does not reduce the scalar
+        return P is None or isinstance(P[0], FQ) or bn128_curve.multiply(P, bn128_curve.curve_order) is None
+
+    def to_affine(self, P):
+        return P
+
+    def from_affine(self, point):
+        if point is None:
+            return None
+        x, y = affine_coords_to_ints(point)
+        coord_type = FQ if isinstance(x, int) else FQ2
+        return (coord_type(x), coord_type(y))
+
+    # raw coordinates as ints, to send points to other processes (py_ecc points can't be pickled)
+    def to_ints(self, P):
+        return None if P is None else affine_coords_to_ints(P)
+
+    def from_ints(self, P):
+        return self.from_affine(P)
+
+
+class JacobianBackend:
+    name = 'jacobian'
+
+    def __init__(self):
+        self.G1 = self.from_affine(bn128_curve.G1)
+        self.G2 = self.from_affine(bn128_curve.G2)
+
+    def add(self, P, Q):
+        return jacobian.add(P, Q)
+
+    def double(self, P):
+        return jacobian.double(P)
+
+    def neg(self, P):
+        return jacobian.neg(P)
+
+    def multiply(self, P, n):
+        return glv.multiply(P, n)
+
+    def eq(self, P, Q):
+        return jacobian.eq(P, Q)
+
+    def is_on_curve(self, P):
+        return jacobian.is_on_curve(P)
+
+    def is_in_subgroup(self, P):
+        return jacobian.is_in_subgroup(P)
+
+    def to_affine(self, P):
+        if P is None:
+            return None
+        x, y = jacobian.normalize(P)
+        return (FQ(x), FQ(y)) if isinstance(x, int) else (FQ2(x), FQ2(y))
+
+    def from_affine(self, point):
+        if point is None:
+            return None
+        x, y = affine_coords_to_ints(point)
+        return (x, y, 1) if isinstance(x, int) else (x, y, (1, 0))
+
+    # Jacobian points are already plain ints
+    def to_ints(self, P):
+        return P
+
+    def from_ints(self, P):
+        return None if P is None else tuple(P)
+
+
+BACKENDS = {
+    'affine': AffineBackend,
+    'jacobian': JacobianBackend,
+}
+
+backend = None
+
+def set_backend(name):
+    global backend
+    assert name in BACKENDS, f"Unknown group backend '{name}', expected one of {list(BACKENDS)}"
+    if backend is None or backend.name != name:
+        backend = BACKENDS[name]()
+    return backend
+
+def get_backend_name():
+    return backend.name
+
+set_backend(os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND))
+
+
+def generator_G1():
+    return backend.G1
+
+def generator_G2():
+    return backend.G2
+
+def add(P, Q):
+    return backend.add(P, Q)
+
+def double(P):
+    return backend.double(P)
+
+def neg(P):
+    return backend.neg(P)
+
+def multiply(P, n):
+    return backend.multiply(P, n)
+
+def eq(P, Q):
+    return backend.eq(P, Q)
+
+def is_on_curve(P):
+    return backend.is_on_curve(P)
+
+def is_in_subgroup(P):
+    # the subgroup of order r, where the pairing is defined: a point of the curve is not enough for G2
+    return backend.is_in_subgroup(P)
+
+def to_affine(P):
+    return backend.to_affine(P)
+
+def from_affine(point):
+    return backend.from_affine(point)
+
+def to_ints(P):
+    return backend.to_ints(P)
+
+def from_ints(P):
+    return backend.from_ints(P)
@@ -0,0 +1,192 @@
+'''
+In this module we define the arithmetic of G1 and G2 in Jacobian coordinates, over plain integers.
+
+A point (X, Y, Z) stands for the affine point (X / Z^2, Y / Z^3).
+With affine coordinates every addition needs a field inversion, here additions and doublings only multiply,
+the single inversion is paid when the point is normalized back to affine (serialization, pairing).
+
+G1 coordinates are ints modulo the field modulus, G2 coordinates are FQ2 tuples (see fields/fields.py),
+the point at infinity is None, like in py_ecc.
+Formulas (a = 0 curves): dbl-2009-l and add-2007-bl from the Explicit-Formulas Database,
+with the mixed addition shortcut when the second point has Z = 1 (points freshly loaded from a key).
+'''
+
+from py_ecc.bn128.bn128_curve import field_modulus, curve_order, b2
+
+from fields.fields import fq2_add, fq2_sub, fq2_mul, fq2_sqr, fq2_scale, fq2_neg, fq2_inv
+
+p = field_modulus
+B2 = tuple(int(coeff) for coeff in b2.coeffs)
+FQ2_ONE = (1, 0)
+FQ2_ZERO = (0, 0)
+
+
+def double_G1(P):
+    if P is None:
+        return None
+    X, Y, Z = P
+    if Y == 0:
+        return None
+    A = X * X % p
+    B = Y * Y % p
+    C = B * B % p
+    D = 2 * ((X + B) * (X + B) - A - C) % p
+    E = 3 * A % p
+    X3 = (E * E - 2 * D) % p
+    Y3 = (E * (D - X3) - 8 * C) % p
+    Z3 = 2 * Y * Z % p
+    return (X3, Y3, Z3)
+
+def add_G1(P, Q):
+    if P is None:
+        return Q
+    if Q is None:
+        return P
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    Z1Z1 = Z1 * Z1 % p
+    if Z2 == 1:
+        Z2Z2, U1, S1 = 1, X1, Y1
+    else:
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = 2 * (S2 - S1) % p
+    if H == 0:
+        return double_G1(P) if r == 0 else None
+    I = 4 * H * H % p
+    J = H * I % p
+    V = U1 * I % p
+    X3 = (r * r - J - 2 * V) % p
+    Y3 = (r * (V - X3) - 2 * S1 * J) % p
+    Z3 = ((Z1 + Z2) * (Z1 + Z2) - Z1Z1 - Z2Z2) * H % p
+    return (X3, Y3, Z3)
+
+def double_G2(P):
+    if P is None:
+        return None
+    X, Y, Z = P
+    if Y == FQ2_ZERO:
+        return None
+    A = fq2_sqr(X)
+    B = fq2_sqr(Y)
+    C = fq2_sqr(B)
+    D = fq2_scale(fq2_sub(fq2_sub(fq2_sqr(fq2_add(X, B)), A), C), 2)
+    E = fq2_scale(A, 3)
+    X3 = fq2_sub(fq2_sqr(E), fq2_scale(D, 2))
+    Y3 = fq2_sub(fq2_mul(E, fq2_sub(D, X3)), fq2_scale(C, 8))
+    Z3 = fq2_scale(fq2_mul(Y, Z), 2)
+    return (X3, Y3, Z3)
+
+def add_G2(P, Q):
+    if P is None:
+        return Q
+    if Q is None:
+        return P
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    Z1Z1 = fq2_sqr(Z1)
+    if Z2 == FQ2_ONE:
+        Z2Z2, U1, S1 = FQ2_ONE, X1, Y1
+    else:
+        Z2Z2 = fq2_sqr(Z2)
+        U1 = fq2_mul(X1, Z2Z2)
+        S1 = fq2_mul(fq2_mul(Y1, Z2), Z2Z2)
+    U2 = fq2_mul(X2, Z1Z1)
+    S2 = fq2_mul(fq2_mul(Y2, Z1), Z1Z1)
+    H = fq2_sub(U2, U1)
+    r = fq2_scale(fq2_sub(S2, S1), 2)
+    if H == FQ2_ZERO:
+        return double_G2(P) if r == FQ2_ZERO else None
+    I = fq2_scale(fq2_sqr(H), 4)
+    J = fq2_mul(H, I)
+    V = fq2_mul(U1, I)
+    X3 = fq2_sub(fq2_sub(fq2_sqr(r), J), fq2_scale(V, 2))
+    Y3 = fq2_sub(fq2_mul(r, fq2_sub(V, X3)), fq2_scale(fq2_mul(S1, J), 2))
+    Z3 = fq2_mul(fq2_sub(fq2_sub(fq2_sqr(fq2_add(Z1, Z2)), Z1Z1), Z2Z2), H)
+    return (X3, Y3, Z3)
+
+
+def is_G1(P):
+    return isinstance(P[0], int)
+
+def add(P, Q):
+    if P is None:
+        return Q
+    return add_G1(P, Q) if is_G1(P) else add_G2(P, Q)
+
+def double(P):
+    if P is None:
+        return None
+    return double_G1(P) if is_G1(P) else double_G2(P)
+
+def neg(P):
+    if P is None:
+        return None
+    X, Y, Z = P
+    return (X, -Y % p, Z) if is_G1(P) else (X, fq2_neg(Y), Z)
+
+def double_and_add(P, n):
+    # from the most significant bit, n is not reduced modulo the curve order
+    add_point, double_point = (add_G1, double_G1) if is_G1(P) else (add_G2, double_G2)
+    result = None
+    for bit in bin(n)[2:]:
+        result = double_point(result)
+        if bit == '1':
+            result = add_point(result, P)
+    return result
+
+def multiply(P, n):
+    n = int(n) % curve_order
+    if P is None or n == 0:
+        return None
+    return double_and_add(P, n)
+
+def is_in_subgroup(P):
+    # r P == 0, G1 has cofactor 1 so every point of the curve is in it, G2 has not
+    # computed with double and add: GLV (glv.multiply) only holds on the subgroup, it cannot be used to check it
+    if P is None or is_G1(P):
+        return True
+    return double_and_add(P, curve_order) is None
+
+
+def normalize(P):
+    # (X / Z^2, Y / Z^3) as ints (G1) or FQ2 tuples (G2)
+    if P is None:
+        return None
+    X, Y, Z = P
+    if is_G1(P):
+        Z_inv = pow(Z, -1, p)
+        Z_inv_squared = Z_inv * Z_inv % p
+        return (X * Z_inv_squared % p, Y * Z_inv_squared * Z_inv % p)
+    Z_inv = fq2_inv(Z)
+    Z_inv_squared = fq2_sqr(Z_inv)
+    return (fq2_mul(X, Z_inv_squared), fq2_mul(fq2_mul(Y, Z_inv_squared), Z_inv))
+
+def eq(P, Q):
+    # X1 Z2^2 == X2 Z1^2 and Y1 Z2^3 == Y2 Z1^3, no inversion needed
+    if P is None or Q is None:
+        return P is None and Q is None
+    if is_G1(P) != is_G1(Q):
+        return False
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    if is_G1(P):
+        Z1Z1, Z2Z2 = Z1 * Z1 % p, Z2 * Z2 % p
+        return X1 * Z2Z2 % p == X2 * Z1Z1 % p and Y1 * Z2Z2 * Z2 % p == Y2 * Z1Z1 * Z1 % p
+    Z1Z1, Z2Z2 = fq2_sqr(Z1), fq2_sqr(Z2)
+    return fq2_mul(X1, Z2Z2) == fq2_mul(X2, Z1Z1) and fq2_mul(fq2_mul(Y1, Z2Z2), Z2) == fq2_mul(fq2_mul(Y2, Z1Z1), Z1)
+
+def is_on_curve(P):
+    # Y^2 = X^3 + b Z^6
+    if P is None:
+        return True
+    X, Y, Z = P
+    if is_G1(P):
+        Z_cubed = Z * Z * Z % p
+        return (Y * Y - X * X * X - 3 * Z_cubed * Z_cubed) % p == 0
+    Z_cubed = fq2_mul(fq2_sqr(Z), Z)
+    return fq2_sqr(Y) == fq2_add(fq2_mul(fq2_sqr(X), X), fq2_mul(B2, fq2_sqr(Z_cubed)))
@@ -0,0 +1,276 @@
+'''
+In this module we define a compact binary container for proving keys, verifying keys and proofs.
+
+Layout of a file (all integers are big endian):
+    header:         magic b'G16B' | version (u16) | kind (u16) | number of sections (u32)
+    section table:  one entry per section: name (16 bytes, zero padded) | group (u8) | reserved (3 bytes) | points count (u32) | offset (u64) | length (u64)
+    data:           the compressed points of every section, one after the other
+
+Points are compressed to their x coordinate, G1 points take 32 bytes and G2 points 64 bytes (x.c1 then x.c0).
+The field modulus is below 2^254, so the two top bits of the first byte are free and hold flags:
+    bit 7: the point is the point at infinity
+    bit 6: y is the "largest" of the two square roots (y > (p - 1) / 2, for G2 the c1 coefficient decides unless it is zero)
+Every point has a single encoding: a coordinate must be below the field modulus, and the point at infinity is the flag alone.
+Decompressing does not check that a G2 point is in the subgroup of order r (a scalar multiplication per point), the verifier
+checks it for the B point of a proof (group.is_in_subgroup).
+
+The file is memory mapped and sections are decompressed lazily, point by point, when they are accessed.
+So a prover only pays for the sections (and the points) it really uses.
+The file itself is closed as soon as it is mapped, the mapping lives until close() or until nothing references it.
+'''
+
+import json
+import mmap
+import struct
+
+from py_ecc.bn128.bn128_curve import field_modulus, b2
+
+from fields.fields import fq2_mul, fq2_add, fq2_pow, fq2_neg
+from group import group
+from profiling.profiling import get_logger
+
+logger = get_logger('keys')
+
+MAGIC = b'G16B'
+VERSION = 1
+
+KIND_PROVING_KEY = 1
+KIND_VERIFYING_KEY = 2
+KIND_PROOF = 3
+# the sections of a powers of tau file depend on its size, see trusted_setup/powers_of_tau.py
+KIND_POWERS_OF_TAU = 4
+
+HEADER_FORMAT = '>4sHHI'
+SECTION_FORMAT = '>16sB3xIQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+SECTION_SIZE = struct.calcsize(SECTION_FORMAT)
+
+POINT_SIZES = {1: 32, 2: 64}
+INFINITY_FLAG = 0x80
+SIGN_FLAG = 0x40
+FLAGS_MASK = INFINITY_FLAG | SIGN_FLAG
+
+# the sections of each kind of file, in the order they are written, with the group of their points
+PROVING_KEY_SECTIONS = [
+    ('srs1', 1), ('srs2', 2), ('srs3', 1), ('psi', 1),
+    ('alpha', 1), ('beta_G1', 1), ('beta_G2', 2), ('delta_G1', 1), ('delta_G2', 2), ('tau_G1', 1), ('tau_G2', 2),
+    ('u_query_G1', 1), ('v_query_G1', 1), ('v_query_G2', 2),
+]
+VERIFYING_KEY_SECTIONS = [('alpha', 1), ('beta', 2), ('delta', 2), ('gamma', 2), ('psi', 1)]
+PROOF_SECTIONS = [('A', 1), ('B', 2), ('C', 1)]
+
+SECTIONS_BY_KIND = {
+    KIND_PROVING_KEY: PROVING_KEY_SECTIONS,
+    KIND_VERIFYING_KEY: VERIFYING_KEY_SECTIONS,
+    KIND_PROOF: PROOF_SECTIONS,
+}
+
+# G2 twist coefficient b2 = 3 / (9 + u) as integers
+B2 = tuple(int(coeff) for coeff in b2.coeffs)
+
+
+# sqrt in FQ, the modulus is 3 mod 4
+def sqrt_fq(a):
+    root = pow(a, (field_modulus + 1) // 4, field_modulus)
+    return root if root * root % field_modulus == a % field_modulus else None
+
+# sqrt in FQ2 = FQ[u] / (u^2 + 1), the modulus is 3 mod 4
+def sqrt_fq2(a):
+    a1 = fq2_pow(a, (field_modulus - 3) // 4)
+    alpha = fq2_mul(fq2_mul(a1, a1), a)
+    x0 = fq2_mul(a1, a)
+    if alpha == (field_modulus - 1, 0):
+        root = fq2_mul((0, 1), x0)
+    else:
+        root = fq2_mul(fq2_pow(fq2_add((1, 0), alpha), (field_modulus - 1) // 2), x0)
+    return root if fq2_mul(root, root) == a else None
+
+def is_largest_fq(y):
+    return y > (field_modulus - 1) // 2
+
+def is_largest_fq2(y):
+    return is_largest_fq(y[1]) if y[1] != 0 else is_largest_fq(y[0])
+
+
+# the functions below work on the serialized (json) form of the points: [x, y] for G1, [[x.c0, x.c1], [y.c0, y.c1]] for G2, [] for infinity
+def compress_point_G1(point):
+    if point is None or len(point) == 0:
+        return bytes([INFINITY_FLAG]) + bytes(31)
+    x, y = int(point[0]), int(point[1])
+    data = bytearray(x.to_bytes(32, 'big'))
+    if is_largest_fq(y):
+        data[0] |= SIGN_FLAG
+    return bytes(data)
+
+def compress_point_G2(point):
+    if point is None or len(point) == 0:
+        return bytes([INFINITY_FLAG]) + bytes(63)
+    x = (int(point[0][0]), int(point[0][1]))
+    y = (int(point[1][0]), int(point[1][1]))
+    data = bytearray(x[1].to_bytes(32, 'big') + x[0].to_bytes(32, 'big'))
+    if is_largest_fq2(y):
+        data[0] |= SIGN_FLAG
+    return bytes(data)
+
+def decode_infinity(data, flags):
+    if flags != INFINITY_FLAG or data[0] & ~FLAGS_MASK & 0xff or any(data[1:]):
+        raise ValueError("Invalid compressed point at infinity: only the infinity flag may be set")
+    return None
+
+def check_coordinate(value):
+    # x, or a coefficient of x for G2, has to be reduced modulo the field modulus
+    if value >= field_modulus:
+        raise ValueError(f"Invalid compressed point: coordinate {value} is not below the field modulus")
+    return value
+
+def decompress_point_G1(data):
+    flags = data[0] & FLAGS_MASK
+    if flags & INFINITY_FLAG:
+        return decode_infinity(data, flags)
+    x = check_coordinate(int.from_bytes(bytes([data[0] & ~FLAGS_MASK & 0xff]) + bytes(data[1:32]), 'big'))
+    y = sqrt_fq((x * x * x + 3) % field_modulus)
+    if y is None:
+        raise ValueError(f"Invalid compressed G1 point: x = {x} is not on the curve")
+    if is_largest_fq(y) != bool(flags & SIGN_FLAG):
+        y = field_modulus - y
+    return group.from_affine((x, y))
+
+def decompress_point_G2(data):
+    flags = data[0] & FLAGS_MASK
+    if flags & INFINITY_FLAG:
+        return decode_infinity(data, flags)
+    x1 = check_coordinate(int.from_bytes(bytes([data[0] & ~FLAGS_MASK & 0xff]) + bytes(data[1:32]), 'big'))
+    x0 = check_coordinate(int.from_bytes(bytes(data[32:64]), 'big'))
+    x = (x0, x1)
+    y = sqrt_fq2(fq2_add(fq2_mul(fq2_mul(x, x), x), B2))
+    if y is None:
+        raise ValueError(f"Invalid compressed G2 point: x = {x} is not on the curve")
+    if is_largest_fq2(y) != bool(flags & SIGN_FLAG):
+        y = fq2_neg(y)
+    return group.from_affine((x, y))
+
+COMPRESSORS = {1: compress_point_G1, 2: compress_point_G2}
+DECOMPRESSORS = {1: decompress_point_G1, 2: decompress_point_G2}
+
+
+class LazyPoints:
+    # read only sequence of the points of a section, a point is decompressed only when it is accessed
+    def __init__(self, buffer, offset, count, group):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.group = group
+        self.point_size = POINT_SIZES[group]
+
+    def __len__(self):
+        return self.count
+
+    def raw(self, index):
+        start = self.offset + index * self.point_size
+        return self.buffer[start:start + self.point_size]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Point index out of range")
+        return DECOMPRESSORS[self.group](self.raw(index))
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+
+class BinaryContainer:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, kind, sections_nb = struct.unpack_from(HEADER_FORMAT, self.buffer, 0)
+        assert magic == MAGIC, f"{path} is not a groth16 binary file"
+        assert version == VERSION, f"Unsupported binary format version {version} (expected {VERSION})"
+        self.version = version
+        self.kind = kind
+
+        self.sections = {}
+        for i in range(sections_nb):
+            name, group, count, offset, length = struct.unpack_from(SECTION_FORMAT, self.buffer, HEADER_SIZE + i * SECTION_SIZE)
+            name = name.rstrip(b'\0').decode('ascii')
+            assert length == count * POINT_SIZES[group], f"Section '{name}' has an invalid length"
+            self.sections[name] = (group, count, offset)
+
+    def section(self, name):
+        assert name in self.sections, f"{self.path} has no section '{name}'"
+        group, count, offset = self.sections[name]
+        return LazyPoints(self.buffer, offset, count, group)
+
+    def point(self, name):
+        return self.section(name)[0]
+
+    # the loaders of fully decoded files close the mapping right away (with BinaryContainer(path) as container: ...),
+    # a lazy proving key keeps it open as long as its sections are used, close() releases it once they are not
+    def close(self):
+        if not self.buffer.closed:
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_container(kind, serialized_sections, path, layout=None):
+    # serialized_sections maps each section name to its points in serialized (json) form, single points are sections of one point
+    # layout is the list of (name, group) of the sections, by default the fixed layout of the kind
+    layout = layout if layout is not None else SECTIONS_BY_KIND[kind]
+    for name, _ in layout:
+        assert name in serialized_sections, f"Missing section '{name}'"
+
+    data_offset = HEADER_SIZE + SECTION_SIZE * len(layout)
+    table = b''
+    data = []
+    offset = data_offset
+    for name, group_id in layout:
+        assert len(name) <= 16, f"Section name '{name}' is longer than 16 bytes"
+        points = serialized_sections[name]
+        chunk = b''.join(COMPRESSORS[group_id](point) for point in points)
+        table += struct.pack(SECTION_FORMAT, name.encode('ascii'), group_id, len(points), offset, len(chunk))
+        data.append(chunk)
+        offset += len(chunk)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, kind, len(layout)))
+        f.write(table)
+        for chunk in data:
+            f.write(chunk)
+
+
+# the json files store single points as one point and lists of points as lists, the container stores everything as lists
+def is_list_section(name):
+    return name in ('srs1', 'srs2', 'srs3', 'psi', 'u_query_G1', 'v_query_G1', 'v_query_G2')
+
+def detect_kind(json_data):
+    if 'srs1' in json_data:
+        return KIND_PROVING_KEY
+    if 'gamma' in json_data:
+        return KIND_VERIFYING_KEY
+    if 'A' in json_data:
+        return KIND_PROOF
+    raise ValueError("Unknown json file: it is not a proving key, a verifying key or a proof")
+
+def convert_json_to_binary(json_path, binary_path):
+    with open(json_path, 'r') as f:
+        logger.info("Opening file to convert to binary: %s", json_path)
+        json_data = json.load(f)
+    kind = detect_kind(json_data)
+    serialized_sections = {}
+    for name, _ in SECTIONS_BY_KIND[kind]:
+        assert name in json_data, f"{json_path} has no '{name}' entry"
+        serialized_sections[name] = json_data[name] if is_list_section(name) else [json_data[name]]
+    write_container(kind, serialized_sections, binary_path)
+    logger.info("Binary file written: %s", binary_path)
+    return binary_path
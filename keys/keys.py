@@ -1,8 +1,12 @@
 import json
 
 from utils import utils
+from keys import binary
+from profiling.profiling import get_logger
 
-def save_prooving_key_to_json(srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, json_path = './examples/example1/proving_key.json'):
+logger = get_logger('keys')
+
+def save_prooving_key_to_json(srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2, json_path = './examples/example1/proving_key.json'):
     proving_key_data = {
         'srs1': utils.serialize_points_G1(srs1),
         'srs2': utils.serialize_points_G2(srs2),
@@ -15,20 +19,23 @@ def save_prooving_key_to_json(srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, de
         'delta_G2': utils.serialize_point_G2(delta_G2),
         'tau_G1': utils.serialize_point_G1(tau_G1),
         'tau_G2': utils.serialize_point_G2(tau_G2),
+        'u_query_G1': utils.serialize_points_G1(u_query_G1),
+        'v_query_G1': utils.serialize_points_G1(v_query_G1),
+        'v_query_G2': utils.serialize_points_G2(v_query_G2),
     }
 
     with open(json_path, 'w') as f:
-        print("Openinf file to save proving key:", json_path)
+        logger.info("Opening file to save proving key: %s", json_path)
         json.dump(proving_key_data, f, indent=4)
 
 def load_proving_key_from_json(json_path = './examples/example1/proving_key.json'):
 
     with open(json_path, 'r') as f:
-        print("Opening file to load proving key:", json_path)
+        logger.info("Opening file to load proving key: %s", json_path)
         data = json.load(f)
     proving_key_data = data
 
-    assert 'srs1' in proving_key_data and 'srs2' in proving_key_data and 'srs3' in proving_key_data and 'psi' in proving_key_data and 'alpha' in proving_key_data and 'beta_G1' in proving_key_data and 'beta_G2' in proving_key_data and 'delta_G1' in proving_key_data and 'delta_G2' in proving_key_data and 'tau_G1' in proving_key_data and 'tau_G2' in proving_key_data, "Proving key must contain 'srs1', 'srs2', 'srs3', 'psi', 'alpha', 'beta_G1', 'beta_G2', 'delta_G1', 'delta_G2', 'tau_G1' and 'tau_G2'"
+    assert 'srs1' in proving_key_data and 'srs2' in proving_key_data and 'srs3' in proving_key_data and 'psi' in proving_key_data and 'alpha' in proving_key_data and 'beta_G1' in proving_key_data and 'beta_G2' in proving_key_data and 'delta_G1' in proving_key_data and 'delta_G2' in proving_key_data and 'tau_G1' in proving_key_data and 'tau_G2' in proving_key_data and 'u_query_G1' in proving_key_data and 'v_query_G1' in proving_key_data and 'v_query_G2' in proving_key_data, "Proving key must contain 'srs1', 'srs2', 'srs3', 'psi', 'alpha', 'beta_G1', 'beta_G2', 'delta_G1', 'delta_G2', 'tau_G1', 'tau_G2', 'u_query_G1', 'v_query_G1' and 'v_query_G2'"
     srs1 = utils.deserialize_points_G1(proving_key_data['srs1'])
     srs2 = utils.deserialize_points_G2(proving_key_data['srs2'])
     srs3 = utils.deserialize_points_G1(proving_key_data['srs3'])
@@ -40,7 +47,10 @@ def load_proving_key_from_json(json_path = './examples/example1/proving_key.json
     delta_G2 = utils.deserialize_point_G2(proving_key_data['delta_G2'])
     tau_G1 = utils.deserialize_point_G1(proving_key_data['tau_G1'])
     tau_G2 = utils.deserialize_point_G2(proving_key_data['tau_G2'])
-    return srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2
+    u_query_G1 = utils.deserialize_points_G1(proving_key_data['u_query_G1'])
+    v_query_G1 = utils.deserialize_points_G1(proving_key_data['v_query_G1'])
+    v_query_G2 = utils.deserialize_points_G2(proving_key_data['v_query_G2'])
+    return srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2
 
 
 def save_proof_to_json(A, B, C, json_path = './examples/example1/proof.json'):
@@ -51,13 +61,13 @@ def save_proof_to_json(A, B, C, json_path = './examples/example1/proof.json'):
     }
 
     with open(json_path, 'w') as f:
-        print("Opening file to save proof:", json_path)
+        logger.info("Opening file to save proof: %s", json_path)
         json.dump(proof_data, f, indent=4)
 
 def load_proof_from_json(json_path = './examples/example1/proof.json'):
 
     with open(json_path, 'r') as f:
-        print("Opening file to load proof:", json_path)
+        logger.info("Opening file to load proof: %s", json_path)
         data = json.load(f)
     proof_data = data
 
@@ -78,13 +88,13 @@ def save_verifying_key_to_json(alpha, beta, delta_G2, gamma_G2, verifying_psi, j
     }
 
     with open(json_path, 'w') as f:
-        print("Opening file to save verifying key:", json_path)
+        logger.info("Opening file to save verifying key: %s", json_path)
         json.dump(verifying_key_data, f, indent=4)
 
 def load_verifying_key_from_json(json_path = './examples/example1/verifying_key.json'):
 
     with open(json_path, 'r') as f:
-        print("Opening file to load verifying key:", json_path)
+        logger.info("Opening file to load verifying key: %s", json_path)
         data = json.load(f)
     verifying_key_data = data
 
@@ -94,4 +104,144 @@ def load_verifying_key_from_json(json_path = './examples/example1/verifying_key.
     delta_G2 = utils.deserialize_point_G2(verifying_key_data['delta'])
     gamma_G2 = utils.deserialize_point_G2(verifying_key_data['gamma'])
     verifying_psi = utils.deserialize_points_G1(verifying_key_data['psi'])
-    return alpha, beta, delta_G2, gamma_G2, verifying_psi
\ No newline at end of file
+    return alpha, beta, delta_G2, gamma_G2, verifying_psi
+
+# binary counterparts of the json functions above, see keys/binary.py for the format
+def save_prooving_key_to_binary(srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2, binary_path = './examples/example1/proving_key.bin'):
+    serialized_sections = {
+        'srs1': utils.serialize_points_G1(srs1),
+        'srs2': utils.serialize_points_G2(srs2),
+        'srs3': utils.serialize_points_G1(srs3),
+        'psi': utils.serialize_points_G1(psi),
+        'alpha': [utils.serialize_point_G1(alpha)],
+        'beta_G1': [utils.serialize_point_G1(beta_G1)],
+        'beta_G2': [utils.serialize_point_G2(beta_G2)],
+        'delta_G1': [utils.serialize_point_G1(delta_G1)],
+        'delta_G2': [utils.serialize_point_G2(delta_G2)],
+        'tau_G1': [utils.serialize_point_G1(tau_G1)],
+        'tau_G2': [utils.serialize_point_G2(tau_G2)],
+        'u_query_G1': utils.serialize_points_G1(u_query_G1),
+        'v_query_G1': utils.serialize_points_G1(v_query_G1),
+        'v_query_G2': utils.serialize_points_G2(v_query_G2),
+    }
+    logger.info("Opening file to save proving key: %s", binary_path)
+    binary.write_container(binary.KIND_PROVING_KEY, serialized_sections, binary_path)
+
+def load_proving_key_from_binary(binary_path = './examples/example1/proving_key.bin'):
+    # the lists of points are lazy: nothing is decompressed until the prover reads it
+    logger.info("Opening file to load proving key: %s", binary_path)
+    container = binary.BinaryContainer(binary_path)
+    assert container.kind == binary.KIND_PROVING_KEY, f"{binary_path} is not a proving key"
+    srs1 = container.section('srs1')
+    srs2 = container.section('srs2')
+    srs3 = container.section('srs3')
+    psi = container.section('psi')
+    alpha = container.point('alpha')
+    beta_G1 = container.point('beta_G1')
+    beta_G2 = container.point('beta_G2')
+    delta_G1 = container.point('delta_G1')
+    delta_G2 = container.point('delta_G2')
+    tau_G1 = container.point('tau_G1')
+    tau_G2 = container.point('tau_G2')
+    u_query_G1 = container.section('u_query_G1')
+    v_query_G1 = container.section('v_query_G1')
+    v_query_G2 = container.section('v_query_G2')
+    return srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2
+
+
+def save_proof_to_binary(A, B, C, binary_path = './examples/example1/proof.bin'):
+    serialized_sections = {
+        'A': [utils.serialize_point_G1(A)],
+        'B': [utils.serialize_point_G2(B)],
+        'C': [utils.serialize_point_G1(C)],
+    }
+    logger.info("Opening file to save proof: %s", binary_path)
+    binary.write_container(binary.KIND_PROOF, serialized_sections, binary_path)
+
+def load_proof_from_binary(binary_path = './examples/example1/proof.bin'):
+    logger.info("Opening file to load proof: %s", binary_path)
+    with binary.BinaryContainer(binary_path) as container:
+        assert container.kind == binary.KIND_PROOF, f"{binary_path} is not a proof"
+        return container.point('A'), container.point('B'), container.point('C')
+
+
+def save_verifying_key_to_binary(alpha, beta, delta_G2, gamma_G2, verifying_psi, binary_path = './examples/example1/verifying_key.bin'):
+    serialized_sections = {
+        'alpha': [utils.serialize_point_G1(alpha)],
+        'beta': [utils.serialize_point_G2(beta)],
+        'delta': [utils.serialize_point_G2(delta_G2)],
+        'gamma': [utils.serialize_point_G2(gamma_G2)],
+        'psi': utils.serialize_points_G1(verifying_psi),
+    }
+    logger.info("Opening file to save verifying key: %s", binary_path)
+    binary.write_container(binary.KIND_VERIFYING_KEY, serialized_sections, binary_path)
+
+def load_verifying_key_from_binary(binary_path = './examples/example1/verifying_key.bin'):
+    logger.info("Opening file to load verifying key: %s", binary_path)
+    with binary.BinaryContainer(binary_path) as container:
+        assert container.kind == binary.KIND_VERIFYING_KEY, f"{binary_path} is not a verifying key"
+        # the verifier uses every psi point, so they are decompressed right away
+        return container.point('alpha'), container.point('beta'), container.point('delta'), container.point('gamma'), list(container.section('psi'))
+
+
+# the loaders above share the same arguments and return values, so callers only pick one of them from the key format
+KEY_FORMATS = {
+    'json': {
+        'extension': '.json',
+        'save_proving_key': save_prooving_key_to_json,
+        'load_proving_key': load_proving_key_from_json,
+        'save_verifying_key': save_verifying_key_to_json,
+        'load_verifying_key': load_verifying_key_from_json,
+        'save_proof': save_proof_to_json,
+        'load_proof': load_proof_from_json,
+    },
+    'binary': {
+        'extension': '.bin',
+        'save_proving_key': save_prooving_key_to_binary,
+        'load_proving_key': load_proving_key_from_binary,
+        'save_verifying_key': save_verifying_key_to_binary,
+        'load_verifying_key': load_verifying_key_from_binary,
+        'save_proof': save_proof_to_binary,
+        'load_proof': load_proof_from_binary,
+    },
+}
+
+def get_key_format(key_format):
+    assert key_format in KEY_FORMATS, f"Unknown key format '{key_format}', expected one of {list(KEY_FORMATS)}"
+    return KEY_FORMATS[key_format]
+
+
+def convert_example_to_binary(example_path = './examples/example1/'):
+    import os
+    converted = []
+    for name in ('proving_key', 'verifying_key', 'proof'):
+        json_path = example_path + name + '.json'
+        if os.path.exists(json_path):
+            converted.append(binary.convert_json_to_binary(json_path, example_path + name + '.bin'))
+    return converted
+
+
+def key_file_digest(path):
+    # sha256 of the file content, identifies a key independently of its path
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# a key that passed the SRS check gets a stamp file next to it holding its digest,
+# if the key file changes its digest changes too and the stamp no longer matches
+SRS_CHECK_STAMP_SUFFIX = '.srs_checked'
+
+def has_srs_check_stamp(key_path, digest):
+    import os
+    stamp_path = key_path + SRS_CHECK_STAMP_SUFFIX
+    if not os.path.exists(stamp_path):
+        return False
+    with open(stamp_path, 'r') as f:
+        return f.read().strip() == digest
+
+def write_srs_check_stamp(key_path, digest):
+    with open(key_path + SRS_CHECK_STAMP_SUFFIX, 'w') as f:
+        f.write(digest + '\n')
@@ -0,0 +1,133 @@
+'''
+In this module we define a proving key held once in shared memory, for the prover worker processes of a host.
+
+Each worker used to load its own copy of the proving key, as Python objects (FQ / FQ2, or Jacobian tuples of ints),
+so the memory grew with the number of workers. Here the parent process loads the key once and packs it in a single
+multiprocessing.shared_memory block. The workers attach to the block by name, without copying it.
+A point is only decoded when the prover reads it, for instance the points of the non zero witness values of an MSM.
+
+Layout of the block: the sections of the proving key one after the other, in the order of binary.PROVING_KEY_SECTIONS.
+Every point is stored uncompressed, in affine coordinates. Every coordinate is stored as 4 little endian 64 bit limbs (32 bytes):
+    G1: x | y                           64 bytes
+    G2: x.c0 | x.c1 | y.c0 | y.c1       128 bytes
+The field modulus is below 2^254, so the top bit of the first coordinate is free: it marks the point at infinity.
+Decoding a point is then a few int.from_bytes calls, with no square root as in the compressed binary files.
+
+The block belongs to the process that created it, which unlinks it once its workers are done.
+Workers are spawned by that process, so they share its resource tracker and attaching does not make them owners.
+'''
+
+from multiprocessing import shared_memory
+
+from group import group
+from keys import binary
+from profiling.profiling import get_logger
+
+logger = get_logger('keys')
+
+LIMBS = 4
+LIMB_SIZE = 8
+COORDINATE_SIZE = LIMBS * LIMB_SIZE
+COORDINATES = {1: 2, 2: 4}
+POINT_SIZES = {group_id: coordinates * COORDINATE_SIZE for group_id, coordinates in COORDINATES.items()}
+# top bit of the most significant limb of the first coordinate
+INFINITY_FLAG = 1 << (8 * COORDINATE_SIZE - 1)
+
+
+def pack_point(point, group_id):
+    if point is None:
+        return INFINITY_FLAG.to_bytes(COORDINATE_SIZE, 'little') + bytes(POINT_SIZES[group_id] - COORDINATE_SIZE)
+    x, y = group.affine_coords_to_ints(group.to_affine(point))
+    coordinates = (x, y) if group_id == 1 else (*x, *y)
+    return b''.join(coordinate.to_bytes(COORDINATE_SIZE, 'little') for coordinate in coordinates)
+
+def unpack_point(buffer, start, group_id):
+    coordinates = [int.from_bytes(buffer[start + i * COORDINATE_SIZE:start + (i + 1) * COORDINATE_SIZE], 'little') for i in range(COORDINATES[group_id])]
+    if coordinates[0] & INFINITY_FLAG:
+        return None
+    if group_id == 1:
+        return group.from_affine((coordinates[0], coordinates[1]))
+    return group.from_affine(((coordinates[0], coordinates[1]), (coordinates[2], coordinates[3])))
+
+
+class SharedPoints:
+    # read only sequence of the points of a section, a point is decoded only when it is accessed (like binary.LazyPoints)
+    def __init__(self, memory, offset, count, group):
+        # the block stays attached as long as one of its sections is referenced
+        self.memory = memory
+        self.buffer = memory.buf
+        self.offset = offset
+        self.count = count
+        self.group = group
+        self.point_size = POINT_SIZES[group]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Point index out of range")
+        return unpack_point(self.buffer, self.offset + index * self.point_size, self.group)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+
+class SharedProvingKey:
+    def __init__(self, memory, sections, owner):
+        self.memory = memory
+        # name -> (group, count, offset) of every section of the block
+        self.sections = sections
+        self.owner = owner
+
+    @classmethod
+    def create(cls, proving_key):
+        # proving_key is the tuple of any key format loader (keys.get_key_format(...)['load_proving_key'])
+        sections = {}
+        offset = 0
+        for (name, group_id), points in zip(binary.PROVING_KEY_SECTIONS, proving_key):
+            points = points if binary.is_list_section(name) else [points]
+            sections[name] = (group_id, len(points), offset)
+            offset += len(points) * POINT_SIZES[group_id]
+
+        memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, group_id), points in zip(binary.PROVING_KEY_SECTIONS, proving_key):
+            points = points if binary.is_list_section(name) else [points]
+            _, _, start = sections[name]
+            # one section at a time, so a lazy (binary) key is never fully decompressed at once
+            data = b''.join(pack_point(point, group_id) for point in points)
+            memory.buf[start:start + len(data)] = data
+        logger.info("Proving key shared in memory block %s (%d bytes)", memory.name, offset)
+        return cls(memory, sections, owner=True)
+
+    @classmethod
+    def load(cls, proving_key_path, key_format='json'):
+        from keys import keys
+        return cls.create(keys.get_key_format(key_format)['load_proving_key'](proving_key_path))
+
+    @classmethod
+    def attach(cls, descriptor):
+        memory = shared_memory.SharedMemory(name=descriptor['name'])
+        return cls(memory, descriptor['sections'], owner=False)
+
+    def descriptor(self):
+        # what a worker needs to attach to the block, small and picklable
+        return {'name': self.memory.name, 'sections': self.sections}
+
+    def section(self, name):
+        group_id, count, offset = self.sections[name]
+        return SharedPoints(self.memory, offset, count, group_id)
+
+    def proving_key(self):
+        # same tuple as the key format loaders, the lists of points are SharedPoints views of the block
+        return tuple(self.section(name) if binary.is_list_section(name) else self.section(name)[0] for name, _ in binary.PROVING_KEY_SECTIONS)
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
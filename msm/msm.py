@@ -0,0 +1,77 @@
+'''
+In this package we define the multi-scalar multiplication (MSM) used everywhere we need a linear combination of curve points:
+    sum_i scalar_i * point_i
+
+Instead of doing one full scalar multiplication per term, we use the bucket method (Pippenger):
+the scalars are cut into windows of c bits, and for every window each point is added once into the bucket of its window digit.
+The buckets are then combined with a running sum, so a window costs about n + 2^(c+1) additions instead of n scalar multiplications.
+
+The functions only rely on add and double of the group backend, so they work the same for points in G1 and in G2.
+'''
+
+import math
+from py_ecc.bn128.bn128_curve import curve_order
+from group.group import add, double, multiply
+from profiling import profiling
+
+
+def window_size(terms_nb):
+    # c ~ ln(n) + 2 is the usual sweet spot between the number of windows and the number of buckets per window
+    if terms_nb < 4:
+        return 2
+    return int(math.log(terms_nb)) + 2
+
+
+def naive_msm(points, scalars):
+    assert len(points) == len(scalars), "MSM needs as many scalars as points"
+    result = None
+    for point, scalar in zip(points, scalars):
+        term = multiply(point, int(scalar) % curve_order)
+        result = term if result is None else add(result, term)
+    return result
+
+
+def msm(points, scalars, window=None):
+    assert len(points) == len(scalars), "MSM needs as many scalars as points"
+
+    # zero scalars and points at infinity do not contribute anything to the sum
+    terms = []
+    for point, scalar in zip(points, scalars):
+        scalar = int(scalar) % curve_order
+        if point is not None and scalar != 0:
+            terms.append((point, scalar))
+
+    profiling.count('msm calls')
+    profiling.count('msm terms', len(terms))
+    if len(terms) == 0:
+        return None
+    if len(terms) == 1:
+        return multiply(terms[0][0], terms[0][1])
+
+    c = window if window is not None else window_size(len(terms))
+    mask = (1 << c) - 1
+    max_bits = max(scalar for _, scalar in terms).bit_length()
+
+    result = None
+    # we go from the most significant window to the least significant one,
+    # shifting the accumulated result by c bits before adding each new window
+    for window_start in reversed(range(0, max_bits, c)):
+        for _ in range(c):
+            result = double(result)
+
+        buckets = [None] * mask
+        for point, scalar in terms:
+            digit = (scalar >> window_start) & mask
+            if digit != 0:
+                buckets[digit - 1] = add(buckets[digit - 1], point)
+
+        # sum_d d * bucket_d computed as a sum of running sums, from the highest digit down
+        running_sum = None
+        window_sum = None
+        for bucket in reversed(buckets):
+            running_sum = add(running_sum, bucket)
+            window_sum = add(window_sum, running_sum)
+
+        result = add(result, window_sum)
+
+    return result
@@ -0,0 +1,182 @@
+'''
+In this package we define the pairing machinery used by the verifier.
+
+py_ecc's pairing(Q, P) runs a full Miller loop followed by a final exponentiation for every pair of points.
+When we only want to know if a product of pairings is equal to 1:
+    e(P_1, Q_1) * e(P_2, Q_2) * ... * e(P_k, Q_k) == 1
+we can run the Miller loops of all pairs together (they share the squarings of the accumulator f),
+and do a single final exponentiation at the end.
+
+The Miller loop only needs the G2 point to compute the lines it goes through, the G1 point is just where these lines are evaluated.
+So the lines of a G2 point can be computed once (prepare_G2) and evaluated against as many G1 points as we want.
+
+Everything here is computed over plain integers:
+    * FQ2 = FQ[u] / (u^2 + 1), elements are tuples (a, b) for a + b*u (see fields/fields.py)
+    * FQ12 = FQ[w] / (w^12 - 18w^6 + 82), elements are lists of 12 coefficients, lowest degree first
+which is the same representation py_ecc uses, so the results can be compared with py_ecc's pairing.
+'''
+
+from py_ecc.bn128.bn128_curve import curve_order, field_modulus
+from py_ecc.bn128.bn128_pairing import ate_loop_count, log_ate_loop_count
+from py_ecc.bn128 import FQ12
+
+from fields.fields import fq2_add, fq2_sub, fq2_mul, fq2_neg, fq2_conjugate, fq2_inv, fq2_pow
+from group import group
+from profiling import profiling
+
+FINAL_EXPONENT = (field_modulus ** 12 - 1) // curve_order
+
+# the bits of the ate loop count, most significant first, the leading one is implicit (the loop starts with R = Q)
+ATE_LOOP_BITS = [(ate_loop_count >> i) & 1 for i in range(log_ate_loop_count, -1, -1)]
+
+
+FQ12_ONE = [1] + [0] * 11
+
+def fq12_mul(x, y):
+    # x is iterated in the outer loop, so passing the sparse operand (a line) first skips most of the work
+    product = [0] * 23
+    for i, x_i in enumerate(x):
+        if x_i == 0:
+            continue
+        for j, y_j in enumerate(y):
+            product[i + j] += x_i * y_j
+    # reduce with w^12 = 18w^6 - 82
+    for k in range(22, 11, -1):
+        top = product[k]
+        if top != 0:
+            product[k - 6] += 18 * top
+            product[k - 12] -= 82 * top
+    return [coeff % field_modulus for coeff in product[:12]]
+
+def fq12_pow(x, exponent):
+    result = FQ12_ONE
+    for bit in bin(exponent)[2:]:
+        result = fq12_mul(result, result)
+        if bit == '1':
+            result = fq12_mul(x, result)
+    return result
+
+
+# the Frobenius map x -> x^p on the twisted curve, expressed in FQ2: (x, y) -> (conj(x) * xi^((p-1)/3), conj(y) * xi^((p-1)/2)) with xi = 9 + u
+XI = (9, 1)
+FROBENIUS_X = fq2_pow(XI, (field_modulus - 1) // 3)
+FROBENIUS_Y = fq2_pow(XI, (field_modulus - 1) // 2)
+
+def frobenius_G2(point):
+    x, y = point
+    return (fq2_mul(fq2_conjugate(x), FROBENIUS_X), fq2_mul(fq2_conjugate(y), FROBENIUS_Y))
+
+
+# the points are normalized to affine coordinates whatever the group backend (see group/group.py)
+def point_G1_to_ints(point):
+    point = group.to_affine(point)
+    return (int(point[0]), int(point[1]))
+
+def point_G2_to_ints(point):
+    point = group.to_affine(point)
+    return (tuple(int(coeff) for coeff in point[0].coeffs), tuple(int(coeff) for coeff in point[1].coeffs))
+
+
+# A line is kept as (m, d) for y = m*x + d, or (None, x1) for the vertical line x = x1, with m, d, x1 in FQ2.
+# Once twisted into FQ12 the slope becomes m*w and the intercept d*w^3, so its value at a G1 point P is m*w*x_P + d*w^3 - y_P.
+def double_step(R):
+    x, y = R
+    x_squared = fq2_mul(x, x)
+    m = fq2_mul((3 * x_squared[0] % field_modulus, 3 * x_squared[1] % field_modulus), fq2_inv(fq2_add(y, y)))
+    d = fq2_sub(y, fq2_mul(m, x))
+    new_x = fq2_sub(fq2_mul(m, m), fq2_add(x, x))
+    new_y = fq2_sub(fq2_mul(m, fq2_sub(x, new_x)), y)
+    return (m, d), (new_x, new_y)
+
+def add_step(R, Q):
+    x1, y1 = R
+    x2, y2 = Q
+    if x1 == x2:
+        if y1 == y2:
+            return double_step(R)
+        return (None, x1), None
+    m = fq2_mul(fq2_sub(y2, y1), fq2_inv(fq2_sub(x2, x1)))
+    d = fq2_sub(y1, fq2_mul(m, x1))
+    new_x = fq2_sub(fq2_sub(fq2_mul(m, m), x1), x2)
+    new_y = fq2_sub(fq2_mul(m, fq2_sub(x1, new_x)), y1)
+    return (m, d), (new_x, new_y)
+
+def evaluate_line(line, P):
+    x_P, y_P = P
+    first, second = line
+    if first is None:
+        # x_P - x1 * w^2
+        x1 = second
+        return [x_P, 0, -(x1[0] - 9 * x1[1]) % field_modulus, 0, 0, 0, 0, 0, -x1[1] % field_modulus, 0, 0, 0]
+    m, d = first, second
+    return [
+        -y_P % field_modulus,
+        (m[0] - 9 * m[1]) * x_P % field_modulus,
+        0,
+        (d[0] - 9 * d[1]) % field_modulus,
+        0, 0, 0,
+        m[1] * x_P % field_modulus,
+        0,
+        d[1],
+        0, 0,
+    ]
+
+
+def prepare_G2(Q):
+    # all the lines the Miller loop of Q goes through, in the order the loop uses them
+    if Q is None:
+        return None
+    Q = point_G2_to_ints(Q)
+    profiling.count('G2 preparations')
+    lines = []
+    R = Q
+    for bit in ATE_LOOP_BITS:
+        line, R = double_step(R)
+        lines.append(line)
+        if bit:
+            line, R = add_step(R, Q)
+            lines.append(line)
+    Q1 = frobenius_G2(Q)
+    Q2 = frobenius_G2(Q1)
+    minus_Q2 = (Q2[0], fq2_neg(Q2[1]))
+    line, R = add_step(R, Q1)
+    lines.append(line)
+    line, _ = add_step(R, minus_Q2)
+    lines.append(line)
+    # every line slope costs one FQ2 inversion
+    profiling.count('field inversions', len(lines))
+    return lines
+
+
+def multi_miller_loop(pairs):
+    # pairs are (P, lines) with P in G1 and lines = prepare_G2(Q), pairs with a point at infinity contribute 1
+    active_pairs = []
+    for P, lines in pairs:
+        if P is not None and lines is not None:
+            active_pairs.append((point_G1_to_ints(P), iter(lines)))
+    profiling.count('miller loops', len(active_pairs))
+
+    f = FQ12_ONE
+    for bit in ATE_LOOP_BITS:
+        f = fq12_mul(f, f)
+        for P, lines in active_pairs:
+            f = fq12_mul(evaluate_line(next(lines), P), f)
+            if bit:
+                f = fq12_mul(evaluate_line(next(lines), P), f)
+    for P, lines in active_pairs:
+        f = fq12_mul(evaluate_line(next(lines), P), f)
+        f = fq12_mul(evaluate_line(next(lines), P), f)
+    return f
+
+def final_exponentiate(f):
+    profiling.count('final exponentiations')
+    return fq12_pow(f, FINAL_EXPONENT)
+
+def pairing(Q, P):
+    # same value as py_ecc.bn128.bn128_pairing.pairing(Q, P)
+    return FQ12(final_exponentiate(multi_miller_loop([(P, prepare_G2(Q))])))
+
+def pairing_product_is_one(pairs):
+    # pairs are (P, Q) with P in G1 and Q in G2, or (P, lines) when Q was already prepared
+    prepared_pairs = [(P, Q if isinstance(Q, list) else prepare_G2(Q)) for P, Q in pairs]
+    return final_exponentiate(multi_miller_loop(prepared_pairs)) == FQ12_ONE
@@ -0,0 +1,144 @@
+'''
+In this package we define the instrumentation layer: named phases, operation counters and the logging of the file I/O.
+
+Phases are context managers, they nest and their names are joined with '/':
+    with profiling.phase('prove'):
+        with profiling.phase('quotient'):      -> recorded as 'prove/quotient'
+            ...
+every phase records its number of calls, its wall clock time and its CPU time.
+
+Counters count operations: point additions and doublings, scalar multiplications, MSM terms, Miller loops,
+final exponentiations, field inversions.
+Point operations are counted by wrapping the group backend (see group/group.py), so they cost nothing when profiling is disabled.
+The other counters are counted per call (an MSM, a Miller loop, ...), never per field operation.
+
+When profiling is disabled (the default), phase() and count() return right away.
+'''
+
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from group import group
+
+enabled = False
+phases = OrderedDict()
+counters = OrderedDict()
+phase_stack = []
+
+
+def get_logger(name):
+    return logging.getLogger('groth16.' + name)
+
+def configure_logging(level=logging.INFO):
+    # the messages of the I/O modules ("Opening file to ...") go to stdout, as plain lines
+    logger = logging.getLogger('groth16')
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+class CountingBackend:
+    # forwards every operation to the real backend and counts it
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.G1 = backend.G1
+        self.G2 = backend.G2
+        # affine additions and doublings pay one field inversion each, Jacobian ones only when normalized
+        # (here in to_affine, and in group/glv.py for the tables of the scalar multiplication)
+        self.inversion_per_operation = backend.name == 'affine'
+
+    def add(self, P, Q):
+        count('point additions')
+        if self.inversion_per_operation and P is not None and Q is not None:
+            count('field inversions')
+        return self.backend.add(P, Q)
+
+    def double(self, P):
+        count('point doublings')
+        if self.inversion_per_operation and P is not None:
+            count('field inversions')
+        return self.backend.double(P)
+
+    def multiply(self, P, n):
+        count('scalar multiplications')
+        return self.backend.multiply(P, n)
+
+    def to_affine(self, P):
+        if not self.inversion_per_operation and P is not None:
+            count('field inversions')
+        return self.backend.to_affine(P)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def enable():
+    global enabled
+    reset()
+    enabled = True
+    if not isinstance(group.backend, CountingBackend):
+        group.backend = CountingBackend(group.backend)
+
+def disable():
+    global enabled
+    enabled = False
+    if isinstance(group.backend, CountingBackend):
+        group.backend = group.backend.backend
+
+def reset():
+    phases.clear()
+    counters.clear()
+    phase_stack.clear()
+
+
+@contextmanager
+def phase(name):
+    if not enabled:
+        yield
+        return
+    phase_stack.append(name)
+    full_name = '/'.join(phase_stack)
+    # registered when entered, so that a phase is listed before the phases nested in it
+    record = phases.setdefault(full_name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        record['calls'] += 1
+        record['wall'] += time.perf_counter() - wall_start
+        record['cpu'] += time.process_time() - cpu_start
+        phase_stack.pop()
+
+def count(name, n=1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + n
+
+
+def report():
+    return {'phases': dict(phases), 'counters': dict(counters)}
+
+def report_json():
+    return json.dumps(report(), indent=4)
+
+def report_table():
+    width = max([len(name.rsplit('/', 1)[-1]) + 2 * name.count('/') for name in phases] + [len('phase')])
+    lines = [f"{'phase':<{width}}  {'calls':>6}  {'wall (s)':>10}  {'cpu (s)':>10}"]
+    for name, record in phases.items():
+        # nested phases are indented under their parent
+        label = '  ' * name.count('/') + name.rsplit('/', 1)[-1]
+        lines.append(f"{label:<{width}}  {record['calls']:>6}  {record['wall']:>10.4f}  {record['cpu']:>10.4f}")
+    if counters:
+        counter_width = max(len(name) for name in counters)
+        lines.append('')
+        lines.append(f"{'operation':<{counter_width}}  {'count':>12}")
+        for name, value in counters.items():
+            lines.append(f"{name:<{counter_width}}  {value:>12}")
+    return '\n'.join(lines)
@@ -0,0 +1,140 @@
+'''
+In this module we define the batch prover: many witnesses, one circuit.
+
+The R1CS is loaded once per worker process, the proving key once for all of them in shared memory (see prover/worker.py),
+then the witnesses are streamed to the workers and the proofs are written back in input order.
+A witness that fails (bad JSON, wrong size, unsatisfied constraints, ...) is reported and skipped, the rest of the batch goes on.
+
+Witnesses are read from:
+    * a directory: every *.json file holding a witness list, in file name order,
+    * a JSONL file: one witness per line, either a list or {"id": "...", "witness": [...]}.
+Proofs are written in the output directory as proof_000000.json, proof_000001.json, ... (index in the input),
+with a batch_report.json listing the status of every item.
+'''
+
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from group import group
+from keys import keys
+from prover.worker import init_worker, prove_in_worker, share_proving_keys, close_shared_keys
+
+REPORT_NAME = 'batch_report.json'
+
+
+def iterate_witnesses(source):
+    # yields (name, witness) in input order, witness is the exception when the item can't be read
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(source, file_name), 'r') as f:
+                    yield file_name, json.load(f)
+            except (OSError, ValueError) as e:
+                yield file_name, e
+        return
+
+    with open(source, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            name = f"line {line_number}"
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield name, e
+                continue
+            if isinstance(item, dict):
+                yield str(item.get('id', name)), item.get('witness')
+            else:
+                yield name, item
+
+
+class BatchProver:
+    def __init__(self, example_path='./examples/example1/', key_format='json', workers=1, shared_key=True):
+        assert workers >= 1, "The batch prover needs at least one worker"
+        self.example_path = example_path
+        self.key_format = key_format
+        self.workers = workers
+        # with several workers, the proving key is held once in shared memory instead of once per worker
+        self.shared_key = shared_key
+
+    def check_witness(self, witness):
+        if isinstance(witness, Exception):
+            raise witness
+        assert isinstance(witness, list) and len(witness) > 0, "A witness must be a non empty list"
+        return witness
+
+    def save_proof(self, proof, index, output_path):
+        from utils.utils import deserialize_point_G1, deserialize_point_G2
+        key_format = keys.get_key_format(self.key_format)
+        proof_path = os.path.join(output_path, f"proof_{index:06d}" + key_format['extension'])
+        key_format['save_proof'](deserialize_point_G1(proof['A']), deserialize_point_G2(proof['B']), deserialize_point_G1(proof['C']), proof_path)
+        return proof_path
+
+    def record(self, results, index, name, output_path, proof=None, error=None):
+        if error is None:
+            results.append({'index': index, 'name': name, 'status': 'ok', 'proof': self.save_proof(proof, index, output_path)})
+        else:
+            print(f"Witness {index} ({name}) failed: {error}")
+            results.append({'index': index, 'name': name, 'status': 'error', 'error': error})
+
+    def prove_in_process(self, witnesses, output_path, results):
+        init_worker([self.example_path], self.key_format, group.get_backend_name())
+        for index, (name, witness) in enumerate(witnesses):
+            try:
+                proof = prove_in_worker(self.example_path, self.check_witness(witness))
+                self.record(results, index, name, output_path, proof=proof)
+            except Exception as e:
+                self.record(results, index, name, output_path, error=f"{type(e).__name__}: {e}")
+
+    def prove_in_pool(self, witnesses, output_path, results):
+        # at most 2 witnesses per worker are in flight, so the input is streamed and the proofs come back in order
+        context = multiprocessing.get_context('spawn')
+        in_flight = deque()
+        shared_keys = share_proving_keys([self.example_path], self.key_format) if self.shared_key else {}
+        descriptors = {example_path: shared_key.descriptor() for example_path, shared_key in shared_keys.items()}
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_worker, initargs=([self.example_path], self.key_format, group.get_backend_name(), descriptors)) as pool:
+                def collect_oldest():
+                    index, name, future = in_flight.popleft()
+                    try:
+                        if isinstance(future, Exception):
+                            raise future
+                        self.record(results, index, name, output_path, proof=future.result())
+                    except Exception as e:
+                        self.record(results, index, name, output_path, error=f"{type(e).__name__}: {e}")
+
+                for index, (name, witness) in enumerate(witnesses):
+                    try:
+                        future = pool.submit(prove_in_worker, self.example_path, self.check_witness(witness))
+                    except Exception as e:
+                        future = e
+                    in_flight.append((index, name, future))
+                    if len(in_flight) >= 2 * self.workers:
+                        collect_oldest()
+                while in_flight:
+                    collect_oldest()
+        finally:
+            close_shared_keys(shared_keys)
+
+    def prove_all(self, source, output_path=None):
+        output_path = output_path if output_path is not None else os.path.join(self.example_path, 'proofs')
+        os.makedirs(output_path, exist_ok=True)
+
+        results = []
+        if self.workers == 1:
+            self.prove_in_process(iterate_witnesses(source), output_path, results)
+        else:
+            self.prove_in_pool(iterate_witnesses(source), output_path, results)
+
+        report_path = os.path.join(output_path, REPORT_NAME)
+        with open(report_path, 'w') as f:
+            json.dump(results, f, indent=4)
+        failed = sum(1 for result in results if result['status'] != 'ok')
+        print(f"Batch proving: {len(results) - failed} proofs written, {failed} failed, report in {report_path}")
+        return results
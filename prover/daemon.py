@@ -0,0 +1,212 @@
+'''
+In this module we define a long running prover service.
+
+A "prove" command pays the whole cold start on every run: importing py_ecc and the modules of the prover,
+parsing r1cs.json and the proving key, checking the SRS.
+The daemon does all of this once per worker process, then serves witnesses sent over a Unix socket.
+
+The protocol is one JSON object per line, in both directions:
+    {"command": "prove", "example": "./examples/example1/", "witness": [1, 0, 1, 1, 1, 14]}
+        -> {"status": "ok", "proof": {"A": ..., "B": ..., "C": ...}, "latency": 0.41}
+    {"command": "stats"}
+        -> {"status": "ok", "stats": {"workers": 2, "queue_depth": 0, "in_progress": 1, "completed": 10, "failed": 0, "latency": {...}}}
+    anything that goes wrong -> {"status": "error", "error": "..."}
+"example" can be omitted when the daemon serves a single example.
+'''
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from group import group
+from prover.worker import init_worker, worker_ready, prove_in_worker, share_proving_keys, close_shared_keys
+
+DEFAULT_SOCKET_PATH = '/tmp/groth16_prover.sock'
+
+# a witness of a big circuit does not fit in asyncio's default 64KiB line limit
+MAX_REQUEST_SIZE = 1 << 26
+
+LATENCY_HISTORY = 1000
+
+
+def example_absolute_path(example_path):
+    return os.path.join(os.path.abspath(example_path), '')
+
+
+class ProverStats:
+    def __init__(self, workers):
+        self.workers = workers
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+
+    def start(self):
+        self.pending += 1
+
+    def finish(self, latency, succeeded):
+        self.pending -= 1
+        if succeeded:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        latency = {'count': len(latencies)}
+        if latencies:
+            latency.update({
+                'mean': sum(latencies) / len(latencies),
+                'p50': latencies[len(latencies) // 2],
+                'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                'max': latencies[-1],
+            })
+        return {
+            'workers': self.workers,
+            # the pool runs at most one proof per worker, the rest waits in its queue
+            'queue_depth': max(self.pending - self.workers, 0),
+            'in_progress': min(self.pending, self.workers),
+            'completed': self.completed,
+            'failed': self.failed,
+            'latency': latency,
+        }
+
+
+class ProverDaemon:
+    def __init__(self, example_paths, socket_path=DEFAULT_SOCKET_PATH, key_format='json', workers=1, shared_key=True):
+        assert len(example_paths) > 0, "The prover daemon needs at least one example to serve"
+        assert workers >= 1, "The prover daemon needs at least one worker"
+        # examples are identified by their absolute path, so clients started from another directory still match
+        self.example_paths = [example_absolute_path(example_path) for example_path in example_paths]
+        self.socket_path = socket_path
+        self.key_format = key_format
+        self.workers = workers
+        self.stats = ProverStats(workers)
+        # the proving keys are held once in shared memory for all the workers, instead of once per worker
+        self.shared_key = shared_key
+        self.shared_keys = {}
+        self.pool = None
+
+    def start_pool(self):
+        # workers are spawned (see trusted_setup/fixed_base.py), each one loads every example once
+        if self.shared_key:
+            self.shared_keys = share_proving_keys(self.example_paths, self.key_format)
+        descriptors = {example_path: shared_key.descriptor() for example_path, shared_key in self.shared_keys.items()}
+        context = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_worker, initargs=(self.example_paths, self.key_format, group.get_backend_name(), descriptors))
+
+    async def warm_up(self):
+        # the pool starts a new process for every submitted task while it has no idle worker, so this starts (and loads) all of them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, worker_ready) for _ in range(self.workers)])
+
+    async def prove(self, request):
+        example_path = request.get('example', self.example_paths[0] if len(self.example_paths) == 1 else None)
+        example_path = example_absolute_path(example_path) if example_path is not None else None
+        assert example_path in self.example_paths, f"Unknown example {example_path}, the daemon serves {self.example_paths}"
+        witness = request.get('witness')
+        assert isinstance(witness, list) and len(witness) > 0, "A prove request needs a non empty witness list"
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.stats.start()
+        succeeded = False
+        try:
+            proof = await loop.run_in_executor(self.pool, prove_in_worker, example_path, witness)
+            succeeded = True
+        finally:
+            self.stats.finish(time.perf_counter() - started, succeeded)
+        return {'status': 'ok', 'proof': proof, 'latency': time.perf_counter() - started}
+
+    async def handle_request(self, line):
+        try:
+            request = json.loads(line)
+            assert isinstance(request, dict), "A request must be a JSON object"
+            command = request.get('command')
+            if command == 'prove':
+                return await self.prove(request)
+            if command == 'stats':
+                return {'status': 'ok', 'stats': self.stats.snapshot()}
+            raise ValueError(f"Unknown command {command}")
+        except Exception as e:
+            return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader, writer):
+        # requests of a connection are answered in order, clients that want parallel proofs open several connections
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_request(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        # SIGTERM and SIGINT cancel the daemon wherever it is (loading the workers or serving), so the cleanup below always runs
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signal_number, task.cancel)
+        # only the socket this daemon bound is removed when it stops
+        bound_socket = False
+        try:
+            # checked before loading the workers to fail fast, and again before binding
+            remove_stale_socket(self.socket_path)
+            self.start_pool()
+            print("Loading examples in", self.workers, "prover worker(s):", self.example_paths)
+            await self.warm_up()
+            remove_stale_socket(self.socket_path)
+            server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path, limit=MAX_REQUEST_SIZE)
+            bound_socket = True
+            print("Prover daemon listening on", self.socket_path)
+            async with server:
+                await server.serve_forever()
+        finally:
+            # each step runs even if the previous one raised (a broken pool for instance)
+            try:
+                if self.pool is not None:
+                    self.pool.shutdown(cancel_futures=True)
+            finally:
+                try:
+                    close_shared_keys(self.shared_keys)
+                finally:
+                    if bound_socket and os.path.exists(self.socket_path):
+                        os.remove(self.socket_path)
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("Prover daemon stopped")
+
+
+def remove_stale_socket(socket_path):
+    # a socket file left by a daemon that did not stop cleanly is removed, the socket of a running daemon is never taken over
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+            in_use = True
+        except ConnectionRefusedError:
+            in_use = False
+    assert not in_use, f"Another prover daemon is listening on {socket_path}"
+    os.remove(socket_path)
+
+def send_request(request, socket_path=DEFAULT_SOCKET_PATH):
+    # blocking client, sends one request and waits for its response
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode() + b'\n')
+        with client.makefile('rb') as response:
+            return json.loads(response.readline())
@@ -1,121 +1,203 @@
-from galois import GF, Poly
-from r1cs.r1cs import load_matrices_from_json
-from utils.utils import get_coeff_from_poly, lagrange_poly_vector, save_json
-from witness.witness import  load_witness_from_json, public_inputs_length
-from py_ecc.bn128.bn128_curve import G1, G2, multiply, curve_order, add
-from py_ecc.bn128.bn128_pairing import pairing
+from r1cs.r1cs import load_r1cs
+from utils.utils import poly_from_coeffs
+from witness.witness import  load_witness_from_json, public_inputs_length, values_to_ints
+from py_ecc.bn128.bn128_curve import curve_order
+from group.group import multiply, add, neg, generator_G1, generator_G2
 from keys import keys
+from msm.msm import msm
+from multi_pairing.multi_pairing import pairing_product_is_one
+from domain.domain import EvaluationDomain, evaluate_poly
+from fields.fields import scalar_field
+from profiling import profiling
 import random
+import secrets
+
+# digests of the proving keys that already passed the SRS check in this process
+checked_proving_keys = set()
 
 class Prover:
-    def __init__(self, example_path = './examples/example1/'):
+    def __init__(self, example_path = './examples/example1/', key_format='json', full_qap_check=False, seed=None, shared_key=None):
         self.example_path = example_path
+        self.key_format = key_format
+        # descriptor of a proving key already loaded in shared memory by the parent process (see keys/shared.py)
+        self.shared_key = shared_key
+        # a fixed seed gives fixed salts r and s, hence the same proof for the same witness and key
+        self.random = random.Random(seed)
+        # debug mode: also check u(x)v(x) == w(x) + h(x)t(x) with dense polynomial products
+        self.full_qap_check = full_qap_check
+        self.circuit = None
     
-    def define_t_poly(self, constraints_nb, galois_field=GF(curve_order)):
-        # t(x) = (x-1)(x-2)...(x - constraints_nb)
-        t = Poly([1], field=galois_field)  # start with polynomial "1"
-        for i in range(1, constraints_nb + 1):
-            t *= Poly([1, -i], field=galois_field)  # multiply by (x - i)
-        return t
+    def define_t_poly(self, constraints_nb, galois_field=None):
+        # t(x) = (x-1)(x-w)...(x-w^(n-1)) = x^n - 1 over the roots of unity domain
+        from galois import Poly
+        domain = EvaluationDomain(constraints_nb)
+        return Poly.Degrees([domain.size, 0], coeffs=[1, -1], field=galois_field if galois_field is not None else scalar_field())
     
-    def evaluate_poly_using_srs(self, poly, srs):
-        result = None
-        for degree in range(0, poly.degree + 1):
-            coeff = get_coeff_from_poly(poly, degree)
-            srs_point = srs[degree]
-            term = multiply(srs_point, int(coeff))
-            result = term if result is None else add(result, term)
-        return result
+    def section_msm(self, points, scalars):
+        # sum_i scalars[i] * points[i] over the first len(scalars) points of a proving key section
+        # the points of the zero scalars are not read, a lazy section (binary or shared key) does not even decode them
+        indices = [i for i, scalar in enumerate(scalars) if scalar % curve_order != 0]
+        return msm([points[i] for i in indices], [scalars[i] for i in indices])
+
+    def evaluate_poly_using_srs(self, coeffs, srs):
+        # coefficients lowest degree first, sum_i coeffs[i] * srs[i]
+        return self.section_msm(srs, coeffs)
     
     def evaluate_problematic_C_part(self, witness, psi):
-        num_public_inputs = public_inputs_length(json_path=self.example_path + 'public_witness.json')
-        problematic_C_part = None
-        for i in range(len(witness) - num_public_inputs):
-            a_i = witness[i + num_public_inputs]
-            psi_i = psi[i]
-            term = multiply(psi_i, int(a_i))
-            problematic_C_part = term if problematic_C_part is None else add(problematic_C_part, term)
-        return problematic_C_part
-    
-    def calculate_poly_sum_with_witness(self, polys, witness):
-        result_poly = polys[0] * witness[0]
-        for i, poly in enumerate(polys):
-            if i == 0:
-                continue
-            else:
-                result_poly += poly * witness[i]
-        return result_poly
-    
-    #sanity check for srs that is encrypted in G1
-    def sanity_check_srs_G1(self, srs, encrypted_tau):
-        for i in range(0, len(srs)-1):
-            left = pairing(encrypted_tau, srs[i] )
-            right = pairing(G2, srs[i+1])
-            assert left == right, f"SRS G1 sanity check failed at index {i}"
+        num_public_inputs = self.load_circuit()['num_public_inputs']
+        private_witness = witness[num_public_inputs:]
+        return self.section_msm(psi, private_witness)
+
+    def witness_products(self, witness):
+        return self.load_circuit()['r1cs'].witness_products(witness)
     
-    #sanity check for srs that is encrypted in G2
-    def sanity_check_srs_G2(self, srs, encrypted_tau):
-        for i in range(0, len(srs)-1):
-            left = pairing(srs[i], encrypted_tau )
-            right = pairing(srs[i+1], G1)
-            assert left == right, f"SRS G2 sanity check failed at index {i}"
+    def check_constraints(self, u_values, v_values, w_values):
+        # (L.a)[j] * (R.a)[j] == (O.a)[j] is constraint j itself, so a bad witness is caught before any interpolation
+        for j, (u, v, w) in enumerate(zip(u_values, v_values, w_values)):
+            assert (u * v - w) % curve_order == 0, f"Constraint {j} is not satisfied by the witness: (L.a)[{j}] * (R.a)[{j}] != (O.a)[{j}]"
+
+    def check_qap_at_random_point(self, u_coeffs, v_coeffs, w_coeffs, h_coeffs, domain):
+        # Schwartz-Zippel: two different polynomials of degree <= 2n agree on a random point with probability <= 2n / curve_order
+        z = secrets.randbelow(curve_order)
+        left = evaluate_poly(u_coeffs, z) * evaluate_poly(v_coeffs, z) % curve_order
+        right = (evaluate_poly(w_coeffs, z) + evaluate_poly(h_coeffs, z) * domain.vanishing_poly_at(z)) % curve_order
+        assert left == right, "QAP relation does not hold at a random point: u(z) * v(z) != w(z) + h(z) * t(z)"
+
+    def check_qap_polynomials(self, u_coeffs, v_coeffs, w_coeffs, h_coeffs, constraints_nb):
+        # debug only, this is the one place of the prover that builds the galois field
+        galois_field = scalar_field()
+        u_x = poly_from_coeffs(u_coeffs, galois_field=galois_field)
+        v_x = poly_from_coeffs(v_coeffs, galois_field=galois_field)
+        w_x = poly_from_coeffs(w_coeffs, galois_field=galois_field)
+        h_poly = poly_from_coeffs(h_coeffs, galois_field=galois_field)
+        t_poly = self.define_t_poly(constraints_nb, galois_field=galois_field)
 
+        assert u_x * v_x   == w_x + h_poly * t_poly, "QAP relation does not hold: term1 * term2 != term3 + h * t"
 
+    def generate_check_coefficients(self, count):
+        return [secrets.randbits(128) for _ in range(count)]
 
-    def generate_proof(self):
+    def srs_combinations(self, srs):
+        # sum_i r_i srs[i] and sum_i r_i srs[i+1] for random r_i
+        coefficients = self.generate_check_coefficients(len(srs) - 1)
+        return msm(srs[:-1], coefficients), msm(srs[1:], coefficients)
 
-        galois_field = GF(curve_order)
-        witness = load_witness_from_json(json_path=self.example_path + 'witness.json', galois_field=galois_field)
-        L, R, O = load_matrices_from_json(json_path=self.example_path + 'r1cs.json',  galois_field=galois_field)
-        srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2 = keys.load_proving_key_from_json(json_path=self.example_path + 'proving_key.json')
+    #sanity check for srs that is encrypted in G1
+    def sanity_check_srs_G1(self, srs, encrypted_tau):
+        # e(tau, srs[i]) == e(1, srs[i+1]) for every i holds (except with negligible probability) iff it holds
+        # for a random combination: e(tau, sum_i r_i srs[i]) == e(1, sum_i r_i srs[i+1]), that is 2 pairings instead of 2n
+        if len(srs) < 2:
+            return
+        left, right = self.srs_combinations(srs)
+        assert pairing_product_is_one([(left, encrypted_tau), (neg(right), generator_G2())]), "SRS G1 sanity check failed"
 
-        # sanity check for srs1 and srs2
-        self.sanity_check_srs_G1(srs1, tau_G2) 
+    #sanity check for srs that is encrypted in G2
+    def sanity_check_srs_G2(self, srs, encrypted_tau):
+        if len(srs) < 2:
+            return
+        left, right = self.srs_combinations(srs)
+        assert pairing_product_is_one([(encrypted_tau, left), (neg(generator_G1()), right)]), "SRS G2 sanity check failed"
+
+    def check_proving_key(self, key_path, srs1, srs2, tau_G1, tau_G2):
+        # a key is checked once per process, and once per key file thanks to the stamp written next to it
+        digest = keys.key_file_digest(key_path)
+        if digest in checked_proving_keys or keys.has_srs_check_stamp(key_path, digest):
+            checked_proving_keys.add(digest)
+            return
+        self.sanity_check_srs_G1(srs1, tau_G2)
         self.sanity_check_srs_G2(srs2, tau_G1)
+        checked_proving_keys.add(digest)
+        keys.write_srs_check_stamp(key_path, digest)
+
+    def load_circuit(self):
+        # the matrices and the proving key only depend on the example, they are loaded (and checked) once per prover
+        if self.circuit is not None:
+            return self.circuit
+        with profiling.phase('load r1cs'):
+            r1cs = load_r1cs(example_path=self.example_path)
+        key_format = keys.get_key_format(self.key_format)
+        proving_key_path = self.example_path + 'proving_key' + key_format['extension']
+        with profiling.phase('load proving key'):
+            if self.shared_key is not None:
+                from keys.shared import SharedProvingKey
+                proving_key = SharedProvingKey.attach(self.shared_key).proving_key()
+            else:
+                proving_key = key_format['load_proving_key'](proving_key_path)
+        srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2 = proving_key
 
-        # Generate the polynomials of the matrices using Lagrange interpolation
-        L_transposed = list(zip(*L))
-        R_transposed = list(zip(*R))
-        O_transposed = list(zip(*O))
-
-
-        L_polys = [lagrange_poly_vector(col, galois_field=galois_field) for col in L_transposed]
-        R_polys = [lagrange_poly_vector(col, galois_field=galois_field) for col in R_transposed]
-        O_polys = [lagrange_poly_vector(col, galois_field=galois_field) for col in O_transposed]
-        
-        u_x = self.calculate_poly_sum_with_witness( L_polys, witness)
-
-        v_x = self.calculate_poly_sum_with_witness( R_polys, witness)
-
-        w_x = self.calculate_poly_sum_with_witness( O_polys, witness)
-
-        # calculating t(x) and h(x)
-        constraints_nb = len(L)
-        t_poly = self.define_t_poly(constraints_nb, galois_field=galois_field)
-        h_poly = (u_x * v_x - w_x) // t_poly
-
-        assert u_x * v_x   == w_x + h_poly * t_poly, "QAP relation does not hold: term1 * term2 != term3 + h * t"
+        # sanity check for srs1 and srs2
+        with profiling.phase('srs check'):
+            self.check_proving_key(proving_key_path, srs1, srs2, tau_G1, tau_G2)
+
+        self.circuit = {
+            'r1cs': r1cs,
+            'constraints_nb': r1cs.constraints_nb,
+            'variables_nb': r1cs.variables_nb,
+            'proving_key': proving_key,
+            'num_public_inputs': public_inputs_length(json_path=self.example_path + 'public_witness.json'),
+        }
+        return self.circuit
+
+    def prove(self, witness):
+        circuit = self.load_circuit()
+        srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2 = circuit['proving_key']
+        assert len(witness) == circuit['variables_nb'], f"The witness has {len(witness)} values but the circuit has {circuit['variables_nb']} variables"
+        # the witness is turned into plain ints once, the products and the MSMs below all work on ints
+        witness = values_to_ints(witness)
+
+        # u(x), v(x) and w(x) evaluated on the domain are just the products of the matrices with the witness,
+        # only these three vectors are interpolated, the circuit columns are already baked in the proving key queries
+        constraints_nb = circuit['constraints_nb']
+        domain = EvaluationDomain(constraints_nb)
+        with profiling.phase('witness products'):
+            # (M.a)[j] is the value of the QAP polynomial at the j-th point of the domain, only the non zero entries are visited
+            u_values, v_values, w_values = self.witness_products(witness)
+        with profiling.phase('constraints check'):
+            self.check_constraints(u_values, v_values, w_values)
+        with profiling.phase('interpolation'):
+            u_coeffs = domain.intt(u_values)
+            v_coeffs = domain.intt(v_values)
+            w_coeffs = domain.intt(w_values)
+
+        # calculating t(x) and h(x), the division is done on a coset of the domain with NTTs
+        with profiling.phase('quotient'):
+            h_coeffs = domain.quotient(u_coeffs, v_coeffs, w_coeffs)
+
+        with profiling.phase('qap check'):
+            self.check_qap_at_random_point(u_coeffs, v_coeffs, w_coeffs, h_coeffs, domain)
+            if self.full_qap_check:
+                self.check_qap_polynomials(u_coeffs, v_coeffs, w_coeffs, h_coeffs, constraints_nb)
 
         # here we will calculate h(tau)*t(tau)
-        h_t_tau = self.evaluate_poly_using_srs(h_poly, srs3)
-
-        # and here, we will calculate the problematic part of C (\alpha \sum_{i=1}^{m} a_i v_i(\tau) + \beta \sum_{i=1}^{m} a_i u_i(\tau) + \sum_{i=1}^{m} a_i w_i(\tau))
-        problematic_C_part = self.evaluate_problematic_C_part(witness, psi)
+        with profiling.phase('h(tau) msm'):
+            h_t_tau = self.evaluate_poly_using_srs(h_coeffs, srs3)
+
+        with profiling.phase('A, B, C'):
+            # and here, we will calculate the problematic part of C (\alpha \sum_{i=1}^{m} a_i v_i(\tau) + \beta \sum_{i=1}^{m} a_i u_i(\tau) + \sum_{i=1}^{m} a_i w_i(\tau))
+            problematic_C_part = self.evaluate_problematic_C_part(witness, psi)
+
+            # calculating A, B, C using salting
+            r = self.random.randint(1, curve_order )
+            s = self.random.randint(1, curve_order )
+            # u(tau) = sum_i a_i u_i(tau), so A and B are direct MSMs of the witness over the queries
+            A_1 = add(add(self.section_msm(u_query_G1, witness), alpha), multiply(delta_G1, r))
+            
+            B_1 = add(add(self.section_msm(v_query_G1, witness), beta_G1) , multiply(delta_G1, s))
+            B_2 = add(add(self.section_msm(v_query_G2, witness), beta_G2), multiply(delta_G2, s))
+            C_1 = add(add(add(add(problematic_C_part, h_t_tau), multiply(A_1, s)), multiply(B_1, r)), multiply(delta_G1, (-r * s)%curve_order))
 
-        # calculating A, B, C using salting
-        r = random.randint(1, curve_order )
-        s = random.randint(1, curve_order )
-        A_1 = add(add(self.evaluate_poly_using_srs(u_x, srs1), alpha), multiply(delta_G1, r))
-        
-        B_1 = add(add(self.evaluate_poly_using_srs(v_x, srs1), beta_G1) , multiply(delta_G1, s))
-        B_2 = add(add(self.evaluate_poly_using_srs(v_x, srs2), beta_G2), multiply(delta_G2, s))
-        C_1 = add(add(add(add(problematic_C_part, h_t_tau), multiply(A_1, s)), multiply(B_1, r)), multiply(delta_G1, (-r * s)%curve_order))
-
-        keys.save_proof_to_json(A_1,  B_2, C_1, json_path=self.example_path + 'proof.json')
+        return A_1, B_2, C_1
 
+    def generate_proof(self):
+        with profiling.phase('prove'):
+            with profiling.phase('load circuit'):
+                self.load_circuit()
+            with profiling.phase('load witness'):
+                witness = load_witness_from_json(json_path=self.example_path + 'witness.json', modulo=curve_order)
+            A_1, B_2, C_1 = self.prove(witness)
 
-        
+            with profiling.phase('save proof'):
+                key_format = keys.get_key_format(self.key_format)
+                key_format['save_proof'](A_1,  B_2, C_1, self.example_path + 'proof' + key_format['extension'])
 
         return A_1, B_2, C_1
-
-        
\ No newline at end of file
@@ -0,0 +1,155 @@
+'''
+In this module we define the streaming prover, for circuits whose matrices and proving key do not fit in memory.
+
+The in-memory prover holds the whole R1CS and every section of the proving key at once. The streaming prover holds neither:
+    * the R1CS is read from the sparse file (r1cs.jsonl) one constraint at a time, only L.a, R.a and O.a are kept,
+    * the proving key is the memory mapped binary container (keys/binary.py), its sections are decompressed
+      a chunk of points at a time and every MSM is the sum of the MSMs of its chunks (same for the SRS check).
+What stays in memory is the witness and the O(n) vectors of the NTTs, plus one chunk of points.
+
+The chunk size is derived from the memory budget and from the size of a decompressed point.
+After a proof the peak resident memory of the process is logged next to the budget, and with track_memory the peak of
+the memory allocated by the proof itself is measured with tracemalloc (exact, but it makes the proof several times slower).
+With the same seed, the proof is the same as the one of the in-memory prover (an MSM does not depend on how it is split).
+'''
+
+import resource
+import sys
+import tracemalloc
+
+from py_ecc.bn128.bn128_curve import curve_order
+
+from group.group import add
+from msm.msm import msm
+from prover.prover import Prover
+from r1cs import r1cs, sparse
+from keys import keys
+from witness.witness import public_inputs_length
+from domain.domain import EvaluationDomain
+from profiling import profiling
+from profiling.profiling import get_logger
+
+logger = get_logger('prover')
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# the NTTs need about this many vectors of domain size at once (u, v, w, their coset evaluations and h)
+NTT_VECTORS = 7
+# an MSM over k points also holds its (point, scalar) terms and up to about k buckets
+MSM_OVERHEAD = 3
+MIN_CHUNK_SIZE = 16
+
+
+def object_size(value):
+    # memory of a point or a scalar: tuples and lists of ints, all the way down
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(object_size(item) for item in value)
+    return size
+
+
+class StreamingProver(Prover):
+    def __init__(self, example_path='./examples/example1/', key_format='binary', full_qap_check=False, seed=None, memory_budget=DEFAULT_MEMORY_BUDGET, track_memory=False):
+        assert key_format == 'binary', "The streaming prover reads the proving key in chunks, it needs the binary key format (--format binary)"
+        super().__init__(example_path=example_path, key_format=key_format, full_qap_check=full_qap_check, seed=seed)
+        self.memory_budget = memory_budget
+        self.track_memory = track_memory
+        self.chunk_sizes = {}
+        self.peak_bytes = None
+
+    def load_circuit(self):
+        # only the sizes of the circuit are read here, the constraints are streamed by witness_products
+        if self.circuit is not None:
+            return self.circuit
+        r1cs_path = r1cs.sparse_r1cs_path(self.example_path)
+        assert r1cs_path is not None, "The streaming prover reads the sparse R1CS, convert the example first (python groth16.py sparse <example>)"
+        constraints_nb, variables_nb = sparse.load_sparse_header(r1cs_path)
+
+        domain_size = EvaluationDomain(constraints_nb).size
+        vectors_bytes = NTT_VECTORS * domain_size * object_size(curve_order - 1)
+        assert vectors_bytes < self.memory_budget, f"The memory budget ({self.memory_budget} bytes) is too small, the NTT vectors alone need about {vectors_bytes} bytes"
+        self.points_budget = self.memory_budget - vectors_bytes
+
+        key_format = keys.get_key_format(self.key_format)
+        proving_key_path = self.example_path + 'proving_key' + key_format['extension']
+        with profiling.phase('load proving key'):
+            proving_key = key_format['load_proving_key'](proving_key_path)
+        srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2 = proving_key
+
+        with profiling.phase('srs check'):
+            self.check_proving_key(proving_key_path, srs1, srs2, tau_G1, tau_G2)
+
+        self.circuit = {
+            'r1cs_path': r1cs_path,
+            'constraints_nb': constraints_nb,
+            'variables_nb': variables_nb,
+            'proving_key': proving_key,
+            'num_public_inputs': public_inputs_length(json_path=self.example_path + 'public_witness.json'),
+        }
+        return self.circuit
+
+    def chunk_size(self, points):
+        # as many points as the budget allows, measured on the first point of the section
+        group_id = points.group
+        if group_id not in self.chunk_sizes:
+            point_bytes = MSM_OVERHEAD * (object_size(points[0]) + object_size(curve_order - 1))
+            self.chunk_sizes[group_id] = max(MIN_CHUNK_SIZE, self.points_budget // point_bytes)
+        return self.chunk_sizes[group_id]
+
+    def section_msm(self, points, scalars):
+        # an empty section (psi when every variable is public, srs3 on a one constraint domain) has no point to size a chunk on
+        if len(scalars) == 0:
+            return None
+        chunk_size = self.chunk_size(points)
+        result = None
+        for start in range(0, len(scalars), chunk_size):
+            chunk_scalars = scalars[start:start + chunk_size]
+            # a chunk with only zero scalars is not even decompressed
+            if any(scalar % curve_order for scalar in chunk_scalars):
+                result = add(result, msm(points[start:start + len(chunk_scalars)], chunk_scalars))
+        return result
+
+    def srs_combinations(self, srs):
+        # the random combinations of the SRS check, one chunk (and the first point of the next one) at a time
+        chunk_size = self.chunk_size(srs)
+        left = right = None
+        for start in range(0, len(srs) - 1, chunk_size):
+            points = srs[start:min(start + chunk_size, len(srs) - 1) + 1]
+            coefficients = self.generate_check_coefficients(len(points) - 1)
+            left = add(left, msm(points[:-1], coefficients))
+            right = add(right, msm(points[1:], coefficients))
+        return left, right
+
+    def witness_products(self, witness):
+        circuit = self.load_circuit()
+        u_values, v_values, w_values = [], [], []
+        for constraint in sparse.iterate_sparse_constraints(circuit['r1cs_path']):
+            for values, name in ((u_values, 'L'), (v_values, 'R'), (w_values, 'O')):
+                values.append(sum(int(value) * witness[column] for column, value in constraint.get(name, [])) % curve_order)
+        return u_values, v_values, w_values
+
+    def generate_proof(self):
+        if not self.track_memory:
+            proof = super().generate_proof()
+            self.log_peak_memory()
+            return proof
+        # the traced peak covers everything from the files to the proof: SRS check, witness, constraints, NTTs and MSMs
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            proof = super().generate_proof()
+            _, self.peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+        self.log_peak_memory()
+        return proof
+
+    def log_peak_memory(self):
+        # ru_maxrss is in KiB on Linux and in bytes on macOS, it includes the interpreter and the imported libraries
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        logger.info("Streaming prover peak resident memory of the process: %.1f MiB (budget %.1f MiB)", peak_rss / 2**20, self.memory_budget / 2**20)
+        if self.peak_bytes is not None:
+            logger.info("Streaming prover peak memory allocated by the proof: %.1f MiB", self.peak_bytes / 2**20)
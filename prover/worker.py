@@ -0,0 +1,60 @@
+'''
+In this module we define what runs inside the prover worker processes (the daemon and the batch prover pools).
+
+Each worker loads the R1CS of its examples once, in the pool initializer, then every task only computes a proof.
+The proving keys are loaded and checked once by the parent process, in shared memory (see keys/shared.py),
+and every worker attaches to them instead of holding its own copy. Proofs are returned serialized (see utils.serialize_point_G1/G2)
+since py_ecc points can't be pickled.
+'''
+
+import os
+
+from group import group
+
+# state of a worker process, set once by the pool initializer
+worker_provers = {}
+
+def share_proving_keys(example_paths, key_format):
+    # in the parent process: every proving key is loaded and checked once, the workers get the descriptors of the blocks
+    from prover.prover import Prover
+    from keys import keys
+    from keys.shared import SharedProvingKey
+    shared_keys = {}
+    try:
+        for example_path in example_paths:
+            proving_key_path = example_path + 'proving_key' + keys.get_key_format(key_format)['extension']
+            shared_key = SharedProvingKey.load(proving_key_path, key_format=key_format)
+            shared_keys[example_path] = shared_key
+            srs1, srs2, srs3, psi, alpha, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2 = shared_key.proving_key()
+            # the check stamp written here lets the workers skip the check
+            Prover(example_path=example_path, key_format=key_format).check_proving_key(proving_key_path, srs1, srs2, tau_G1, tau_G2)
+    except BaseException:
+        # a key that fails to load or to pass the check must not leave the blocks already created behind
+        close_shared_keys(shared_keys)
+        raise
+    return shared_keys
+
+def close_shared_keys(shared_keys):
+    for shared_key in shared_keys.values():
+        shared_key.close()
+
+def init_worker(example_paths, key_format, backend_name, shared_keys=None):
+    # shared_keys maps an example to the descriptor of its proving key in shared memory, the key file is read otherwise
+    from prover.prover import Prover
+    group.set_backend(backend_name)
+    shared_keys = shared_keys or {}
+    for example_path in example_paths:
+        prover = Prover(example_path=example_path, key_format=key_format, shared_key=shared_keys.get(example_path))
+        prover.load_circuit()
+        worker_provers[example_path] = prover
+
+def worker_ready():
+    return os.getpid()
+
+def prove_in_worker(example_path, witness):
+    from py_ecc.bn128.bn128_curve import curve_order
+    from utils.utils import serialize_point_G1, serialize_point_G2
+    from witness.witness import convert_values
+    prover = worker_provers[example_path]
+    A, B, C = prover.prove(convert_values(witness, modulo=curve_order))
+    return {'A': serialize_point_G1(A), 'B': serialize_point_G2(B), 'C': serialize_point_G1(C)}
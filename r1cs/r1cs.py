@@ -1,9 +1,16 @@
+import hashlib
 import json
-from galois import GF
+import os
+from py_ecc.bn128.bn128_curve import curve_order
+from r1cs import sparse
+from cache.cache import get_circuit_cache
+from profiling.profiling import get_logger
 
-def load_matrices_from_json(json_path = './examples/example1//r1cs.json', modulo = None , galois_field=GF(101)):
+logger = get_logger('r1cs')
+
+def load_matrices_from_json(json_path = './examples/example1//r1cs.json', modulo = None , galois_field=None):
     with open(json_path, 'r') as f:
-        print("Opening file to load R1CS matrices:", json_path)
+        logger.info("Opening file to load R1CS matrices: %s", json_path)
         data = json.load(f)
     L = data['L']
     R = data['R']
@@ -33,4 +40,50 @@ def load_matrices_from_json(json_path = './examples/example1//r1cs.json', modulo
 
 
 
-    return L, R, O
\ No newline at end of file
+    return L, R, O
+
+
+def load_dense_r1cs(json_path, modulus = curve_order):
+    L, R, O = load_matrices_from_json(json_path=json_path, galois_field=None)
+    return sparse.R1CS.from_dense(L, R, O, modulus)
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def sparse_r1cs_path(example_path = './examples/example1/'):
+    # the example's sparse file, None when it has none
+    # it is converted again when r1cs.json changed since the conversion, so a stale sparse file is never used
+    sparse_path = example_path + 'r1cs.jsonl'
+    json_path = example_path + 'r1cs.json'
+    if not os.path.exists(sparse_path):
+        return None
+    if os.path.exists(json_path):
+        source_digest = sparse.load_sparse_source_digest(sparse_path)
+        if source_digest is None:
+            # not converted from r1cs.json, there is no digest to compare, only the dates
+            assert os.path.getmtime(sparse_path) >= os.path.getmtime(json_path), f"{json_path} is newer than {sparse_path}, convert it again (python groth16.py sparse <example>) or remove the sparse file"
+        elif source_digest != file_digest(json_path):
+            logger.info("%s changed since it was converted, converting it again", json_path)
+            convert_example_to_sparse(example_path=example_path)
+    return sparse_path
+
+def load_r1cs(example_path = './examples/example1/', modulus = curve_order, use_cache = True):
+    # the sparse file is preferred when it exists, the dense r1cs.json stays accepted and is converted row by row
+    sparse_path = sparse_r1cs_path(example_path)
+    if sparse_path is not None:
+        source_path, load = sparse_path, sparse.load_sparse_r1cs
+    else:
+        source_path, load = example_path + 'r1cs.json', load_dense_r1cs
+    if not use_cache:
+        return load(source_path, modulus)
+    # parsing and converting only happens once per content of the file, see cache/cache.py
+    return get_circuit_cache().get_r1cs(source_path, modulus, load)
+
+def convert_example_to_sparse(example_path = './examples/example1/'):
+    json_path = example_path + 'r1cs.json'
+    sparse.save_sparse_r1cs(load_dense_r1cs(json_path), example_path + 'r1cs.jsonl', source_digest=file_digest(json_path))
+    return example_path + 'r1cs.jsonl'
@@ -0,0 +1,207 @@
+'''
+In this module we define a sparse representation of the R1CS.
+
+A real circuit has a handful of non zero entries per constraint, so keeping L, R and O as dense
+constraints x variables matrices wastes memory and time on zeros.
+Each matrix is stored in CSR form (compressed sparse rows):
+    row_offsets[j] .. row_offsets[j+1] is the range of the non zero entries of row j in columns / values
+which gives both products we need in one pass over the non zero entries:
+    * dot(witness):            (M.a)[j] = sum_i M[j][i] a_i            (rows, used by the prover)
+    * transpose_dot(weights):  (M^T.l)[i] = sum_j M[j][i] l_j          (columns, used by the setup, the CSC product without building the CSC)
+
+The on-disk sparse format is JSON lines, so it can be read (and written) one constraint at a time:
+    {"format": "sparse-r1cs", "constraints": 2, "variables": 4, "source_sha256": "..."}
+    {"L": [[1, 1]], "R": [[1, 1]], "O": [[2, 1]]}
+    {"L": [[2, 1]], "R": [[0, 5]], "O": [[3, 1]]}
+Every constraint line lists the [column, value] pairs of the non zero entries of its row in L, R and O.
+source_sha256 is the digest of the r1cs.json the file was converted from, it is absent from files written directly in sparse form.
+'''
+
+import json
+
+from profiling.profiling import get_logger
+
+logger = get_logger('r1cs')
+
+SPARSE_FORMAT = 'sparse-r1cs'
+
+
+class SparseMatrix:
+    def __init__(self, columns_nb, modulus):
+        self.columns_nb = columns_nb
+        self.modulus = modulus
+        self.row_offsets = [0]
+        self.columns = []
+        self.values = []
+
+    @property
+    def rows_nb(self):
+        return len(self.row_offsets) - 1
+
+    @property
+    def nonzero_nb(self):
+        return len(self.values)
+
+    def append_row(self, entries):
+        # entries are (column, value) pairs, zeros are dropped and duplicated columns are summed
+        row = {}
+        for column, value in entries:
+            column = int(column)
+            assert 0 <= column < self.columns_nb, f"Column {column} out of range, the matrix has {self.columns_nb} columns"
+            row[column] = (row.get(column, 0) + int(value)) % self.modulus
+        for column in sorted(row):
+            if row[column] != 0:
+                self.columns.append(column)
+                self.values.append(row[column])
+        self.row_offsets.append(len(self.values))
+
+    def row(self, j):
+        start, end = self.row_offsets[j], self.row_offsets[j + 1]
+        return list(zip(self.columns[start:end], self.values[start:end]))
+
+    def dot(self, vector):
+        assert len(vector) == self.columns_nb, f"Got a vector of size {len(vector)} for a matrix with {self.columns_nb} columns"
+        vector = vector.tolist() if hasattr(vector, 'tolist') else [int(value) for value in vector]
+        values, columns, modulus = self.values, self.columns, self.modulus
+        result = []
+        start = 0
+        # products of plain ints, reduced once per row
+        for end in self.row_offsets[1:]:
+            total = 0
+            for k in range(start, end):
+                total += values[k] * vector[columns[k]]
+            result.append(total % modulus)
+            start = end
+        return result
+
+    def transpose_dot(self, vector):
+        assert len(vector) == self.rows_nb, f"Got a vector of size {len(vector)} for a matrix with {self.rows_nb} rows"
+        result = [0] * self.columns_nb
+        for j, weight in enumerate(vector):
+            weight = int(weight)
+            if weight == 0:
+                continue
+            for k in range(self.row_offsets[j], self.row_offsets[j + 1]):
+                result[self.columns[k]] += self.values[k] * weight
+        return [value % self.modulus for value in result]
+
+    def to_dense(self):
+        dense = []
+        for j in range(self.rows_nb):
+            row = [0] * self.columns_nb
+            for column, value in self.row(j):
+                row[column] = value
+            dense.append(row)
+        return dense
+
+    def to_dict(self):
+        return {'columns_nb': self.columns_nb, 'modulus': self.modulus, 'row_offsets': self.row_offsets, 'columns': self.columns, 'values': self.values}
+
+    @classmethod
+    def from_dict(cls, data):
+        matrix = cls(data['columns_nb'], data['modulus'])
+        matrix.row_offsets = data['row_offsets']
+        matrix.columns = data['columns']
+        matrix.values = data['values']
+        return matrix
+
+    @classmethod
+    def from_dense(cls, rows, columns_nb, modulus):
+        matrix = cls(columns_nb, modulus)
+        for row in rows:
+            assert len(row) == columns_nb, "All rows of a matrix must have the same number of columns"
+            matrix.append_row((column, value) for column, value in enumerate(row) if value != 0)
+        return matrix
+
+
+class R1CS:
+    def __init__(self, L, R, O):
+        assert L.rows_nb == R.rows_nb == O.rows_nb, "L, R, O must have the same number of rows"
+        assert L.columns_nb == R.columns_nb == O.columns_nb, "L, R, O must have the same number of columns"
+        assert L.rows_nb > 0 and L.columns_nb > 0, "Matrices L, R, O cannot be empty"
+        self.L = L
+        self.R = R
+        self.O = O
+
+    @property
+    def constraints_nb(self):
+        return self.L.rows_nb
+
+    @property
+    def variables_nb(self):
+        return self.L.columns_nb
+
+    def matrices(self):
+        return self.L, self.R, self.O
+
+    def witness_products(self, witness):
+        # L.a, R.a and O.a: the values of u(x), v(x) and w(x) on the constraints, no polynomial is built per variable
+        witness = witness.tolist() if hasattr(witness, 'tolist') else [int(value) for value in witness]
+        return tuple(matrix.dot(witness) for matrix in self.matrices())
+
+    def to_dict(self):
+        return {name: matrix.to_dict() for name, matrix in zip('LRO', self.matrices())}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(SparseMatrix.from_dict(data[name]) for name in 'LRO'))
+
+    @classmethod
+    def from_dense(cls, L, R, O, modulus):
+        assert len(L) == len(R) == len(O), "L, R, O must have the same number of rows"
+        assert len(L) > 0 and len(L[0]) > 0, "Matrices L, R, O cannot be empty"
+        columns_nb = len(L[0])
+        return cls(*(SparseMatrix.from_dense(matrix, columns_nb, modulus) for matrix in (L, R, O)))
+
+
+def read_sparse_header(f, path):
+    header = json.loads(f.readline())
+    assert header.get('format') == SPARSE_FORMAT, f"{path} is not a sparse R1CS file"
+    return header['constraints'], header['variables']
+
+def load_sparse_header(path):
+    # (constraints, variables) without reading the constraints
+    with open(path, 'r') as f:
+        return read_sparse_header(f, path)
+
+def load_sparse_source_digest(path):
+    # sha256 of the r1cs.json the file was converted from, None for a file written directly in the sparse format
+    with open(path, 'r') as f:
+        return json.loads(f.readline()).get('source_sha256')
+
+def iterate_sparse_constraints(path):
+    # yields the constraints one at a time, as {"L": [[column, value], ...], "R": [...], "O": [...]}
+    with open(path, 'r') as f:
+        logger.info("Opening file to read R1CS constraints: %s", path)
+        constraints_nb, _ = read_sparse_header(f, path)
+        read_nb = 0
+        for line in f:
+            if not line.strip():
+                continue
+            read_nb += 1
+            yield json.loads(line)
+    assert read_nb == constraints_nb, f"{path} announces {constraints_nb} constraints but has {read_nb}"
+
+def load_sparse_r1cs(path, modulus):
+    # reads the file line by line, no dense row is ever built
+    constraints_nb, variables_nb = load_sparse_header(path)
+    L, R, O = (SparseMatrix(variables_nb, modulus) for _ in range(3))
+    for constraint in iterate_sparse_constraints(path):
+        L.append_row(constraint.get('L', []))
+        R.append_row(constraint.get('R', []))
+        O.append_row(constraint.get('O', []))
+    return R1CS(L, R, O)
+
+def signed_entries(row, modulus):
+    # -1 reads better than modulus - 1 in the file, the loader reduces the values modulo the field anyway
+    return [[column, value if value <= modulus // 2 else value - modulus] for column, value in row]
+
+def save_sparse_r1cs(r1cs, path, source_digest=None):
+    header = {'format': SPARSE_FORMAT, 'constraints': r1cs.constraints_nb, 'variables': r1cs.variables_nb}
+    if source_digest is not None:
+        header['source_sha256'] = source_digest
+    with open(path, 'w') as f:
+        logger.info("Opening file to save sparse R1CS: %s", path)
+        f.write(json.dumps(header) + '\n')
+        for j in range(r1cs.constraints_nb):
+            f.write(json.dumps({name: signed_entries(matrix.row(j), matrix.modulus) for name, matrix in zip('LRO', r1cs.matrices())}) + '\n')
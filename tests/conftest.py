@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the packages of the repository are imported from its root, like groth16.py does
+sys.path.insert(0, REPOSITORY_ROOT)
+# the tests never write to the circuit cache of the user
+os.environ['GROTH16_CACHE_DIR'] = tempfile.mkdtemp(prefix='groth16_test_cache_')
+
+EXAMPLE_FILES = ('r1cs.json', 'witness.json', 'public_witness.json')
+
+
+def copy_example(number, directory):
+    # the inputs of an example only, the keys and proofs are made by the test
+    for name in EXAMPLE_FILES:
+        shutil.copy(os.path.join(REPOSITORY_ROOT, 'examples', f'example{number}', name), directory)
+    return str(directory) + '/'
+
+
+@pytest.fixture
+def example1(tmp_path):
+    return copy_example(1, tmp_path)
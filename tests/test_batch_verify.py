@@ -0,0 +1,40 @@
+import pytest
+
+from group.group import add, generator_G1
+from prover.prover import Prover
+from trusted_setup.trusted_setup import TrustedSetup
+from verifier.verifier import Verifier
+from witness.witness import load_witness_from_json
+
+TAMPERED = [1, 4, 5]
+
+
+@pytest.fixture
+def batch(example1):
+    TrustedSetup(example_path=example1, seed=1).generate_srs()
+    # a new seed gives new salts r and s, hence another valid proof of the same witness
+    proofs = [Prover(example_path=example1, seed=seed).generate_proof() for seed in range(6)]
+    public_witness = [int(value) for value in load_witness_from_json(example1 + 'public_witness.json')]
+    return example1, proofs, [list(public_witness) for _ in proofs]
+
+
+def test_batch_verify_reports_the_tampered_proofs(batch):
+    example_path, proofs, public_witnesses = batch
+    verifier = Verifier(example_path=example_path)
+    assert verifier.batch_verify(proofs, public_witnesses) == []
+
+    A, B, C = proofs[1]
+    proofs[1] = (A, B, add(C, generator_G1()))
+    # a valid proof with a proof element of another valid proof
+    proofs[4] = (proofs[3][0], proofs[4][1], proofs[4][2])
+    public_witnesses[5][2] += 1
+    assert verifier.batch_verify(proofs, public_witnesses) == TAMPERED
+
+
+def test_batch_verify_empty_and_single(batch):
+    example_path, proofs, public_witnesses = batch
+    verifier = Verifier(example_path=example_path)
+    assert verifier.batch_verify([], []) == []
+    assert verifier.batch_verify(proofs[:1], public_witnesses[:1]) == []
+    A, B, C = proofs[0]
+    assert verifier.batch_verify([(A, B, add(C, generator_G1()))], public_witnesses[:1]) == [0]
@@ -0,0 +1,68 @@
+import pytest
+from py_ecc.bn128.bn128_curve import field_modulus
+
+from fields.fields import fq2_add, fq2_mul
+from group.group import generator_G1, generator_G2, multiply, eq, from_affine, to_affine, affine_coords_to_ints, is_on_curve, is_in_subgroup
+from keys import binary, keys
+from verifier.verifier import Verifier
+
+
+def test_loaders_close_the_mapping(tmp_path):
+    A, B, C = multiply(generator_G1(), 3), multiply(generator_G2(), 5), None
+    path = str(tmp_path / 'proof.bin')
+    keys.save_proof_to_binary(A, B, C, path)
+    loaded = keys.load_proof_from_binary(path)
+    assert eq(loaded[0], A) and eq(loaded[1], B) and loaded[2] is None
+
+    with binary.BinaryContainer(path) as container:
+        assert eq(container.point('A'), A)
+    assert container.buffer.closed
+    # closing twice is harmless
+    container.close()
+
+
+def serialized(point):
+    return affine_coords_to_ints(to_affine(point))
+
+
+def test_every_point_has_a_single_encoding():
+    # x = 1 + p would decode to the generator x = 1 without the range check
+    with pytest.raises(ValueError, match='field modulus'):
+        binary.decompress_point_G1((1 + field_modulus).to_bytes(32, 'big'))
+    assert eq(binary.decompress_point_G1(binary.compress_point_G1(serialized(generator_G1()))), generator_G1())
+
+    data = binary.compress_point_G2(serialized(generator_G2()))
+    assert eq(binary.decompress_point_G2(data), generator_G2())
+    # x.c0 has no flag bits, x.c0 + p still fits in its 32 bytes
+    x0 = int.from_bytes(data[32:], 'big')
+    with pytest.raises(ValueError, match='field modulus'):
+        binary.decompress_point_G2(data[:32] + (x0 + field_modulus).to_bytes(32, 'big'))
+    with pytest.raises(ValueError, match='field modulus'):
+        binary.decompress_point_G2(field_modulus.to_bytes(32, 'big') + data[32:])
+
+    assert binary.decompress_point_G1(binary.compress_point_G1(None)) is None
+    with pytest.raises(ValueError, match='infinity'):
+        binary.decompress_point_G1(bytes([binary.INFINITY_FLAG]) + bytes(30) + b'\x01')
+    with pytest.raises(ValueError, match='infinity'):
+        binary.decompress_point_G2(bytes([binary.INFINITY_FLAG | binary.SIGN_FLAG]) + bytes(63))
+
+
+def twist_point_outside_subgroup():
+    # a point of the twist curve, its order is almost never r since the cofactor of G2 is about 2^254
+    for x0 in range(1, 100):
+        x = (x0, 1)
+        y = binary.sqrt_fq2(fq2_add(fq2_mul(fq2_mul(x, x), x), binary.B2))
+        if y is not None:
+            return from_affine((x, y))
+
+
+def test_proof_B_outside_the_subgroup_is_rejected():
+    B = twist_point_outside_subgroup()
+    assert is_on_curve(B) and not is_in_subgroup(B)
+    # decompressing only checks the curve equation
+    assert eq(binary.decompress_point_G2(binary.compress_point_G2(serialized(B))), B)
+    assert is_in_subgroup(generator_G2()) and is_in_subgroup(multiply(generator_G2(), 5))
+    A, C = multiply(generator_G1(), 3), generator_G1()
+    verifier = Verifier()
+    assert verifier.is_well_formed_proof(A, multiply(generator_G2(), 5), C)
+    assert not verifier.is_well_formed_proof(A, B, C)
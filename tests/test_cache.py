@@ -0,0 +1,70 @@
+import json
+
+from py_ecc.bn128.bn128_curve import curve_order
+
+from cache.cache import CACHE_DIR_ENV_VAR, CircuitCache, circuit_key
+from r1cs.r1cs import load_dense_r1cs
+
+
+def write_r1cs(path, output_coefficient):
+    matrices = {'L': [[0, 1, 0]], 'R': [[0, 1, 0]], 'O': [[0, 0, output_coefficient]]}
+    with open(path, 'w') as f:
+        json.dump(matrices, f)
+    return str(path)
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, source_path, modulus):
+        self.calls += 1
+        return load_dense_r1cs(source_path, modulus)
+
+
+def test_memory_lru_is_bounded(tmp_path, monkeypatch):
+    # without GROTH16_CACHE_DIR the cache is in memory only
+    monkeypatch.delenv(CACHE_DIR_ENV_VAR)
+    cache = CircuitCache(max_memory_entries=2)
+    load = CountingLoader()
+    paths = [write_r1cs(tmp_path / f'r1cs{i}.json', i + 1) for i in range(3)]
+    for path in paths:
+        cache.get_r1cs(path, curve_order, load)
+    assert len(cache.memory) == 2
+    # the least recently used one was dropped, and without a directory nothing was written
+    assert circuit_key(paths[0], curve_order) not in cache.memory
+    assert cache.entries() == []
+    cache.get_r1cs(paths[2], curve_order, load)
+    cache.get_r1cs(paths[0], curve_order, load)
+    assert load.calls == 4
+    assert cache.hits == {'memory': 1, 'disk': 0, 'miss': 4}
+
+
+def test_disk_entries_are_shared_and_evicted_by_prefix(tmp_path):
+    directory = str(tmp_path / 'cache')
+    load = CountingLoader()
+    paths = [write_r1cs(tmp_path / f'r1cs{i}.json', i + 1) for i in range(2)]
+    for path in paths:
+        CircuitCache(directory=directory).get_r1cs(path, curve_order, load)
+    # another process: read from disk, not parsed again
+    cache = CircuitCache(directory=directory)
+    assert cache.get_r1cs(paths[0], curve_order, load).O.to_dict() == load_dense_r1cs(paths[0], curve_order).O.to_dict()
+    assert load.calls == 2 and cache.hits['disk'] == 1
+
+    key = circuit_key(paths[0], curve_order)
+    assert cache.evict(key[:8]) == [key]
+    assert key not in cache.memory
+    assert [entry['key'] for entry in cache.entries()] == [circuit_key(paths[1], curve_order)]
+    assert len(cache.evict()) == 1 and cache.entries() == []
+
+
+def test_changed_r1cs_is_not_served_from_the_cache(tmp_path):
+    cache = CircuitCache(directory=str(tmp_path / 'cache'))
+    load = CountingLoader()
+    path = write_r1cs(tmp_path / 'r1cs.json', 1)
+    first = cache.get_r1cs(path, curve_order, load)
+    write_r1cs(tmp_path / 'r1cs.json', 5)
+    second = cache.get_r1cs(path, curve_order, load)
+    assert load.calls == 2
+    assert first.O.to_dict() != second.O.to_dict()
+    assert second.O.to_dict() == load_dense_r1cs(path, curve_order).O.to_dict()
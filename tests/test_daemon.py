@@ -0,0 +1,25 @@
+import socket
+
+import pytest
+
+from prover.daemon import remove_stale_socket
+
+
+def test_stale_socket_is_removed(tmp_path):
+    path = str(tmp_path / 'prover.sock')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    # bound but closed: nothing answers anymore, as after a daemon that was killed
+    server.close()
+    remove_stale_socket(path)
+    assert not (tmp_path / 'prover.sock').exists()
+
+
+def test_live_socket_is_kept(tmp_path):
+    path = str(tmp_path / 'prover.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen()
+        with pytest.raises(AssertionError):
+            remove_stale_socket(path)
+        assert (tmp_path / 'prover.sock').exists()
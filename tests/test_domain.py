@@ -0,0 +1,60 @@
+import random
+
+import pytest
+from py_ecc.bn128.bn128_curve import curve_order
+
+from domain.domain import EvaluationDomain, evaluate_poly
+
+
+def random_poly(rng, degree):
+    return [rng.randrange(curve_order) for _ in range(degree + 1)]
+
+
+def poly_mul(a, b):
+    product = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            product[i + j] = (product[i + j] + x * y) % curve_order
+    return product
+
+
+def poly_sub(a, b):
+    size = max(len(a), len(b))
+    a, b = a + [0] * (size - len(a)), b + [0] * (size - len(b))
+    return [(x - y) % curve_order for x, y in zip(a, b)]
+
+
+def strip(poly):
+    while poly and poly[-1] == 0:
+        poly = poly[:-1]
+    return poly
+
+
+@pytest.mark.parametrize('constraints_nb', [1, 2, 5, 8, 13])
+def test_roundtrips_and_evaluations(constraints_nb):
+    rng = random.Random(constraints_nb)
+    domain = EvaluationDomain(constraints_nb)
+    # omega has order exactly n
+    assert pow(domain.omega, domain.size, curve_order) == 1
+    assert domain.size == 1 or pow(domain.omega, domain.size // 2, curve_order) != 1
+
+    coeffs = random_poly(rng, domain.size - 1)
+    evaluations = domain.ntt(coeffs)
+    assert evaluations == [evaluate_poly(coeffs, x) for x in domain.elements()]
+    assert domain.intt(evaluations) == coeffs
+
+    coset_evaluations = domain.coset_ntt(coeffs)
+    assert coset_evaluations == [evaluate_poly(coeffs, domain.coset_shift * x % curve_order) for x in domain.elements()]
+    assert domain.coset_intt(coset_evaluations) == coeffs
+
+
+@pytest.mark.parametrize('constraints_nb', [2, 4, 6, 16])
+def test_quotient(constraints_nb):
+    rng = random.Random(constraints_nb)
+    domain = EvaluationDomain(constraints_nb)
+    # u v - w vanishes on the domain when w interpolates the products u(x) v(x) there, like a satisfied QAP
+    u, v = random_poly(rng, domain.size - 1), random_poly(rng, domain.size - 1)
+    w = domain.intt([a * b % curve_order for a, b in zip(domain.ntt(u), domain.ntt(v))])
+    h = domain.quotient(u, v, w)
+    t = [curve_order - 1] + [0] * (domain.size - 1) + [1]
+    assert strip(poly_sub(poly_mul(u, v), w)) == strip(poly_mul(h, t))
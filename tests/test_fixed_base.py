@@ -0,0 +1,45 @@
+import random
+
+import pytest
+from py_ecc.bn128.bn128_curve import curve_order
+
+from conftest import copy_example
+from group.group import generator_G1, generator_G2, multiply, eq
+from trusted_setup import fixed_base
+from trusted_setup.fixed_base import FixedBaseEngine, build_table, table_multiply
+from trusted_setup.trusted_setup import TrustedSetup
+
+EDGE_SCALARS = [0, 1, 2, curve_order - 1, curve_order, curve_order + 3]
+
+
+@pytest.mark.parametrize('generator', [generator_G1, generator_G2])
+@pytest.mark.parametrize('window', [2, 5, 8])
+def test_table_multiply(generator, window):
+    rng = random.Random(window)
+    table = build_table(generator(), window)
+    for scalar in EDGE_SCALARS + [rng.randrange(curve_order) for _ in range(5)]:
+        assert eq(table_multiply(table, window, scalar), multiply(generator(), scalar))
+
+
+def test_engine_in_parallel():
+    rng = random.Random(0)
+    scalars = EDGE_SCALARS + [rng.randrange(curve_order) for _ in range(fixed_base.MIN_PARALLEL_SCALARS)]
+    points = FixedBaseEngine(workers=2).multiply_G1(scalars)
+    assert len(points) == len(scalars)
+    assert all(eq(point, multiply(generator_G1(), scalar)) for point, scalar in zip(points, scalars))
+
+
+def test_setup_does_not_depend_on_the_workers(tmp_path, monkeypatch):
+    # every batch of the example is split between the workers, however small
+    monkeypatch.setattr(fixed_base, 'MIN_PARALLEL_SCALARS', 1)
+    key_files = []
+    for workers in (1, 2):
+        (tmp_path / str(workers)).mkdir()
+        example_path = copy_example(1, tmp_path / str(workers))
+        TrustedSetup(example_path=example_path, seed=9, workers=workers).generate_srs()
+        contents = []
+        for name in ('proving_key.json', 'verifying_key.json'):
+            with open(example_path + name, 'rb') as f:
+                contents.append(f.read())
+        key_files.append(contents)
+    assert key_files[0] == key_files[1]
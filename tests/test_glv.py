@@ -0,0 +1,59 @@
+import random
+
+import pytest
+from py_ecc.bn128 import bn128_curve
+from py_ecc.bn128.bn128_curve import curve_order
+
+from group import glv, jacobian
+from group.group import JacobianBackend
+from profiling import profiling
+
+backend = JacobianBackend()
+BASES = {'G1': bn128_curve.G1, 'G2': bn128_curve.G2}
+EDGE_SCALARS = [0, 1, 2, curve_order - 1, curve_order, curve_order + 1, glv.LAMBDA, -1, -glv.LAMBDA, -(curve_order + 7)]
+
+
+def test_decompose():
+    rng = random.Random(0)
+    for k in [0, 1, curve_order - 1, glv.LAMBDA, glv.LAMBDA + 1] + [rng.randrange(curve_order) for _ in range(200)]:
+        k1, k2 = glv.decompose(k)
+        assert (k1 + k2 * glv.LAMBDA - k) % curve_order == 0
+        assert abs(k1).bit_length() <= 128 and abs(k2).bit_length() <= 128
+
+
+@pytest.mark.parametrize('width', [2, 3, 4, 5])
+def test_wnaf(width):
+    rng = random.Random(width)
+    for k in [0, 1, 2**128 - 1] + [rng.randrange(2**128) for _ in range(100)]:
+        digits = glv.wnaf(k, width)
+        assert sum(digit << i for i, digit in enumerate(digits)) == k
+        nonzero = [i for i, digit in enumerate(digits) if digit != 0]
+        assert all(digits[i] % 2 == 1 and abs(digits[i]) < 1 << (width - 1) for i in nonzero)
+        # at most one non zero digit in any width consecutive digits
+        assert all(j - i >= width for i, j in zip(nonzero, nonzero[1:]))
+
+
+@pytest.mark.parametrize('group_name', ['G1', 'G2'])
+def test_multiply_matches_py_ecc(group_name):
+    rng = random.Random(group_name)
+    base = bn128_curve.multiply(BASES[group_name], rng.randrange(1, curve_order))
+    P = backend.from_affine(base)
+    # the same point with Z != 1, as left by the Jacobian additions and doublings
+    doubled = backend.from_affine(bn128_curve.double(base))
+    inputs = [(P, base), (jacobian.double(P), bn128_curve.double(base)), (backend.add(doubled, P), bn128_curve.multiply(base, 3))]
+    for point, affine in inputs:
+        for k in EDGE_SCALARS + [rng.randrange(curve_order) for _ in range(4)]:
+            assert backend.to_affine(glv.multiply(point, k)) == bn128_curve.multiply(affine, k % curve_order)
+    assert glv.multiply(None, 5) is None
+
+
+def test_table_inversions_are_counted():
+    P = backend.from_affine(bn128_curve.G1)
+    profiling.reset()
+    profiling.enable()
+    try:
+        glv.multiply(P, 12345)
+    finally:
+        profiling.disable()
+    assert profiling.report()['counters']['field inversions'] == 1 << (glv.WINDOW_G1 - 2)
+    profiling.reset()
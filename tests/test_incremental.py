@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from conftest import copy_example
+from trusted_setup.trusted_setup import TrustedSetup
+
+SEED = 5
+
+
+def edit_r1cs(example_path, edit):
+    with open(example_path + 'r1cs.json', 'r') as f:
+        matrices = json.load(f)
+    edit(matrices)
+    with open(example_path + 'r1cs.json', 'w') as f:
+        json.dump(matrices, f)
+
+
+def change_column(matrices):
+    # the output constraint now reads w5 = w1 + 3 w2 + 4 w3 + 8 w4, only the column of w2 changes
+    matrices['O'][4][2] = -3
+
+
+def resize_domain(matrices):
+    # 6 -> 9 constraints: the domain grows from 8 to 16, three trivial constraints 0 = 0 are added
+    for name in ('L', 'R', 'O'):
+        matrices[name] += [[0] * len(matrices[name][0]) for _ in range(3)]
+
+
+def read_keys(example_path):
+    contents = []
+    for name in ('proving_key.json', 'verifying_key.json'):
+        with open(example_path + name, 'rb') as f:
+            contents.append(f.read())
+    return contents
+
+
+@pytest.mark.parametrize('edit, same_domain', [(change_column, True), (resize_domain, False)])
+def test_dev_setup_equals_full_setup(tmp_path, edit, same_domain):
+    (tmp_path / 'dev').mkdir()
+    (tmp_path / 'full').mkdir()
+    dev_path = copy_example(1, tmp_path / 'dev')
+    full_path = copy_example(1, tmp_path / 'full')
+
+    TrustedSetup(example_path=dev_path, seed=SEED, dev_mode=True).generate_srs()
+    edit_r1cs(dev_path, edit)
+    incremental_setup = TrustedSetup(example_path=dev_path, seed=SEED, dev_mode=True)
+    incremental_setup.generate_srs()
+    assert incremental_setup.incremental_report['same_domain'] == same_domain
+    assert incremental_setup.incremental_report['changed_columns'] == (1 if same_domain else 0)
+    assert incremental_setup.incremental_report['recomputed_points'] < incremental_setup.incremental_report['total_points']
+
+    edit_r1cs(full_path, edit)
+    TrustedSetup(example_path=full_path, seed=SEED).generate_srs()
+    assert read_keys(dev_path) == read_keys(full_path)
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+from py_ecc.bn128.bn128_curve import curve_order
+
+from group.group import generator_G1, generator_G2, multiply, eq
+from msm.msm import msm, naive_msm, window_size
+
+
+def random_points(generator, count, rng):
+    return [multiply(generator, rng.randrange(1, curve_order)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('count', [2, 5, 10, 30, 60])
+def test_msm_matches_naive_for_every_window_size(count):
+    rng = random.Random(count)
+    points = random_points(generator_G1(), count, rng)
+    scalars = [rng.randrange(curve_order) for _ in range(count)]
+    expected = naive_msm(points, scalars)
+    assert eq(msm(points, scalars), expected)
+    for window in range(2, window_size(count) + 2):
+        assert eq(msm(points, scalars, window=window), expected)
+
+
+def test_msm_edge_scalars_and_points():
+    rng = random.Random(1)
+    points = random_points(generator_G1(), 8, rng) + [None, None]
+    scalars = [0, 1, curve_order - 1, curve_order, curve_order + 5, 2 * curve_order - 1, 2**300, -3, 7, 0]
+    assert eq(msm(points, scalars), naive_msm(points, scalars))
+
+
+def test_msm_degenerate_inputs():
+    assert msm([], []) is None
+    assert msm([generator_G1()], [curve_order]) is None
+    assert msm([None, None], [3, 5]) is None
+    # P + (-1) P cancels out
+    assert msm([generator_G1(), generator_G1()], [1, curve_order - 1]) is None
+    assert eq(msm([generator_G1()], [curve_order + 2]), multiply(generator_G1(), 2))
+
+
+def test_msm_G2():
+    rng = random.Random(2)
+    points = random_points(generator_G2(), 6, rng) + [None]
+    scalars = [rng.randrange(curve_order) for _ in range(6)] + [9]
+    assert eq(msm(points, scalars), naive_msm(points, scalars))
@@ -0,0 +1,30 @@
+import random
+
+from py_ecc.bn128 import bn128_curve, bn128_pairing
+from py_ecc.bn128.bn128_curve import curve_order
+from py_ecc.bn128 import FQ12
+
+from group.group import generator_G1, generator_G2, multiply, neg
+from multi_pairing.multi_pairing import final_exponentiate, multi_miller_loop, prepare_G2, pairing_product_is_one
+
+
+def test_multi_pairing_matches_py_ecc():
+    rng = random.Random(0)
+    scalars = [(rng.randrange(1, curve_order), rng.randrange(1, curve_order)) for _ in range(2)]
+    pairs = [(multiply(generator_G1(), a), prepare_G2(multiply(generator_G2(), b))) for a, b in scalars]
+
+    expected = [bn128_pairing.pairing(bn128_curve.multiply(bn128_curve.G2, b), bn128_curve.multiply(bn128_curve.G1, a)) for a, b in scalars]
+    assert FQ12(final_exponentiate(multi_miller_loop(pairs))) == expected[0] * expected[1]
+    # a single pair is the pairing itself
+    assert FQ12(final_exponentiate(multi_miller_loop(pairs[:1]))) == expected[0]
+
+def test_pairing_product_is_one():
+    a, b = 12345, 6789
+    P, Q = multiply(generator_G1(), a), multiply(generator_G2(), b)
+    # e(aG1, bG2) e(-abG1, G2) = 1
+    assert pairing_product_is_one([(P, Q), (neg(multiply(generator_G1(), a * b)), generator_G2())])
+    # off by one factor
+    assert not pairing_product_is_one([(P, Q), (neg(multiply(generator_G1(), a * b + 1)), generator_G2())])
+    assert not pairing_product_is_one([(P, Q)])
+    # pairs with a point at infinity contribute 1
+    assert pairing_product_is_one([(None, Q), (P, None)])
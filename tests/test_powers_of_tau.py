@@ -0,0 +1,23 @@
+import pytest
+
+from prover.prover import Prover
+from trusted_setup.powers_of_tau import generate_powers_of_tau
+from trusted_setup.trusted_setup import TrustedSetup
+from verifier.verifier import Verifier
+
+
+@pytest.mark.parametrize('key_format', ['json', 'binary'])
+def test_keys_from_powers_of_tau_verify_a_proof(example1, tmp_path, key_format):
+    # example1 has 6 constraints, a domain of 8 = 2^3, and a file for up to 2^4 constraints serves it too
+    powers_of_tau_path = str(tmp_path / 'powers_of_tau.bin')
+    generate_powers_of_tau(4, path=powers_of_tau_path, seed=1, workers=1)
+    TrustedSetup(example_path=example1, key_format=key_format, seed=2, workers=1, powers_of_tau_path=powers_of_tau_path).generate_srs()
+    Prover(example_path=example1, key_format=key_format).generate_proof()
+    assert Verifier(example_path=example1, key_format=key_format).verify()
+
+
+def test_powers_of_tau_too_small(example1, tmp_path):
+    powers_of_tau_path = str(tmp_path / 'powers_of_tau.bin')
+    generate_powers_of_tau(2, path=powers_of_tau_path, seed=1, workers=1)
+    with pytest.raises(AssertionError):
+        TrustedSetup(example_path=example1, seed=2, workers=1, powers_of_tau_path=powers_of_tau_path).generate_srs()
@@ -0,0 +1,41 @@
+import json
+import random
+
+import pytest
+from py_ecc.bn128.bn128_curve import curve_order
+
+from domain.domain import EvaluationDomain
+from prover.prover import Prover
+from trusted_setup.trusted_setup import TrustedSetup
+
+
+def write_witness(example_path, witness):
+    with open(example_path + 'witness.json', 'w') as f:
+        json.dump(witness, f)
+
+
+@pytest.mark.parametrize('witness, failing_row', [
+    # w5 = w1 + 2 w2 + 4 w3 + 8 w4 = 14 is constraint 4
+    ([1, 0, 1, 1, 1, 15], 4),
+    # w2 is not a bit (constraint 1), so the sum of constraint 4 is broken too: the first one is reported
+    ([1, 0, 2, 1, 1, 14], 1),
+])
+def test_first_unsatisfied_constraint_is_reported(example1, witness, failing_row):
+    TrustedSetup(example_path=example1, seed=3).generate_srs()
+    write_witness(example1, witness)
+    with pytest.raises(AssertionError, match=f"Constraint {failing_row} is not satisfied"):
+        Prover(example_path=example1).generate_proof()
+
+
+def test_qap_check_rejects_a_wrong_quotient():
+    rng = random.Random(0)
+    domain = EvaluationDomain(6)
+    u = [rng.randrange(curve_order) for _ in range(domain.size)]
+    v = [rng.randrange(curve_order) for _ in range(domain.size)]
+    w = domain.intt([a * b % curve_order for a, b in zip(domain.ntt(u), domain.ntt(v))])
+    h = domain.quotient(u, v, w)
+    prover = Prover()
+    prover.check_qap_at_random_point(u, v, w, h, domain)
+    wrong_h = [(h[0] + 1) % curve_order] + h[1:]
+    with pytest.raises(AssertionError, match="QAP relation"):
+        prover.check_qap_at_random_point(u, v, w, wrong_h, domain)
@@ -0,0 +1,30 @@
+import os
+
+from group.group import eq
+from keys import binary, keys
+from keys.shared import SharedProvingKey
+from trusted_setup.trusted_setup import TrustedSetup
+
+
+def test_shared_proving_key(example1):
+    TrustedSetup(example_path=example1, seed=2).generate_srs()
+    proving_key = keys.load_proving_key_from_json(example1 + 'proving_key.json')
+    owner = SharedProvingKey.create(proving_key)
+    name = owner.memory.name
+    try:
+        attached = SharedProvingKey.attach(owner.descriptor())
+        try:
+            for (section, _), expected, shared in zip(binary.PROVING_KEY_SECTIONS, proving_key, attached.proving_key()):
+                if binary.is_list_section(section):
+                    assert len(shared) == len(expected)
+                    assert all(eq(point, expected_point) for point, expected_point in zip(shared, expected))
+                    assert all(eq(point, expected_point) for point, expected_point in zip(shared[-2:], expected[-2:]))
+                else:
+                    assert eq(shared, expected)
+        finally:
+            attached.close()
+        # a worker closing its view does not remove the block
+        assert os.path.exists('/dev/shm/' + name)
+    finally:
+        owner.close()
+    assert not os.path.exists('/dev/shm/' + name)
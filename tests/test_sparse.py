@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from r1cs import r1cs, sparse
+
+
+def write_example(directory, rows):
+    # one multiplication constraint per row: w[1] * w[1] = w[2] with the coefficient of row in O
+    matrices = {'L': [[0, 1, 0] for _ in rows], 'R': [[0, 1, 0] for _ in rows], 'O': [[0, 0, value] for value in rows]}
+    with open(os.path.join(directory, 'r1cs.json'), 'w') as f:
+        json.dump(matrices, f)
+
+
+def test_stale_sparse_file_is_converted_again(tmp_path):
+    example_path = str(tmp_path) + '/'
+    write_example(example_path, [1])
+    r1cs.convert_example_to_sparse(example_path=example_path)
+    assert sparse.load_sparse_header(example_path + 'r1cs.jsonl') == (1, 3)
+
+    write_example(example_path, [1, 2])
+    assert r1cs.sparse_r1cs_path(example_path) == example_path + 'r1cs.jsonl'
+    assert sparse.load_sparse_header(example_path + 'r1cs.jsonl') == (2, 3)
+    assert sparse.load_sparse_source_digest(example_path + 'r1cs.jsonl') == r1cs.file_digest(example_path + 'r1cs.json')
+
+
+def test_sparse_file_without_digest_older_than_json_fails(tmp_path):
+    example_path = str(tmp_path) + '/'
+    write_example(example_path, [1])
+    sparse.save_sparse_r1cs(r1cs.load_dense_r1cs(example_path + 'r1cs.json'), example_path + 'r1cs.jsonl')
+    os.utime(example_path + 'r1cs.jsonl', (0, 0))
+    with pytest.raises(AssertionError):
+        r1cs.sparse_r1cs_path(example_path)
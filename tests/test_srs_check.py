@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from keys import keys
+from prover import prover
+from prover.prover import Prover
+from trusted_setup.trusted_setup import TrustedSetup
+
+
+@pytest.fixture
+def example(example1):
+    TrustedSetup(example_path=example1, seed=4).generate_srs()
+    prover.checked_proving_keys.clear()
+    yield example1
+    prover.checked_proving_keys.clear()
+
+
+@pytest.mark.parametrize('section, index', [('srs1', 3), ('srs2', 5)])
+def test_corrupted_srs_point_is_rejected(example, section, index):
+    with open(example + 'proving_key.json', 'r') as f:
+        proving_key = json.load(f)
+    # a valid point of the curve, but not the right power of tau
+    proving_key[section][index] = proving_key[section][index - 1]
+    with open(example + 'proving_key.json', 'w') as f:
+        json.dump(proving_key, f)
+    with pytest.raises(AssertionError, match='SRS'):
+        Prover(example_path=example).generate_proof()
+
+
+def test_srs_check_runs_once_per_key_file(example, monkeypatch):
+    checks = []
+    check = Prover.sanity_check_srs_G1
+
+    def counted_check(self, srs, encrypted_tau):
+        checks.append(srs)
+        return check(self, srs, encrypted_tau)
+    monkeypatch.setattr(Prover, 'sanity_check_srs_G1', counted_check)
+    key_path = example + 'proving_key.json'
+
+    Prover(example_path=example).generate_proof()
+    assert len(checks) == 1
+    assert keys.has_srs_check_stamp(key_path, keys.key_file_digest(key_path))
+    # the digest is remembered by the process
+    Prover(example_path=example).generate_proof()
+    assert len(checks) == 1
+    # and by the stamp next to the key, for the next processes
+    prover.checked_proving_keys.clear()
+    Prover(example_path=example).generate_proof()
+    assert len(checks) == 1
+
+    # a new key file is checked again
+    TrustedSetup(example_path=example, seed=5).generate_srs()
+    Prover(example_path=example).generate_proof()
+    assert len(checks) == 2
+    assert keys.has_srs_check_stamp(key_path, keys.key_file_digest(key_path))
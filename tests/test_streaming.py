@@ -0,0 +1,29 @@
+from group.group import eq
+from prover import streaming
+from prover.prover import Prover
+from prover.streaming import StreamingProver
+from r1cs import r1cs
+from trusted_setup.trusted_setup import TrustedSetup
+
+
+def test_streaming_proof_equals_in_memory_proof(example1, monkeypatch):
+    TrustedSetup(example_path=example1, key_format='binary', seed=7).generate_srs()
+    r1cs.convert_example_to_sparse(example_path=example1)
+    expected = Prover(example_path=example1, key_format='binary', seed=11).generate_proof()
+    with open(example1 + 'proof.bin', 'rb') as f:
+        expected_bytes = f.read()
+
+    # chunks of 2 points, so that every section is split in several MSMs
+    monkeypatch.setattr(streaming, 'MIN_CHUNK_SIZE', 2)
+    # just above what the NTT vectors of the 8 point domain need, the points get the minimum chunk
+    budget = 1 + streaming.NTT_VECTORS * 8 * streaming.object_size(streaming.curve_order - 1)
+    prover = StreamingProver(example_path=example1, seed=11, memory_budget=budget)
+    assert all(eq(point, expected_point) for point, expected_point in zip(prover.generate_proof(), expected))
+    with open(example1 + 'proof.bin', 'rb') as f:
+        assert f.read() == expected_bytes
+    assert set(prover.chunk_sizes.values()) == {2}
+
+
+def test_empty_section():
+    prover = StreamingProver(example_path='./unused/')
+    assert prover.section_msm([], []) is None
@@ -0,0 +1,128 @@
+'''
+In this module we define the fixed-base scalar multiplication engine used by the trusted setup.
+
+Every point of the setup is a multiple of G1 or G2, so instead of chaining scalar multiplications
+(srs[i+1] = tau * srs[i]) we compute all the scalars in the field first, then multiply the generator by each of them.
+With a fixed base we can precompute, for a window of c bits, the table:
+    table[k][d] = d * 2^(c*k) * base     for every window k and every digit d < 2^c
+and then scalar * base is just the sum of one table entry per window: no doublings, and about 254 / c additions.
+
+The table is built once, and the scalars are spread over a pool of worker processes.
+py_ecc points can't be pickled (FQ2 builds classes on the fly), so points travel between processes as integers (group.to_ints),
+and the workers use the same group backend as the parent process.
+Workers are spawned rather than forked: galois/numba start native threads that do not survive a fork,
+so this module only imports what a fresh worker needs.
+'''
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from py_ecc.bn128.bn128_curve import curve_order
+from group import group
+from group.group import add
+from profiling import profiling
+
+SCALAR_BITS = curve_order.bit_length()
+
+# below this number of scalars, starting the worker processes costs more than it saves
+MIN_PARALLEL_SCALARS = 64
+
+GENERATORS = {1: group.generator_G1, 2: group.generator_G2}
+
+
+def points_to_ints(points):
+    return [group.to_ints(point) for point in points]
+
+def points_from_ints(points):
+    return [group.from_ints(point) for point in points]
+
+
+def split_points(points, sections):
+    # the points of a batch made of several lists of scalars, cut back into one list per section
+    split = []
+    start = 0
+    for section in sections:
+        split.append(points[start:start + len(section)])
+        start += len(section)
+    return split
+
+
+def choose_window(scalars_nb):
+    # the table costs about 2^c * 254/c additions, the multiplications about scalars_nb * 254/c, we take the cheapest c
+    return min(range(2, 11), key=lambda c: ((1 << c) + scalars_nb) * -(-SCALAR_BITS // c))
+
+
+def build_table(base, window):
+    table = []
+    window_base = base
+    for _ in range(0, SCALAR_BITS, window):
+        row = [None]
+        for _ in range(1, 1 << window):
+            row.append(add(row[-1], window_base))
+        table.append(row)
+        # the base of the next window is 2^c times the base of this one
+        window_base = add(row[-1], window_base)
+    return table
+
+
+def table_multiply(table, window, scalar):
+    scalar = int(scalar) % curve_order
+    mask = (1 << window) - 1
+    result = None
+    k = 0
+    while scalar > 0:
+        digit = scalar & mask
+        if digit != 0:
+            result = add(result, table[k][digit])
+        scalar >>= window
+        k += 1
+    return result
+
+
+# state of a worker process, set once by the pool initializer
+worker_table = None
+worker_window = None
+
+def init_worker(backend_name, window, serialized_table):
+    global worker_table, worker_window
+    group.set_backend(backend_name)
+    worker_window = window
+    worker_table = [points_from_ints(row) for row in serialized_table]
+
+def multiply_chunk(scalars):
+    return points_to_ints([table_multiply(worker_table, worker_window, scalar) for scalar in scalars])
+
+
+class FixedBaseEngine:
+    def __init__(self, workers=None):
+        # workers=1 keeps everything in the current process
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        assert self.workers >= 1, "The fixed-base engine needs at least one worker"
+
+    def multiply_G1(self, scalars):
+        return self.batch_multiply(1, scalars)
+
+    def multiply_G2(self, scalars):
+        return self.batch_multiply(2, scalars)
+
+    def batch_multiply(self, group_id, scalars):
+        # returns [scalar * generator for scalar in scalars], in order, the result does not depend on the number of workers
+        if len(scalars) == 0:
+            return []
+        profiling.count('fixed-base multiplications', len(scalars))
+        window = choose_window(len(scalars))
+        table = build_table(GENERATORS[group_id](), window)
+
+        if self.workers == 1 or len(scalars) < MIN_PARALLEL_SCALARS:
+            return [table_multiply(table, window, scalar) for scalar in scalars]
+
+        chunk_size = -(-len(scalars) // (self.workers * 4))
+        chunks = [[int(scalar) for scalar in scalars[i:i + chunk_size]] for i in range(0, len(scalars), chunk_size)]
+        serialized_table = [points_to_ints(row) for row in table]
+
+        points = []
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_worker, initargs=(group.get_backend_name(), window, serialized_table)) as pool:
+            for serialized_points in pool.map(multiply_chunk, chunks):
+                points.extend(points_from_ints(serialized_points))
+        return points
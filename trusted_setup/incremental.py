@@ -0,0 +1,125 @@
+'''
+In this module we define the development mode of the setup: re-running the setup of a circuit that only changed a little.
+
+A normal setup forgets its toxic waste (tau, alpha, beta, delta, gamma). In development mode it is kept, next to the keys,
+in a dev state file along with a digest of every column of the R1CS (the entries of the variable in L, R and O).
+The next setup of the same example loads the previous keys and the dev state, diffs the columns of the new R1CS against
+the old ones and only recomputes the points that changed:
+    * u_query_G1[i], v_query_G1[i], v_query_G2[i] and psi[i] only depend on the column i and on the domain,
+      so they are reused when the column is unchanged and the domain has the same size
+      (psi[i] also when i is still on the same side of the public inputs boundary, which picks gamma or delta),
+    * srs1 and srs2 are the powers of tau, only the powers past the previous domain size are computed,
+    * srs3 holds t(tau) = tau^n - 1, it is reused when the domain has the same size and recomputed otherwise.
+The keys are the same as the ones of a full setup with the same toxic waste.
+
+Keeping the toxic waste breaks the security of the keys: this mode is for iterating on a circuit, never for real keys.
+'''
+
+import hashlib
+import json
+import os
+
+from keys import keys
+from profiling.profiling import get_logger
+
+logger = get_logger('trusted_setup')
+
+DEV_STATE_FORMAT = 'groth16-dev-setup'
+DEV_STATE_FILE = 'dev_setup.json'
+
+
+def column_digests(r1cs):
+    # one digest per variable, of its (row, value) entries in L, R and O
+    columns = [([], [], []) for _ in range(r1cs.variables_nb)]
+    for index, matrix in enumerate(r1cs.matrices()):
+        for j in range(matrix.rows_nb):
+            for column, value in matrix.row(j):
+                columns[column][index].append((j, value))
+    return [hashlib.sha256(json.dumps(column).encode()).hexdigest()[:32] for column in columns]
+
+
+def key_paths(example_path, key_format):
+    extension = keys.get_key_format(key_format)['extension']
+    return example_path + 'proving_key' + extension, example_path + 'verifying_key' + extension
+
+
+def save_dev_state(example_path, key_format, toxic_waste, r1cs, domain_size, num_public_inputs):
+    proving_key_path, verifying_key_path = key_paths(example_path, key_format)
+    tau, alpha, beta, delta, gamma = toxic_waste
+    state = {
+        'format': DEV_STATE_FORMAT,
+        'warning': 'toxic waste of the setup, development only: the keys next to this file are not secure',
+        'toxic_waste': {'tau': tau, 'alpha': alpha, 'beta': beta, 'delta': delta, 'gamma': gamma},
+        'key_format': key_format,
+        # the keys the toxic waste belongs to, a setup without the dev mode replaces them and invalidates the state
+        'proving_key_digest': keys.key_file_digest(proving_key_path),
+        'verifying_key_digest': keys.key_file_digest(verifying_key_path),
+        'constraints_nb': r1cs.constraints_nb,
+        'domain_size': domain_size,
+        'num_public_inputs': num_public_inputs,
+        'columns': column_digests(r1cs),
+    }
+    path = example_path + DEV_STATE_FILE
+    logger.info("Opening file to save dev setup state: %s", path)
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=4)
+    logger.warning("Dev mode: the toxic waste of the setup is kept in %s, never use these keys outside development", path)
+    return path
+
+
+def load_dev_state(example_path, key_format):
+    # the state of the previous dev setup, or None when the previous keys cannot be reused
+    path = example_path + DEV_STATE_FILE
+    if not os.path.exists(path):
+        return None
+    logger.info("Opening file to load dev setup state: %s", path)
+    with open(path, 'r') as f:
+        state = json.load(f)
+    assert state.get('format') == DEV_STATE_FORMAT, f"{path} is not a dev setup state file"
+
+    proving_key_path, verifying_key_path = key_paths(example_path, key_format)
+    if state['key_format'] != key_format:
+        logger.info("Dev setup state is for %s keys, running a full setup", state['key_format'])
+        return None
+    if not (os.path.exists(proving_key_path) and os.path.exists(verifying_key_path)):
+        logger.info("Previous keys not found, running a full setup")
+        return None
+    if keys.key_file_digest(proving_key_path) != state['proving_key_digest'] or keys.key_file_digest(verifying_key_path) != state['verifying_key_digest']:
+        logger.info("The keys changed since the last dev setup, running a full setup")
+        return None
+    return state
+
+
+def plan_incremental_setup(state, digests, domain_size, num_public_inputs):
+    # which points of the previous keys are still valid for the new circuit
+    previous_digests = state['columns']
+    same_domain = state['domain_size'] == domain_size
+    reuse_queries = [same_domain and i < len(previous_digests) and previous_digests[i] == digest for i, digest in enumerate(digests)]
+    reuse_psi = [reuse and (i < num_public_inputs) == (i < state['num_public_inputs']) for i, reuse in enumerate(reuse_queries)]
+    return {
+        'same_domain': same_domain,
+        'changed_columns': [i for i in range(min(len(digests), len(previous_digests))) if previous_digests[i] != digests[i]],
+        'added_columns': max(len(digests) - len(previous_digests), 0),
+        'removed_columns': max(len(previous_digests) - len(digests), 0),
+        'reuse_queries': reuse_queries,
+        'reuse_psi': reuse_psi,
+        # srs1 and srs2 hold tau^i for i < domain size, the first powers are the same whatever the domain
+        'reused_powers': min(state['domain_size'], domain_size),
+        'reuse_srs3': same_domain,
+    }
+
+
+def merge_points(previous, reuse, recomputed):
+    # previous[i] where reuse[i], else the next recomputed point
+    recomputed = iter(recomputed)
+    return [previous[i] if keep else next(recomputed) for i, keep in enumerate(reuse)]
+
+
+def log_report(report):
+    logger.info(
+        "Incremental setup: %d changed, %d added, %d removed columns (domain %s), %d of %d points recomputed, "
+        "%d G1 and %d G2 multiplications saved (%.1f%% of the work)",
+        report['changed_columns'], report['added_columns'], report['removed_columns'],
+        'unchanged' if report['same_domain'] else 'resized',
+        report['recomputed_points'], report['total_points'], report['saved_G1'], report['saved_G2'], 100 * report['saved_fraction'],
+    )
@@ -0,0 +1,132 @@
+'''
+In this module we define the universal part of the setup: a powers of tau file, built once and reused by every circuit.
+
+Phase 1 (generate_powers_of_tau) only depends on a maximum domain size N = 2^max_log_size. It draws tau, alpha and beta,
+writes the points below and forgets the scalars:
+    tau_G1:        [tau^i]_1          for i < 2N - 1   (srs1, and srs3 since t(tau) tau^i = tau^(i+n) - tau^i)
+    tau_G2:        [tau^i]_2          for i < N        (srs2)
+    alpha_G1, beta_G1, beta_G2
+    for every domain size n = 2^k <= N, the Lagrange basis of the domain at tau:
+    lag_G1_k:      [l_j(tau)]_1       lag_alpha_k:  [alpha l_j(tau)]_1
+    lag_beta_k:    [beta l_j(tau)]_1  lag_G2_k:     [l_j(tau)]_2
+A circuit with a domain of size n only reads the first points of tau_G1 / tau_G2 and the Lagrange sections of size n.
+
+Phase 2 (TrustedSetup with a powers of tau file) draws gamma and delta for the circuit and derives its keys without tau:
+the column polynomials are u_i(x) = sum_j L[j][i] l_j(x), so [u_i(tau)]_1 = sum_j L[j][i] [l_j(tau)]_1 is a sparse
+combination of the Lagrange points (same for v, w and the alpha / beta shifted versions that psi needs).
+
+The file is a binary container (see keys/binary.py) of kind KIND_POWERS_OF_TAU, its sections are read lazily.
+'''
+
+import random
+from py_ecc.bn128.bn128_curve import curve_order
+
+from group.group import add, multiply, neg
+from keys import binary
+from utils import utils
+from domain.domain import EvaluationDomain, TWO_ADICITY
+from trusted_setup.fixed_base import FixedBaseEngine, split_points
+from profiling import profiling
+from profiling.profiling import get_logger
+
+logger = get_logger('trusted_setup')
+
+DEFAULT_POWERS_OF_TAU_PATH = './powers_of_tau.bin'
+
+
+def lagrange_section_names(log_size):
+    return f'lag_G1_{log_size}', f'lag_alpha_{log_size}', f'lag_beta_{log_size}', f'lag_G2_{log_size}'
+
+def powers_of_tau_layout(max_log_size):
+    layout = [('tau_G1', 1), ('tau_G2', 2), ('alpha_G1', 1), ('beta_G1', 1), ('beta_G2', 2)]
+    for log_size in range(max_log_size + 1):
+        lagrange_G1, lagrange_alpha, lagrange_beta, lagrange_G2 = lagrange_section_names(log_size)
+        layout += [(lagrange_G1, 1), (lagrange_alpha, 1), (lagrange_beta, 1), (lagrange_G2, 2)]
+    return layout
+
+
+def generate_powers_of_tau(max_log_size, path=DEFAULT_POWERS_OF_TAU_PATH, seed=None, workers=None):
+    assert 1 <= max_log_size <= TWO_ADICITY, f"The maximum log size must be between 1 and {TWO_ADICITY}"
+    generator = random.Random(seed)
+    tau = generator.randint(1, curve_order - 1)
+    alpha = generator.randint(1, curve_order - 1)
+    beta = generator.randint(1, curve_order - 1)
+    max_size = 1 << max_log_size
+
+    with profiling.phase('scalars'):
+        powers = [1]
+        for _ in range(2 * max_size - 2):
+            powers.append(powers[-1] * tau % curve_order)
+
+        G1_sections = [powers, [alpha], [beta]]
+        G2_sections = [powers[:max_size], [beta]]
+        for log_size in range(max_log_size + 1):
+            lagrange = EvaluationDomain(1 << log_size).lagrange_basis_at(tau)
+            G1_sections += [lagrange, [alpha * l % curve_order for l in lagrange], [beta * l % curve_order for l in lagrange]]
+            G2_sections.append(lagrange)
+
+    # as in the circuit setup, all the G1 points then all the G2 points are produced by one fixed-base batch each
+    engine = FixedBaseEngine(workers=workers)
+    with profiling.phase('G1 points'):
+        G1_points = split_points(engine.multiply_G1(sum(G1_sections, [])), G1_sections)
+    with profiling.phase('G2 points'):
+        G2_points = split_points(engine.multiply_G2(sum(G2_sections, [])), G2_sections)
+
+    with profiling.phase('save'):
+        serialized_sections = {
+            'tau_G1': utils.serialize_points_G1(G1_points[0]),
+            'tau_G2': utils.serialize_points_G2(G2_points[0]),
+            'alpha_G1': utils.serialize_points_G1(G1_points[1]),
+            'beta_G1': utils.serialize_points_G1(G1_points[2]),
+            'beta_G2': utils.serialize_points_G2(G2_points[1]),
+        }
+        for log_size in range(max_log_size + 1):
+            lagrange_G1, lagrange_alpha, lagrange_beta, lagrange_G2 = lagrange_section_names(log_size)
+            serialized_sections[lagrange_G1] = utils.serialize_points_G1(G1_points[3 + 3 * log_size])
+            serialized_sections[lagrange_alpha] = utils.serialize_points_G1(G1_points[4 + 3 * log_size])
+            serialized_sections[lagrange_beta] = utils.serialize_points_G1(G1_points[5 + 3 * log_size])
+            serialized_sections[lagrange_G2] = utils.serialize_points_G2(G2_points[2 + log_size])
+        logger.info("Opening file to save powers of tau: %s", path)
+        binary.write_container(binary.KIND_POWERS_OF_TAU, serialized_sections, path, layout=powers_of_tau_layout(max_log_size))
+    return path
+
+
+class PowersOfTau:
+    def __init__(self, path=DEFAULT_POWERS_OF_TAU_PATH):
+        logger.info("Opening file to load powers of tau: %s", path)
+        self.container = binary.BinaryContainer(path)
+        assert self.container.kind == binary.KIND_POWERS_OF_TAU, f"{path} is not a powers of tau file"
+        self.max_log_size = len(self.container.section('tau_G2')).bit_length() - 1
+
+    def tau_powers_G1(self):
+        return self.container.section('tau_G1')
+
+    def tau_powers_G2(self):
+        return self.container.section('tau_G2')
+
+    def alpha_beta(self):
+        return self.container.point('alpha_G1'), self.container.point('beta_G1'), self.container.point('beta_G2')
+
+    def lagrange_points(self, log_size):
+        # [l_j(tau)]_1, [alpha l_j(tau)]_1, [beta l_j(tau)]_1, [l_j(tau)]_2 for the domain of size 2^log_size, decompressed
+        assert log_size <= self.max_log_size, f"The powers of tau only go up to domains of size 2^{self.max_log_size}, the circuit needs 2^{log_size}"
+        return tuple(list(self.container.section(name)) for name in lagrange_section_names(log_size))
+
+    def close(self):
+        self.container.close()
+
+
+def signed_multiply(point, scalar):
+    # R1CS coefficients are mostly small, possibly negative: -1 is curve_order - 1, a full size scalar, but neg(1 * P) is free
+    scalar = int(scalar) % curve_order
+    if scalar > curve_order // 2:
+        return neg(multiply(point, curve_order - scalar))
+    return multiply(point, scalar)
+
+def combine_columns(matrix, points):
+    # [sum_j M[j][i] p_j for every column i]: the points counterpart of SparseMatrix.transpose_dot
+    columns = [None] * matrix.columns_nb
+    for j in range(matrix.rows_nb):
+        for column, value in matrix.row(j):
+            columns[column] = add(columns[column], signed_multiply(points[j], value))
+    return columns
@@ -1,127 +1,254 @@
-from galois import GF
-from r1cs.r1cs import load_matrices_from_json
+from r1cs.r1cs import load_r1cs
 import random
-from py_ecc.bn128.bn128_curve import G1, G2, multiply, curve_order, add, neg
+from py_ecc.bn128.bn128_curve import curve_order
+from group.group import multiply, add, neg
 from keys import keys
-from utils import utils
 from witness import witness
+from domain.domain import EvaluationDomain
+from trusted_setup.fixed_base import FixedBaseEngine, split_points
+from trusted_setup.powers_of_tau import PowersOfTau, combine_columns
+from trusted_setup import incremental
+from profiling import profiling
 
 class TrustedSetup:
 
-    def __init__(self, example_path='./examples/example1/'):
+    def __init__(self, example_path='./examples/example1/', key_format='json', seed=None, workers=None, powers_of_tau_path=None, dev_mode=False):
+        assert not (dev_mode and powers_of_tau_path is not None), "The dev mode keeps the toxic waste of a full setup, it cannot be used with a powers of tau file"
         self.example_path = example_path
-
-    def get_constraints_number(self, L):
-        num_constraints = len(L)
-        num_variables = len(L[0])
-        return num_constraints, num_variables
-    
-
-
-    def power_of_tau_G1(self, constraints_nb, tau):
-        powers_of_tau_G1 = [multiply(G1, 1)] 
-        degree = constraints_nb -1
-        for i in range(0, degree):
-            powers_of_tau_G1.append(multiply(powers_of_tau_G1[i], tau))
-        return powers_of_tau_G1
+        self.key_format = key_format
+        # path of a phase 1 file (see trusted_setup/powers_of_tau.py), the keys are then derived from it instead of a fresh tau
+        self.powers_of_tau_path = powers_of_tau_path
+        # development only: keep the toxic waste and re-run the setup incrementally when the circuit changes (see trusted_setup/incremental.py)
+        self.dev_mode = dev_mode
+        self.incremental_report = None
+        # a fixed seed gives the same toxic waste, hence bit identical keys whatever the number of workers
+        self.random = random.Random(seed)
+        self.engine = FixedBaseEngine(workers=workers)
+
+    def get_constraints_number(self, r1cs):
+        return r1cs.constraints_nb, r1cs.variables_nb
     
-    def power_of_tau_G2(self, constraints_nb, tau):
-        powers_of_tau_G2 = [multiply(G2, 1)]
-        degree = constraints_nb -1 
-        for i in range(0, degree):
-            powers_of_tau_G2.append(multiply(powers_of_tau_G2[i], tau))
-        return powers_of_tau_G2
-
-    def calculate_t_at_tau_G1(self, tau, constraints_nb,):
-        # t(x) = (x-1)(x-2)...(x - constraints_nb)
-        t_at_tau = 1
-        for i in range(1, constraints_nb + 1):
-            t_at_tau = (t_at_tau * (tau - i)) % curve_order
-        t_at_tau_G1 = multiply(G1, t_at_tau)
-        
-        return t_at_tau_G1
-
-
-
-    def power_of_tau_G1_with_t(self, constraints_nb, tau, delta):
-        degree = constraints_nb - 2
-        t_at_tau_G1 = self.calculate_t_at_tau_G1(tau, constraints_nb)
-        t_at_tau_G1 = multiply(t_at_tau_G1, pow(delta, -1, curve_order))
-        powers_of_tau_G1_with_t = [t_at_tau_G1] 
-        for i in range(0, degree):
-            powers_of_tau_G1_with_t.append(multiply(powers_of_tau_G1_with_t[i], tau))
-        return powers_of_tau_G1_with_t
-
-    def calculate_psi_values(self,  L, R, O,tau, num_polynomials, alpha, beta, num_public_inputs, delta, gamma):
-
-        galois_field = GF(curve_order)
-
-        # Generate the polynomials of the matrices using Lagrange interpolation
-        L_transposed = list(zip(*L))
-        R_transposed = list(zip(*R))
-        O_transposed = list(zip(*O))
-        
-        # Convert tau, alpha, beta to field elements so all ops remain in GF
-        tau_field = galois_field(tau)
-        alpha_field = galois_field(alpha)
-        beta_field  = galois_field(beta)
-
-        L_polys = [utils.lagrange_poly_vector(col, galois_field=galois_field) for col in L_transposed]
-        R_polys = [utils.lagrange_poly_vector(col, galois_field=galois_field) for col in R_transposed]
-        O_polys = [utils.lagrange_poly_vector(col, galois_field=galois_field) for col in O_transposed]
-
-        psi_values = []
-        for i in range(num_polynomials):
-            alpha_v_i_tau = alpha_field * R_polys[i](tau_field)
-            beta_u_i_tau = beta_field * L_polys[i](tau_field)
-            psi_i = multiply(G1, int(alpha_v_i_tau + beta_u_i_tau + O_polys[i](tau_field)))
+    def generate_toxic_waste(self):
+        tau = self.random.randint(1, curve_order - 1)
+        alpha = self.random.randint(1, curve_order - 1)
+        beta = self.random.randint(1, curve_order - 1)
+        delta = self.random.randint(1, curve_order - 1)
+        gamma = self.random.randint(1, curve_order - 1)
+        return tau, alpha, beta, delta, gamma
+
+    # the scalars of the SRS are computed in the field, the points are then all produced by the fixed-base engine
+    def powers_of_tau(self, constraints_nb, tau):
+        powers = [1]
+        for _ in range(0, constraints_nb - 1):
+            powers.append(powers[-1] * tau % curve_order)
+        return powers
+
+    def powers_of_tau_with_t(self, constraints_nb, tau, delta):
+        # tau^i * t(tau) / delta for i = 0 .. n-2 (at least one element)
+        t_at_tau = EvaluationDomain(constraints_nb).vanishing_poly_at(tau)
+        first = t_at_tau * pow(delta, -1, curve_order) % curve_order
+        return [first * power % curve_order for power in self.powers_of_tau(max(constraints_nb - 1, 1), tau)]
+
+    def evaluate_matrix_columns_at_tau(self, matrix, lagrange_at_tau):
+        # column i of the matrix is interpolated by u_i(x) = sum_j M[j][i] l_j(x), so u_i(tau) only needs the l_j(tau)
+        # the domain can be larger than the number of constraints, the padding rows are all zeros
+        return matrix.transpose_dot(lagrange_at_tau[:matrix.rows_nb])
+
+    def evaluate_qap_polys_at_tau(self, L, R, O, tau, constraints_nb):
+        lagrange_at_tau = EvaluationDomain(constraints_nb).lagrange_basis_at(tau)
+        u_at_tau = self.evaluate_matrix_columns_at_tau(L, lagrange_at_tau)
+        v_at_tau = self.evaluate_matrix_columns_at_tau(R, lagrange_at_tau)
+        w_at_tau = self.evaluate_matrix_columns_at_tau(O, lagrange_at_tau)
+        return u_at_tau, v_at_tau, w_at_tau
+
+    def calculate_psi_scalars(self, u_at_tau, v_at_tau, w_at_tau, alpha, beta, num_public_inputs, delta, gamma):
+        gamma_inv = pow(gamma, -1, curve_order)
+        delta_inv = pow(delta, -1, curve_order)
+
+        psi_scalars = []
+        for i in range(len(u_at_tau)):
+            psi_i_scalar = (alpha * v_at_tau[i] + beta * u_at_tau[i] + w_at_tau[i]) % curve_order
             if i < num_public_inputs:
-                psi_i = multiply(psi_i, pow(gamma, -1, curve_order))
+                psi_scalars.append(psi_i_scalar * gamma_inv % curve_order)
             else:
-                psi_i = multiply(psi_i, pow(delta, -1, curve_order))
-            psi_values.append(psi_i)
-
-        return psi_values
-
-
+                psi_scalars.append(psi_i_scalar * delta_inv % curve_order)
+        return psi_scalars
 
 
-    def generate_srs(self):
-        L, R, O = load_matrices_from_json(json_path=self.example_path + 'r1cs.json', galois_field=GF(curve_order))
-        constraints_nb, num_variables = self.get_constraints_number(L)
-        num_public_inputs = witness.public_inputs_length(
-            json_path=self.example_path + 'public_witness.json'
-        )
-
-        tau = random.randint(1, curve_order )
-        tau_G1 = multiply(G1, tau)
-        tau_G2 = multiply(G2, tau)
-        alpha = random.randint(1, curve_order )
-        beta = random.randint(1, curve_order )
-        delta = random.randint(1, curve_order )
-        gamma = random.randint(1, curve_order )
-
-        srs1 = self.power_of_tau_G1(constraints_nb, tau)
-        srs2 = self.power_of_tau_G2(constraints_nb, tau)
-        srs3 = self.power_of_tau_G1_with_t(constraints_nb, tau, delta)
-        
-        psi = self.calculate_psi_values(L, R, O, tau, num_variables, alpha, beta, num_public_inputs, delta, gamma)
-
+    def save_keys(self, srs1, srs2, srs3, psi, num_public_inputs, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, gamma_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2):
         # take only the first num_public_inputs values of psi for verifying key
         verifying_psi = psi[:num_public_inputs ]
         proving_psi = psi[num_public_inputs:]
 
-        alpha_G1 = multiply(G1, alpha)
-        beta_G1 = multiply(G1, beta)
-        beta_G2 = multiply(G2, beta)
-        delta_G1 = multiply(G1, delta)
-        delta_G2 = multiply(G2, delta)
-        gamma_G2 = multiply(G2, gamma)
-
-        keys.save_prooving_key_to_json(srs1, srs2, srs3, proving_psi, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, json_path = self.example_path + 'proving_key.json')
-        keys.save_verifying_key_to_json( alpha_G1, beta_G2, delta_G2, gamma_G2, verifying_psi, json_path = self.example_path + 'verifying_key.json')
-
-        return srs1, srs2, srs3, psi
-
-    
+        key_format = keys.get_key_format(self.key_format)
+        key_format['save_proving_key'](srs1, srs2, srs3, proving_psi, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2, self.example_path + 'proving_key' + key_format['extension'])
+        key_format['save_verifying_key']( alpha_G1, beta_G2, delta_G2, gamma_G2, verifying_psi, self.example_path + 'verifying_key' + key_format['extension'])
+
+    def generate_srs_from_powers_of_tau(self):
+        # phase 2: tau, alpha and beta come from the powers of tau file, only gamma and delta are drawn for this circuit
+        with profiling.phase('setup'):
+            with profiling.phase('load r1cs'):
+                r1cs = load_r1cs(example_path=self.example_path)
+            L, R, O = r1cs.matrices()
+            domain = EvaluationDomain(r1cs.constraints_nb)
+            n = domain.size
+            num_public_inputs = witness.public_inputs_length(
+                json_path=self.example_path + 'public_witness.json'
+            )
+            powers_of_tau = PowersOfTau(self.powers_of_tau_path)
+
+            delta = self.random.randint(1, curve_order - 1)
+            gamma = self.random.randint(1, curve_order - 1)
+            delta_inv = pow(delta, -1, curve_order)
+            gamma_inv = pow(gamma, -1, curve_order)
+
+            with profiling.phase('lagrange points'):
+                lagrange_G1, lagrange_alpha_G1, lagrange_beta_G1, lagrange_G2 = powers_of_tau.lagrange_points(domain.log_size)
+
+            with profiling.phase('queries'):
+                u_query_G1 = combine_columns(L, lagrange_G1)
+                v_query_G1 = combine_columns(R, lagrange_G1)
+                v_query_G2 = combine_columns(R, lagrange_G2)
+
+            with profiling.phase('psi'):
+                # [beta u_i(tau) + alpha v_i(tau) + w_i(tau)]_1, divided by gamma for the public inputs and by delta for the rest
+                beta_u = combine_columns(L, lagrange_beta_G1)
+                alpha_v = combine_columns(R, lagrange_alpha_G1)
+                w = combine_columns(O, lagrange_G1)
+                psi = [multiply(add(add(beta_u[i], alpha_v[i]), w[i]), gamma_inv if i < num_public_inputs else delta_inv) for i in range(r1cs.variables_nb)]
+
+            with profiling.phase('h query'):
+                # [tau^i t(tau) / delta]_1 = ([tau^(i+n)]_1 - [tau^i]_1) / delta, for i = 0 .. n-2 (at least one element)
+                tau_powers_G1 = powers_of_tau.tau_powers_G1()
+                srs1 = tau_powers_G1[:n]
+                high_powers = tau_powers_G1[n:n + max(n - 1, 1)]
+                srs3 = [multiply(add(high_power, neg(low_power)), delta_inv) for high_power, low_power in zip(high_powers, tau_powers_G1[:len(high_powers)])]
+
+            srs2 = powers_of_tau.tau_powers_G2()[:n]
+            tau_G1 = powers_of_tau.tau_powers_G1()[1]
+            tau_G2 = powers_of_tau.tau_powers_G2()[1]
+            alpha_G1, beta_G1, beta_G2 = powers_of_tau.alpha_beta()
+            # every point needed is decoded by now
+            powers_of_tau.close()
+            delta_G1, = self.engine.multiply_G1([delta])
+            delta_G2, gamma_G2 = self.engine.multiply_G2([delta, gamma])
+
+            with profiling.phase('save keys'):
+                self.save_keys(srs1, srs2, srs3, psi, num_public_inputs, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, gamma_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2)
+
+            return srs1, srs2, srs3, psi
+
+    def generate_srs_incremental(self, state):
+        # dev mode: the toxic waste of the previous setup is reused and only the points of the changed columns are computed
+        with profiling.phase('setup'):
+            with profiling.phase('load r1cs'):
+                r1cs = load_r1cs(example_path=self.example_path)
+            L, R, O = r1cs.matrices()
+            constraints_nb, num_variables = self.get_constraints_number(r1cs)
+            domain_size = EvaluationDomain(constraints_nb).size
+            num_public_inputs = witness.public_inputs_length(
+                json_path=self.example_path + 'public_witness.json'
+            )
+            toxic_waste = state['toxic_waste']
+            tau, alpha, beta, delta, gamma = (toxic_waste[name] for name in ('tau', 'alpha', 'beta', 'delta', 'gamma'))
+
+            with profiling.phase('load previous keys'):
+                key_format = keys.get_key_format(self.key_format)
+                proving_key_path, verifying_key_path = incremental.key_paths(self.example_path, self.key_format)
+                previous_srs1, previous_srs2, previous_srs3, previous_proving_psi, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, tau_G1, tau_G2, previous_u_query_G1, previous_v_query_G1, previous_v_query_G2 = key_format['load_proving_key'](proving_key_path)
+                _, _, _, gamma_G2, previous_verifying_psi = key_format['load_verifying_key'](verifying_key_path)
+                previous_psi = list(previous_verifying_psi) + list(previous_proving_psi)
+
+            with profiling.phase('diff r1cs'):
+                plan = incremental.plan_incremental_setup(state, incremental.column_digests(r1cs), domain_size, num_public_inputs)
+
+            with profiling.phase('qap at tau'):
+                u_at_tau, v_at_tau, w_at_tau = self.evaluate_qap_polys_at_tau(L, R, O, tau, constraints_nb)
+                new_powers = self.powers_of_tau(domain_size, tau)[plan['reused_powers']:]
+                srs3_scalars = [] if plan['reuse_srs3'] else self.powers_of_tau_with_t(domain_size, tau, delta)
+                psi_scalars = self.calculate_psi_scalars(u_at_tau, v_at_tau, w_at_tau, alpha, beta, num_public_inputs, delta, gamma)
+                psi_scalars = [scalar for scalar, reuse in zip(psi_scalars, plan['reuse_psi']) if not reuse]
+                u_at_tau = [value for value, reuse in zip(u_at_tau, plan['reuse_queries']) if not reuse]
+                v_at_tau = [value for value, reuse in zip(v_at_tau, plan['reuse_queries']) if not reuse]
+
+            G1_sections = [new_powers, srs3_scalars, psi_scalars, u_at_tau, v_at_tau]
+            G2_sections = [new_powers, v_at_tau]
+            with profiling.phase('G1 points'):
+                new_srs1, new_srs3, new_psi, new_u_query_G1, new_v_query_G1 = split_points(self.engine.multiply_G1(sum(G1_sections, [])), G1_sections)
+            with profiling.phase('G2 points'):
+                new_srs2, new_v_query_G2 = split_points(self.engine.multiply_G2(sum(G2_sections, [])), G2_sections)
+
+            # every reused point is read before the keys are overwritten (the binary keys are memory mapped)
+            srs1 = list(previous_srs1[:plan['reused_powers']]) + new_srs1
+            srs2 = list(previous_srs2[:plan['reused_powers']]) + new_srs2
+            srs3 = list(previous_srs3) if plan['reuse_srs3'] else new_srs3
+            psi = incremental.merge_points(previous_psi, plan['reuse_psi'], new_psi)
+            u_query_G1 = incremental.merge_points(previous_u_query_G1, plan['reuse_queries'], new_u_query_G1)
+            v_query_G1 = incremental.merge_points(previous_v_query_G1, plan['reuse_queries'], new_v_query_G1)
+            v_query_G2 = incremental.merge_points(previous_v_query_G2, plan['reuse_queries'], new_v_query_G2)
+
+            with profiling.phase('save keys'):
+                self.save_keys(srs1, srs2, srs3, psi, num_public_inputs, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, gamma_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2)
+                incremental.save_dev_state(self.example_path, self.key_format, (tau, alpha, beta, delta, gamma), r1cs, domain_size, num_public_inputs)
+
+            total_G1 = len(srs1) + len(srs3) + len(psi) + len(u_query_G1) + len(v_query_G1)
+            total_G2 = len(srs2) + len(v_query_G2)
+            recomputed_G1 = sum(len(section) for section in G1_sections)
+            recomputed_G2 = sum(len(section) for section in G2_sections)
+            self.incremental_report = {
+                'same_domain': plan['same_domain'],
+                'changed_columns': len(plan['changed_columns']),
+                'added_columns': plan['added_columns'],
+                'removed_columns': plan['removed_columns'],
+                'total_points': total_G1 + total_G2,
+                'recomputed_points': recomputed_G1 + recomputed_G2,
+                'saved_G1': total_G1 - recomputed_G1,
+                'saved_G2': total_G2 - recomputed_G2,
+                'saved_fraction': 1 - (recomputed_G1 + recomputed_G2) / (total_G1 + total_G2),
+            }
+            incremental.log_report(self.incremental_report)
+
+            return srs1, srs2, srs3, psi
 
+    def generate_srs(self):
+        if self.powers_of_tau_path is not None:
+            return self.generate_srs_from_powers_of_tau()
+        if self.dev_mode:
+            state = incremental.load_dev_state(self.example_path, self.key_format)
+            if state is not None:
+                return self.generate_srs_incremental(state)
+        with profiling.phase('setup'):
+            with profiling.phase('load r1cs'):
+                r1cs = load_r1cs(example_path=self.example_path)
+            L, R, O = r1cs.matrices()
+            constraints_nb, num_variables = self.get_constraints_number(r1cs)
+            # the QAP polynomials live on a power of two domain, so the SRS is sized after the domain, not the constraints
+            domain_size = EvaluationDomain(constraints_nb).size
+            num_public_inputs = witness.public_inputs_length(
+                json_path=self.example_path + 'public_witness.json'
+            )
+
+            tau, alpha, beta, delta, gamma = self.generate_toxic_waste()
+
+            with profiling.phase('qap at tau'):
+                # evaluations of every column polynomial at tau, used by the queries and by psi
+                u_at_tau, v_at_tau, w_at_tau = self.evaluate_qap_polys_at_tau(L, R, O, tau, constraints_nb)
+
+                srs1_scalars = self.powers_of_tau(domain_size, tau)
+                srs3_scalars = self.powers_of_tau_with_t(domain_size, tau, delta)
+                psi_scalars = self.calculate_psi_scalars(u_at_tau, v_at_tau, w_at_tau, alpha, beta, num_public_inputs, delta, gamma)
+
+            # all the G1 points, then all the G2 points, are produced by one batch each, against one precomputed table
+            G1_sections = [srs1_scalars, srs3_scalars, psi_scalars, u_at_tau, v_at_tau, [tau, alpha, beta, delta]]
+            G2_sections = [srs1_scalars, v_at_tau, [tau, beta, delta, gamma]]
+            with profiling.phase('G1 points'):
+                srs1, srs3, psi, u_query_G1, v_query_G1, (tau_G1, alpha_G1, beta_G1, delta_G1) = split_points(self.engine.multiply_G1(sum(G1_sections, [])), G1_sections)
+            with profiling.phase('G2 points'):
+                srs2, v_query_G2, (tau_G2, beta_G2, delta_G2, gamma_G2) = split_points(self.engine.multiply_G2(sum(G2_sections, [])), G2_sections)
+
+            with profiling.phase('save keys'):
+                self.save_keys(srs1, srs2, srs3, psi, num_public_inputs, alpha_G1, beta_G1, beta_G2, delta_G1, delta_G2, gamma_G2, tau_G1, tau_G2, u_query_G1, v_query_G1, v_query_G2)
+                if self.dev_mode:
+                    incremental.save_dev_state(self.example_path, self.key_format, (tau, alpha, beta, delta, gamma), r1cs, domain_size, num_public_inputs)
+
+            return srs1, srs2, srs3, psi
@@ -1,9 +1,8 @@
-from py_ecc.bn128.bn128_curve import G1, G2, curve_order
-from py_ecc.bn128.bn128_pairing import pairing
-from py_ecc.bn128.bn128_curve import multiply, add
+from group import group
+from fields.fields import scalar_field
+from profiling.profiling import get_logger
 
-from py_ecc.bn128 import FQ, FQ2  # type: ignore
-from galois import lagrange_poly, GF
+logger = get_logger('utils')
 
 
 
@@ -11,25 +10,27 @@ from galois import lagrange_poly, GF
 def save_json(data, json_path):
     import json
     with open(json_path, 'w') as f:
-        print("Opening file to save json data:", json_path)
+        logger.info("Opening file to save json data: %s", json_path)
         json.dump(data, f, indent=4)
 
 
 
-def lagrange_poly_vector(vector, galois_field=GF(curve_order)):
-
-    vector = galois_field(vector)
-    x_vals = galois_field.Range(1, len(vector) + 1)
-
-    return lagrange_poly(x_vals, vector)
+def poly_from_coeffs(coeffs, galois_field=None):
+    # coeffs are given lowest degree first, galois expects them highest degree first
+    from galois import Poly
+    galois_field = galois_field if galois_field is not None else scalar_field()
+    return Poly([int(coeff) for coeff in reversed(coeffs)], field=galois_field)
 
+# points are normalized to affine coordinates when they are serialized, whatever the group backend
 def serialize_point_G1(point):
     if point is None:
         return []
+    point = group.to_affine(point)
     return [int(coord) for coord in point]
 def serialize_point_G2(point):
     if point is None:
         return []
+    point = group.to_affine(point)
     return [ [int(coeff) for coeff in  point[0].coeffs], [int(coeff) for coeff in  point[1].coeffs] ]
 
 def serialize_points_G1(points):
@@ -41,7 +42,7 @@ def deserialize_point_G1(point):
     if point is None or (isinstance(point, list) and len(point) == 0):
         return None
     if len(point) == 2:
-        return (FQ(point[0]), FQ(point[1]))
+        return group.from_affine((int(point[0]), int(point[1])))
     raise ValueError(f"Invalid G1 point format: {point}")
 
 def deserialize_point_G2(point):
@@ -51,13 +52,10 @@ def deserialize_point_G2(point):
     y_coeffs = tuple(point[1])
     if len(x_coeffs) != 2 or len(y_coeffs) != 2:
         raise ValueError(f"Invalid G2 FQ2 coeffs: {point}")
-    return (FQ2(x_coeffs), FQ2(y_coeffs))
+    return group.from_affine((x_coeffs, y_coeffs))
 
 def deserialize_points_G1(points):
     return [deserialize_point_G1(point) for point in points]
 
 def deserialize_points_G2(points):
     return [deserialize_point_G2(point) for point in points]
-
-def get_coeff_from_poly(poly, degree):
-    return poly.coeffs[poly.degree - degree]
\ No newline at end of file
@@ -1,35 +1,145 @@
 
-from py_ecc.bn128.bn128_curve import G2, curve_order, multiply, add
-from py_ecc.bn128.bn128_pairing import pairing
+from py_ecc.bn128.bn128_curve import curve_order
+from group.group import multiply, neg, is_on_curve, is_in_subgroup
 from keys import keys
 from witness import witness
-from galois import GF
+from msm.msm import msm
+from multi_pairing.multi_pairing import prepare_G2, multi_miller_loop, final_exponentiate, FQ12_ONE
+from profiling import profiling
+import secrets
+
+
+class PreparedVerifyingKey:
+    # everything in the verification equation that only depends on the verifying key is computed once here:
+    # e(alpha, beta) is kept in GT, and the Miller loop lines of the fixed G2 points gamma, delta (and beta for batches) are precomputed
+    def __init__(self, alpha, beta, delta, gamma, psi):
+        self.alpha = alpha
+        self.beta = beta
+        self.delta = delta
+        self.gamma = gamma
+        self.psi = psi
+
+        self.beta_lines = prepare_G2(beta)
+        self.gamma_lines = prepare_G2(gamma)
+        self.delta_lines = prepare_G2(delta)
+        self.alpha_beta = final_exponentiate(multi_miller_loop([(alpha, self.beta_lines)]))
+
+
+def prepare_verifying_key(path = './examples/example1/verifying_key.json', key_format='json'):
+    alpha, beta, delta, gamma, psi = keys.get_key_format(key_format)['load_verifying_key'](path)
+    return PreparedVerifyingKey(alpha, beta, delta, gamma, psi)
+
 
 class Verifier:
-    def __init__(self, example_path='./examples/example1/'):
+    def __init__(self, example_path='./examples/example1/', key_format='json'):
 
         self.example_path = example_path
+        self.key_format = key_format
+        self.prepared_verifying_key = None
+
+    def load_prepared_verifying_key(self):
+        # the verifying key is prepared once per Verifier and reused by every verification
+        if self.prepared_verifying_key is None:
+            extension = keys.get_key_format(self.key_format)['extension']
+            self.prepared_verifying_key = prepare_verifying_key(self.example_path + 'verifying_key' + extension, key_format=self.key_format)
+        return self.prepared_verifying_key
+
+    def is_well_formed_proof(self, A, B, C):
+        # B is paired, a point of the twist outside of the subgroup of order r would make the pairing meaningless
+        return is_on_curve(A) and is_on_curve(B) and is_on_curve(C) and is_in_subgroup(B)
     
     def calulate_x(self, psi ):
         public_witness = witness.load_public_witness_from_json(
             json_path=self.example_path + 'public_witness.json',
-            galois_field=GF(curve_order)
+            modulo=curve_order
         )
-        X = None
-        for i in range(len(public_witness)):
-            a_i = public_witness[i]
-            psi_i = psi[i]
-            term = multiply(psi_i, int(a_i))
-            X = term if X is None else add(X, term)
-        return X
+        return msm(psi[:len(public_witness)], public_witness)
 
     def verify(self):
-        A, B, C = keys.load_proof_from_json(json_path=self.example_path + 'proof.json')
-        alpha, beta, delta, gamma, psi = keys.load_verifying_key_from_json(json_path=self.example_path + 'verifying_key.json')
+        with profiling.phase('verify'):
+            key_format = keys.get_key_format(self.key_format)
+            with profiling.phase('load proof'):
+                A, B, C = key_format['load_proof'](self.example_path + 'proof' + key_format['extension'])
+            with profiling.phase('prepare key'):
+                prepared_verifying_key = self.load_prepared_verifying_key()
+            assert self.is_well_formed_proof(A, B, C), "Proof points are not on the curve."
 
-        X = self.calulate_x(psi)
-        
-        assert pairing(B, A) == pairing(beta, alpha) * pairing(gamma, X) * pairing(delta, C), "Proof verification failed."
+            with profiling.phase('public input msm'):
+                X = self.calulate_x(prepared_verifying_key.psi)
+
+            # e(A, B) == e(alpha, beta) * e(X, gamma) * e(C, delta) is checked as e(A, B) * e(-X, gamma) * e(-C, delta) == e(alpha, beta)
+            # only B needs its lines computed here, and the three Miller loops share one final exponentiation
+            with profiling.phase('pairings'):
+                miller_loop_result = multi_miller_loop([
+                    (A, prepare_G2(B)),
+                    (neg(X), prepared_verifying_key.gamma_lines),
+                    (neg(C), prepared_verifying_key.delta_lines),
+                ])
+                assert final_exponentiate(miller_loop_result) == prepared_verifying_key.alpha_beta, "Proof verification failed."
 
         print("Proof verification succeeded.")
-        return True
\ No newline at end of file
+        return True
+
+    # the random coefficients only need to be unpredictable for the prover, 128 bits are enough for soundness
+    def generate_batch_coefficients(self, batch_size):
+        return [secrets.randbits(128) | 1 for _ in range(batch_size)]
+
+    def check_batch(self, proofs, public_witnesses, prepared_verifying_key):
+        # with random r_j, all the proofs hold at once if (except with negligible probability):
+        #   prod_j e(r_j A_j, B_j) * e(-(sum_j r_j) alpha, beta) * e(-sum_j r_j X_j, gamma) * e(-sum_j r_j C_j, delta) == 1
+        # all these pairings share one multi Miller loop and one final exponentiation
+        coefficients = self.generate_batch_coefficients(len(proofs))
+
+        pairs = [(multiply(A, r_j), prepare_G2(B)) for (A, B, C), r_j in zip(proofs, coefficients)]
+
+        # sum_j r_j X_j = sum_i (sum_j r_j a_ji) psi_i, so the public inputs are combined before a single MSM
+        public_inputs_nb = max(len(public_witness) for public_witness in public_witnesses)
+        combined_public_witness = [0] * public_inputs_nb
+        for public_witness, r_j in zip(public_witnesses, coefficients):
+            for i, a_ji in enumerate(public_witness):
+                combined_public_witness[i] = (combined_public_witness[i] + r_j * int(a_ji)) % curve_order
+
+        X = msm(prepared_verifying_key.psi[:public_inputs_nb], combined_public_witness)
+        C = msm([C for (A, B, C) in proofs], coefficients)
+        alpha_sum = multiply(prepared_verifying_key.alpha, sum(coefficients) % curve_order)
+
+        pairs += [
+            (neg(alpha_sum), prepared_verifying_key.beta_lines),
+            (neg(X), prepared_verifying_key.gamma_lines),
+            (neg(C), prepared_verifying_key.delta_lines),
+        ]
+        return final_exponentiate(multi_miller_loop(pairs)) == FQ12_ONE
+
+    def find_failed_proofs(self, indices, proofs, public_witnesses, prepared_verifying_key):
+        # bisection: a batch that holds is fully valid, a failing batch is split in two until the failing proofs are isolated
+        if len(indices) == 0:
+            return []
+        if self.check_batch([proofs[i] for i in indices], [public_witnesses[i] for i in indices], prepared_verifying_key):
+            return []
+        if len(indices) == 1:
+            return indices
+        middle = len(indices) // 2
+        return self.find_failed_proofs(indices[:middle], proofs, public_witnesses, prepared_verifying_key) + self.find_failed_proofs(indices[middle:], proofs, public_witnesses, prepared_verifying_key)
+
+    def batch_verify(self, proofs, public_witnesses):
+        # proofs is a list of (A, B, C), public_witnesses the matching list of public witnesses, all against the example's verifying key
+        # returns the indices of the proofs that failed, an empty list means that every proof is valid
+        assert len(proofs) == len(public_witnesses), "Each proof must come with its public witness"
+        prepared_verifying_key = self.load_prepared_verifying_key()
+
+        failed = []
+        candidates = []
+        for i, ((A, B, C), public_witness) in enumerate(zip(proofs, public_witnesses)):
+            # malformed proofs are rejected before they can spoil the batch
+            if not self.is_well_formed_proof(A, B, C) or len(public_witness) > len(prepared_verifying_key.psi):
+                failed.append(i)
+            else:
+                candidates.append(i)
+
+        failed = sorted(failed + self.find_failed_proofs(candidates, proofs, public_witnesses, prepared_verifying_key))
+
+        if len(failed) == 0:
+            print(f"Batch verification succeeded for {len(proofs)} proofs.")
+        else:
+            print(f"Batch verification failed for {len(failed)} out of {len(proofs)} proofs: {failed}")
+        return failed
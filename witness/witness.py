@@ -1,9 +1,27 @@
 import json
 
 
+def values_to_ints(values):
+    # a galois FieldArray is turned into ints in one call, iterating it element by element is much slower
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+    return [int(value) for value in values]
+
+def convert_values(values, modulo=None, galois_field=None):
+    # if galois_field is provided, convert to one array of galois field elements (a single bulk conversion)
+    if galois_field is not None:
+        return galois_field([int(value) % galois_field.order for value in values])
+
+    # ensure all entries are integers modulo the given modulo
+    if modulo is not None:
+        return [int(value) % modulo for value in values]
+
+    return values
+
+
 def load_witness_from_json(json_path = './examples/example1/witness.json', modulo = None, galois_field=None):
 
-    
+
 
     with open(json_path, 'r') as f:
         data = json.load(f)
@@ -11,23 +29,12 @@ def load_witness_from_json(json_path = './examples/example1/witness.json', modul
 
     assert len(witness) > 0, "Witness cannot be empty"
 
-    # if galois_field is provided, convert to galois field elements
-    if galois_field is not None:
-        witness = [galois_field(val) for val in witness]
-        return witness
-    
-    # ensure all entries are integers modulo the given modulo
-    if modulo is not None:
-        witness = [int(val) % modulo for val in witness]
-
-        
-
-    return witness
+    return convert_values(witness, modulo=modulo, galois_field=galois_field)
 
 
 def load_public_witness_from_json(json_path = './examples/example1/public_witness.json', modulo = None, galois_field=None):
 
-    
+
 
     with open(json_path, 'r') as f:
         data = json.load(f)
@@ -35,18 +42,7 @@ def load_public_witness_from_json(json_path = './examples/example1/public_witnes
 
     assert len(public_witness) > 0, "Public witness cannot be empty"
 
-    # if galois_field is provided, convert to galois field elements
-    if galois_field is not None:
-        public_witness = [galois_field(val) for val in public_witness]
-        return public_witness
-    
-    # ensure all entries are integers modulo the given modulo
-    if modulo is not None:
-        public_witness = [int(val) % modulo for val in public_witness]
-
-        
-
-    return public_witness
+    return convert_values(public_witness, modulo=modulo, galois_field=galois_field)
 
 def public_inputs_length(json_path = './examples/example1/public_witness.json'):
     public_witness = load_public_witness_from_json(json_path=json_path)